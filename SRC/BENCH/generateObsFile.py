@@ -0,0 +1,151 @@
+import sys
+import numpy as np
+from COMMON import GnssConstants as Const
+from InputOutput import ObsIdxC, ObsIdxP, SatLabels
+from InputOutput import NAV_SOLUTION_CONSTELS
+
+# Format of the OBS records (see readObsEpoch)
+ObsFmtC = "C %6d %s %8.3f %8.3f %15.3f %15.3f %6.2f %6.2f\n"
+ObsFmtP = "P %6d %s %16.3f %16.3f\n"
+
+def generateObsFile(ObsFile, NSats=20, Rate=1, Slips=0, Gaps=0, Outliers=0,
+Seed=0, NavSolution="GPS+Galileo"):
+
+    # Purpose: generate one day of synthetic LEO OBS file with the
+    #          given number of satellites in view and sampling rate,
+    #          injecting cycle slips, data gaps and code outliers.
+    #
+    #          Each satellite is seen in passes of 20 to 50 minutes
+    #          (elevation rising and setting) separated by outages,
+    #          so that NSats satellites are in view on average.
+    #          The ranges follow a LEO-GNSS flyby and the codes and
+    #          phases include the ionosphere and white noise:
+    #            C1 = Rho + I + n              L1 = (Rho - I) / W1 + N1
+    #            C2 = Rho + Gamma * I + n      L2 = (Rho - Gamma * I) / W2 + N2
+    #          The injected events are:
+    #            Slips: jump of some cycles in L1 and L2 until the end
+    #                   of the pass
+    #            Gaps: outage of 20 to 300 seconds within a pass
+    #            Outliers: error of 100 to 1000 meters in one C1
+
+    # Parameters
+    # ==========
+    # ObsFile: str
+    #         Path to the OBS file to generate
+    # NSats: int
+    #         Mean number of satellites in view
+    # Rate: int
+    #         Sampling rate in seconds
+    # Slips, Gaps, Outliers: int
+    #         Number of injected cycle slips, data gaps and outliers
+    # Seed: int
+    #         Seed of the random generator
+    # NavSolution: str
+    #         Constellations of the satellites (see NAV_SOLUTION_CONSTELS)
+
+    # Returns
+    # =======
+    # ObsStats: dict
+    #         Number of epochs and records of the generated file
+
+    Rng = np.random.default_rng(Seed)
+
+    # Candidate satellites
+    Prefixes = NAV_SOLUTION_CONSTELS[NavSolution]
+    Labels = [Label for Label in SatLabels if Label[0] in Prefixes]
+    if NSats < 1 or NSats > len(Labels):
+        sys.stderr.write("ERROR: Number of satellites must be between 1 and %d\n" %
+        len(Labels))
+        sys.exit(-1)
+
+    Epochs = np.arange(0, Const.S_IN_D, Rate)
+    Duty = float(NSats) / len(Labels)
+
+    # Records of all the satellites
+    Sats = []
+    Passes = []
+
+    for Sat, Label in enumerate(Labels):
+        Gamma = Const.GPS_GAMMA_L1L2 if Label[0] == 'G' else Const.GAL_GAMMA_E1E5A
+        WaveF1 = Const.GPS_L1_WAVE if Label[0] == 'G' else Const.GAL_E1_WAVE
+        WaveF2 = Const.GPS_L2_WAVE if Label[0] == 'G' else Const.GAL_E5A_WAVE
+
+        # Passes of the satellite
+        Start = -Rng.uniform(0, 3000.0 / Duty)
+        while Start < Const.S_IN_D:
+            Duration = Rng.uniform(1200, 3000)
+            Pass = Epochs[(Epochs >= Start) & (Epochs < Start + Duration)]
+            if len(Pass) > 1:
+                Passes.append(len(Sats))
+
+                # Geometry of the flyby
+                Phase = (Pass - Start) / Duration
+                Elev = Rng.uniform(20, 90) * np.sin(np.pi * Phase)
+                Azim = (Rng.uniform(0, 360) + 180 * Phase) % 360
+                Tc = Pass - (Start + Duration / 2)
+                Rho = np.sqrt(Rng.uniform(19.5e6, 21e6)**2 + (Rng.uniform(2000, 4000) * Tc)**2)
+                Iono = Rng.uniform(0.5, 5) * (3 - 2 * np.sin(np.radians(Elev)))
+
+                # Measurements
+                Sigma = 0.3 * (2 - np.sin(np.radians(Elev)))
+                S1 = 35 + 15 * np.sin(np.radians(Elev)) + Rng.normal(0, 0.5, len(Pass))
+                Sats.append({
+                    "SOD": Pass,
+                    "PRN": np.full(len(Pass), Label),
+                    "ELEV": Elev,
+                    "AZIM": Azim,
+                    "C1": Rho + Iono + Rng.normal(0, 1, len(Pass)) * Sigma,
+                    "C2": Rho + Gamma * Iono + Rng.normal(0, 1, len(Pass)) * Sigma,
+                    "S1": S1,
+                    "S2": S1 - 3 + Rng.normal(0, 0.5, len(Pass)),
+                    "L1": (Rho - Iono + Rng.normal(0, 0.002, len(Pass))) / WaveF1 + \
+                        Rng.integers(-10**6, 10**6),
+                    "L2": (Rho - Gamma * Iono + Rng.normal(0, 0.002, len(Pass))) / WaveF2 + \
+                        Rng.integers(-10**6, 10**6),
+                    })
+
+            Start += Duration + Rng.uniform(0.5, 1.5) * 2100 * (1 - Duty) / Duty
+
+    # Inject cycle slips (until the end of the pass)
+    for Pass in Rng.choice(Passes, Slips):
+        First = Rng.integers(1, len(Sats[Pass]["SOD"]))
+        Sats[Pass]["L1"][First:] += Rng.choice([-1, 1]) * Rng.integers(1, 50)
+        Sats[Pass]["L2"][First:] += Rng.choice([-1, 1]) * Rng.integers(1, 50)
+
+    # Inject code outliers
+    for Pass in Rng.choice(Passes, Outliers):
+        Epoch = Rng.integers(0, len(Sats[Pass]["SOD"]))
+        Sats[Pass]["C1"][Epoch] += Rng.choice([-1, 1]) * Rng.uniform(100, 1000)
+
+    # Inject data gaps (removing the records)
+    for Pass in Rng.choice(Passes, Gaps):
+        Gap = Rng.uniform(Sats[Pass]["SOD"][0], Sats[Pass]["SOD"][-1]) + \
+            np.array([0, Rng.uniform(20, 300)])
+        Keep = (Sats[Pass]["SOD"] < Gap[0]) | (Sats[Pass]["SOD"] > Gap[1])
+        for Key in Sats[Pass]:
+            Sats[Pass][Key] = Sats[Pass][Key][Keep]
+
+    # Sort the records by epoch (and satellite)
+    Obs = {Key: np.concatenate([Sat[Key] for Sat in Sats]) for Key in Sats[0]}
+    Order = np.argsort(Obs["SOD"], kind='stable')
+    Obs = {Key: Values[Order] for Key, Values in Obs.items()}
+
+    # Write the Code records followed by the Phase records of each epoch
+    LinesC = [ObsFmtC % Record for Record in
+        zip(*[Obs[Key].tolist() for Key in ObsIdxC])]
+    LinesP = [ObsFmtP % Record for Record in
+        zip(*[Obs[Key].tolist() for Key in ObsIdxP])]
+    Bounds = np.concatenate(([0], np.flatnonzero(np.diff(Obs["SOD"])) + 1,
+        [len(Order)])).tolist()
+
+    with open(ObsFile, 'w') as f:
+        for Start, End in zip(Bounds[:-1], Bounds[1:]):
+            f.writelines(LinesC[Start:End])
+            f.writelines(LinesP[Start:End])
+
+    ObsStats = {"epochs": len(Bounds) - 1, "records": len(Order),
+        "slips": Slips, "gaps": Gaps, "outliers": Outliers}
+
+    return ObsStats
+
+# End of generateObsFile()
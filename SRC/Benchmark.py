@@ -0,0 +1,384 @@
+#!/usr/bin/env python
+
+########################################################################
+# Benchmark.py:
+# This is the Benchmark Module of SENTUS tool
+#
+#  Project:        SENTUS
+#  File:           Benchmark.py
+#
+#   Author: GNSS Academy
+#   Copyright 2024 GNSS Academy
+#
+# Usage:
+#   Benchmark.py $BENCH_PATH [--sats N] [--rate S] [--days N]
+#                [--slips N] [--gaps N] [--outliers N] [--seed N]
+#                [--engine EPOCH|ARCS] [--io-queue N] [--no-plots] [--repeat N]
+#                [--cfg CFG_FILE] [--out BASELINE.json]
+#                [--compare BASELINE.json] [--tolerance T]
+#
+# The benchmark creates a SCENARIO in $BENCH_PATH with synthetic OBS
+# files, runs the preprocessing chain of Sentus.py over them with the
+# profiling activated and reports the time of the stages (reader,
+# preprocessing, writer and plots). The results can be stored as a
+# JSON baseline and compared with the baseline of other version.
+########################################################################
+
+import sys, os
+
+# Update Path to reach COMMON
+Common = os.path.dirname(
+    os.path.abspath(sys.argv[0])) + '/COMMON'
+sys.path.insert(0, Common)
+
+# Import External and Internal functions and Libraries
+#----------------------------------------------------------------------
+import json
+import platform
+from argparse import ArgumentParser
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+from InputOutput import readConf
+from InputOutput import processConf
+from Sentus import processDay
+from BENCH.generateObsFile import generateObsFile
+from COMMON.Profiling import Profiler
+from COMMON.Dates import convertJulianDay2YearMonthDay
+from COMMON.Dates import convertYearMonthDay2Doy
+
+# Default configuration of the benchmark SCENARIO
+DefaultCfgFile = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])),
+    '..', 'SCN', 'SCEN-SENTINEL6A-JAN24', 'CFG', 'sentus.cfg')
+
+#----------------------------------------------------------------------
+# INTERNAL FUNCTIONS
+#----------------------------------------------------------------------
+
+def displayUsage():
+    sys.stderr.write("ERROR: Please provide path to BENCHMARK SCENARIO as first argument\n")
+    sys.stderr.write("Usage: Benchmark.py $BENCH_PATH [--sats N] [--rate S] [--days N] "
+        "[--slips N] [--gaps N] [--outliers N] [--seed N] [--engine EPOCH|ARCS] "
+        "[--io-queue N] [--no-plots] [--repeat N] [--cfg CFG_FILE] [--out BASELINE.json] "
+        "[--compare BASELINE.json] [--tolerance T]\n")
+
+def parseOptions(Args):
+
+    # Purpose: parse the command line options following the BENCHMARK
+    #          SCENARIO path
+
+    # Parameters
+    # ==========
+    # Args: list
+    #         Command line arguments after the BENCHMARK SCENARIO path
+
+    # Returns
+    # =======
+    # Options: argparse.Namespace
+    #         Command line options
+
+    Parser = ArgumentParser(prog="Benchmark.py $BENCH_PATH")
+    Parser.add_argument("--sats", dest="Sats", type=int, default=20,
+        help="Mean number of satellites in view (default 20)")
+    Parser.add_argument("--rate", dest="Rate", type=int, default=1,
+        help="Sampling rate in seconds, from 1 to 30 (default 1)")
+    Parser.add_argument("--days", dest="Days", type=int, default=1,
+        help="Number of days (default 1)")
+    Parser.add_argument("--slips", dest="Slips", type=int, default=50,
+        help="Number of injected cycle slips per day (default 50)")
+    Parser.add_argument("--gaps", dest="Gaps", type=int, default=50,
+        help="Number of injected data gaps per day (default 50)")
+    Parser.add_argument("--outliers", dest="Outliers", type=int, default=50,
+        help="Number of injected code outliers per day (default 50)")
+    Parser.add_argument("--seed", dest="Seed", type=int, default=0,
+        help="Seed of the synthetic OBS files (default 0)")
+    Parser.add_argument("--engine", dest="Engine", default="EPOCH",
+        choices=["EPOCH", "ARCS"], help="Preprocessing engine (default EPOCH)")
+    Parser.add_argument("--io-queue", dest="IoQueue", type=int, default=0,
+        help="Epochs read ahead and written behind in background threads "
+        "(default 0, no I/O threads)")
+    Parser.add_argument("--no-plots", dest="Plots", action="store_false",
+        help="Do not generate the PREPRO figures")
+    Parser.add_argument("--repeat", dest="Repeat", type=int, default=1,
+        help="Number of runs, keeping the fastest time of each stage (default 1)")
+    Parser.add_argument("--cfg", dest="CfgFile", default=DefaultCfgFile,
+        help="Configuration file used as template (default the one of "
+        "SCEN-SENTINEL6A-JAN24)")
+    Parser.add_argument("--out", dest="Out", default=None, metavar="PATH",
+        help="Write the results as a JSON baseline")
+    Parser.add_argument("--compare", dest="Compare", default=None, metavar="PATH",
+        help="Compare the results with a JSON baseline")
+    Parser.add_argument("--tolerance", dest="Tolerance", type=float, default=0.1,
+        help="Relative slowdown of a stage reported as regression (default 0.1)")
+    Options = Parser.parse_args(Args)
+
+    if Options.Rate < 1 or Options.Rate > 30:
+        sys.stderr.write("ERROR: --rate must be between 1 and 30 seconds\n")
+        sys.exit(-1)
+
+    if Options.Sats < 1 or Options.Days < 1 or Options.Repeat < 1:
+        sys.stderr.write("ERROR: --sats, --days and --repeat must be positive integers\n")
+        sys.exit(-1)
+
+    return Options
+
+# End of parseOptions()
+
+def createBenchScenario(Scen, Options):
+
+    # Purpose: create the BENCHMARK SCENARIO: configuration file from
+    #          the template and synthetic OBS files of all the days
+
+    # Parameters
+    # ==========
+    # Scen: str
+    #         Path to BENCHMARK SCENARIO
+    # Options: argparse.Namespace
+    #         Command line options
+
+    # Returns
+    # =======
+    # ObsStats: list
+    #         Number of epochs and records of each OBS file
+
+    for Dir in ('CFG', 'INP/OBS', 'OUT/PPVE/SAT'):
+        if not os.path.exists(os.path.join(Scen, Dir)):
+            os.makedirs(os.path.join(Scen, Dir))
+
+    # Read the template configuration
+    Conf = processConf(readConf(Options.CfgFile))
+
+    # Parameters overridden in the template
+    Params = OrderedDict({})
+    Year, Month, Day = convertJulianDay2YearMonthDay(Conf["INI_DATE_JD"] + Options.Days - 1)
+    Params["END_DATE"] = "%02d/%02d/%04d" % (Day, Month, Year)
+    Params["SAMPLING_RATE"] = "%d" % Options.Rate
+    Params["PREPRO_OUT"] = "1"
+    Params["PREPRO_ENGINE"] = Options.Engine
+
+    # Write the BENCHMARK configuration file
+    with open(Options.CfgFile, 'r') as f:
+        Lines = f.readlines()
+
+    with open(os.path.join(Scen, 'CFG', 'sentus.cfg'), 'w') as f:
+        for Line in Lines:
+            Key = Line.split(' ')[0]
+            if Line[0] != '#' and Key in Params:
+                Line = "%s  %s\n" % (Key, Params[Key])
+            f.write(Line)
+
+    # Generate the OBS files
+    ObsStats = []
+    for Jd in range(Conf["INI_DATE_JD"], Conf["INI_DATE_JD"] + Options.Days):
+        Year, Month, Day = convertJulianDay2YearMonthDay(Jd)
+        Doy = convertYearMonthDay2Doy(Year, Month, Day)
+        ObsFile = Scen + \
+            '/INP/OBS/' + "OBS_%s_Y%02dD%03d.dat.mod" % \
+                (Conf['SAT_ACRONYM'], Year % 100, Doy)
+
+        # Display Message
+        print("INFO: Generating file: %s..." % ObsFile)
+
+        ObsStats.append(generateObsFile(ObsFile, Options.Sats, Options.Rate,
+        Options.Slips, Options.Gaps, Options.Outliers, Options.Seed + Jd,
+        Conf["NAV_SOLUTION"]))
+
+    return ObsStats
+
+# End of createBenchScenario()
+
+def runBenchmark(Scen, Options):
+
+    # Purpose: run the preprocessing chain over the BENCHMARK SCENARIO
+    #          keeping the fastest time of each stage over the runs
+
+    # Parameters
+    # ==========
+    # Scen: str
+    #         Path to BENCHMARK SCENARIO
+    # Options: argparse.Namespace
+    #         Command line options
+
+    # Returns
+    # =======
+    # Records: dict
+    #         Profiling records of the stages (see StageProfiler)
+
+    Conf = processConf(readConf(Scen + '/CFG/sentus.cfg'))
+
+    Profiler.Enabled = True
+    Best = OrderedDict({})
+
+    for Run in range(Options.Repeat):
+        Profiler.Records.clear()
+        for Jd in range(Conf["INI_DATE_JD"], Conf["END_DATE_JD"] + 1):
+            processDay(Scen, Conf, Jd, Plots=Options.Plots, IoQueue=Options.IoQueue)
+
+        for Key, Record in Profiler.Records.items():
+            if Key not in Best or Record[1] < Best[Key][1]:
+                Best[Key] = list(Record)
+
+    Profiler.Records = Best
+
+    return Best
+
+# End of runBenchmark()
+
+def getStageTotals(Stages):
+
+    # Purpose: get the time of each stage for all the days
+
+    # Parameters
+    # ==========
+    # Stages: list
+    #         Baseline stages records (dictionaries)
+
+    # Returns
+    # =======
+    # Totals: dict
+    #         Totals[Stage] = [Calls, Wall, Cpu]
+
+    Totals = OrderedDict({})
+    for Stage in Stages:
+        if Stage["day"] in ("-", "ALL"):
+            continue
+        Total = Totals.setdefault(Stage["stage"], [0, 0.0, 0.0])
+        Total[0] += Stage["calls"]
+        Total[1] += Stage["wall"]
+        Total[2] += Stage["cpu"]
+
+    return Totals
+
+# End of getStageTotals()
+
+def compareBaseline(Results, BaselineFile, Tolerance):
+
+    # Purpose: display the time of the stages against a baseline
+
+    # Parameters
+    # ==========
+    # Results: dict
+    #         Benchmark results
+    # BaselineFile: str
+    #         Path to JSON baseline
+    # Tolerance: float
+    #         Relative slowdown reported as regression
+
+    # Returns
+    # =======
+    # Regressions: list
+    #         Stages slower than the baseline
+
+    with open(BaselineFile, 'r') as f:
+        Baseline = json.load(f)
+
+    print( '\n------------------------------------')
+    print( '--> BENCHMARK vs %s:' % BaselineFile)
+    print( '------------------------------------')
+
+    if Baseline["benchmark"] != Results["benchmark"]:
+        print("WARNING: Benchmark parameters differ from the baseline ones:")
+        for Key, Value in Results["benchmark"].items():
+            if Baseline["benchmark"].get(Key) != Value:
+                print("WARNING:   %s: %s (baseline %s)" %
+                (Key, Value, Baseline["benchmark"].get(Key)))
+
+    Current = getStageTotals(Results["stages"])
+    Previous = getStageTotals(Baseline["stages"])
+    Width = max([len(Name) for Name in Current] + [5])
+    print("%-*s %12s %12s %8s" % (Width, "STAGE", "BASE[s]", "WALL[s]", "RATIO"))
+
+    Regressions = []
+    for Name, (Calls, Wall, Cpu) in Current.items():
+        if Name not in Previous:
+            print("%-*s %12s %12.3f %8s" % (Width, Name, "-", Wall, "-"))
+            continue
+        BaseWall = Previous[Name][1]
+        Ratio = Wall / BaseWall if BaseWall > 0 else float("inf")
+        Flag = ""
+        if Ratio > 1 + Tolerance:
+            Flag = " SLOWER"
+            Regressions.append(Name)
+        elif Ratio < 1 - Tolerance:
+            Flag = " FASTER"
+        print("%-*s %12.3f %12.3f %8.2f%s" % (Width, Name, BaseWall, Wall, Ratio, Flag))
+
+    return Regressions
+
+# End of compareBaseline()
+
+#######################################################
+# MAIN BODY
+#######################################################
+
+if __name__ == "__main__":
+
+    # Check InputOutput Arguments
+    # (the SCENARIO path must be the first one, see PreprocessingPlots)
+    if len(sys.argv) < 2 or sys.argv[1].startswith("-"):
+        displayUsage()
+        sys.exit()
+
+    # Extract the arguments
+    Scen = sys.argv[1]
+    Options = parseOptions(sys.argv[2:])
+
+    # Print header
+    print( '------------------------------------')
+    print( '--> RUNNING SENTUS BENCHMARK:')
+    print( '------------------------------------')
+
+    # Generate the BENCHMARK SCENARIO
+    ObsStats = createBenchScenario(Scen, Options)
+
+    # Run the preprocessing chain
+    Records = runBenchmark(Scen, Options)
+
+    # Benchmark results
+    Results = OrderedDict({})
+    Results["benchmark"] = OrderedDict([("sats", Options.Sats),
+        ("rate", Options.Rate), ("days", Options.Days),
+        ("slips", Options.Slips), ("gaps", Options.Gaps),
+        ("outliers", Options.Outliers), ("seed", Options.Seed),
+        ("engine", Options.Engine), ("io_queue", Options.IoQueue),
+        ("plots", Options.Plots),
+        ("repeat", Options.Repeat)])
+    Results["host"] = OrderedDict([("python", platform.python_version()),
+        ("numpy", np.__version__), ("platform", platform.platform()),
+        ("cpus", os.cpu_count())])
+    Results["date"] = datetime.now().isoformat(timespec="seconds")
+    Results["obs"] = OrderedDict([
+        ("epochs", sum([Stats["epochs"] for Stats in ObsStats])),
+        ("records", sum([Stats["records"] for Stats in ObsStats]))])
+    Results["stages"] = [OrderedDict(zip(["day", "stage", "calls", "wall", "cpu"], Line))
+        for Line in Profiler.getReport()]
+
+    print( '\n------------------------------------')
+    print( '--> END OF SENTUS BENCHMARK')
+    print( '------------------------------------')
+
+    # Report the time of the stages
+    Profiler.printReport()
+    print("OBS epochs: %d, records: %d" %
+    (Results["obs"]["epochs"], Results["obs"]["records"]))
+
+    # Write the JSON baseline
+    if Options.Out is not None:
+        Dir = os.path.dirname(Options.Out)
+        if Dir and not os.path.exists(Dir):
+            os.makedirs(Dir)
+        with open(Options.Out, 'w') as f:
+            json.dump(Results, f, indent=1)
+        print("INFO: Benchmark baseline written in %s" % Options.Out)
+
+    # Compare with a JSON baseline
+    if Options.Compare is not None:
+        Regressions = compareBaseline(Results, Options.Compare, Options.Tolerance)
+        if Regressions:
+            sys.stderr.write("ERROR: Stages slower than the baseline: %s\n" %
+            ", ".join(Regressions))
+            sys.exit(-1)
+
+#######################################################
+# End of Benchmark.py
+#######################################################
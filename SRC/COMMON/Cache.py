@@ -0,0 +1,179 @@
+
+import sys, os
+import hashlib
+import shutil
+
+# Version of the cached results (change it when their content changes)
+CACHE_VERSION = 2
+
+# Size of the blocks read when hashing a file
+HASH_BLOCK_SIZE = 1 << 20
+
+class ResultCache:
+
+    # Purpose: content-addressed cache of result files in a directory.
+    #          The key of a result is the hash of the contents of its
+    #          input files and of the parameters it depends on, so that
+    #          a result is only reused for the same inputs. When the
+    #          directory exceeds MaxSize bytes, the least recently used
+    #          results are evicted
+
+    # Parameters
+    # ==========
+    # Dir: str
+    #         Directory of the cached results
+    # MaxSize: int
+    #         Maximum size of the cached results [bytes]
+
+    def __init__(self, Dir, MaxSize):
+        self.Dir = Dir
+        self.MaxSize = MaxSize
+        if not os.path.exists(Dir):
+            os.makedirs(Dir)
+
+    # End of __init__()
+
+    def getKey(self, Files, Params):
+
+        # Purpose: get the key of the result of some input files and
+        #          parameters
+
+        # Parameters
+        # ==========
+        # Files: list
+        #         Paths to the input files
+        # Params: list
+        #         (Name, Value) pairs of the parameters
+
+        # Returns
+        # =======
+        # Key: str
+        #         Hexadecimal hash of the inputs
+
+        Hash = hashlib.sha256(("%d" % CACHE_VERSION).encode())
+        for Path in Files:
+            with open(Path, 'rb') as f:
+                for Block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                    Hash.update(Block)
+        Hash.update(repr(sorted(Params)).encode())
+        return Hash.hexdigest()
+
+    # End of getKey()
+
+    def getPath(self, Key, Ext):
+
+        # Purpose: get the path to a result in the cache
+
+        # Parameters
+        # ==========
+        # Key: str
+        #         Key of the result (see getKey)
+        # Ext: str
+        #         Extension of the result file
+
+        # Returns
+        # =======
+        # Path: str
+        #         Path to the result file
+
+        return os.path.join(self.Dir, Key + Ext)
+
+    # End of getPath()
+
+    def get(self, Key, Ext):
+
+        # Purpose: look up a result, and mark it as recently used
+
+        # Parameters
+        # ==========
+        # Key: str
+        #         Key of the result (see getKey)
+        # Ext: str
+        #         Extension of the result file
+
+        # Returns
+        # =======
+        # Path: str
+        #         Path to the cached result (None if not cached)
+
+        Path = self.getPath(Key, Ext)
+        if not os.path.isfile(Path):
+            return None
+        os.utime(Path)
+        return Path
+
+    # End of get()
+
+    def getTempPath(self, Key, Ext):
+
+        # Purpose: get the path where a result can be written before
+        #          storing it (see put)
+
+        # Parameters
+        # ==========
+        # Key: str
+        #         Key of the result (see getKey)
+        # Ext: str
+        #         Extension of the result file
+
+        # Returns
+        # =======
+        # Path: str
+        #         Path to the temporary file
+
+        return self.getPath(Key, Ext) + ".%d.tmp" % os.getpid()
+
+    # End of getTempPath()
+
+    def put(self, Key, Ext, Path, Move=False):
+
+        # Purpose: store a result file in the cache and evict the least
+        #          recently used results
+
+        # Parameters
+        # ==========
+        # Key: str
+        #         Key of the result (see getKey)
+        # Ext: str
+        #         Extension of the result file
+        # Path: str
+        #         Path to the result file
+        # Move: bool
+        #         Move the file instead of copying it (e.g. a temporary
+        #         file, see getTempPath)
+
+        Tmp = self.getTempPath(Key, Ext)
+        if Move:
+            os.replace(Path, Tmp)
+        else:
+            shutil.copyfile(Path, Tmp)
+        os.replace(Tmp, self.getPath(Key, Ext))
+        self.evict()
+
+    # End of put()
+
+    def evict(self):
+
+        # Purpose: remove the least recently used results until the
+        #          size of the cache is below its maximum (the
+        #          temporary files are kept)
+
+        Entries = []
+        for Name in os.listdir(self.Dir):
+            Path = os.path.join(self.Dir, Name)
+            if Name.endswith(".tmp") or not os.path.isfile(Path):
+                continue
+            Stat = os.stat(Path)
+            Entries.append((Stat.st_mtime, Stat.st_size, Path))
+
+        Size = sum([Entry[1] for Entry in Entries])
+        for _, EntrySize, Path in sorted(Entries):
+            if Size <= self.MaxSize:
+                break
+            os.remove(Path)
+            Size -= EntrySize
+            print("INFO: Evicted cached result: %s" % Path)
+
+    # End of evict()
+
+# End of class ResultCache
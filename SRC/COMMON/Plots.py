@@ -40,6 +40,7 @@ def saveFigure(fig, Path):
         os.makedirs(Dir)
     except: pass
     fig.savefig(Path, dpi=150., bbox_inches='tight')
+    plt.close(fig)
 
 def prepareAxis(PlotConf, ax):
     for key in PlotConf:
@@ -384,4 +385,22 @@ def generatePlot(PlotConf):
     if(PlotConf["Type"] == "Lines"):
         generateLinesPlot(PlotConf)
     elif(PlotConf["Type"] == "Polar"):
-        generatePolarPlot(PlotConf)
\ No newline at end of file
+        generatePolarPlot(PlotConf)
+
+def initPlotWorker():
+    # Plot workers are headless
+    plt.switch_backend("Agg")
+
+def generatePlots(PlotConfs, Pool=None):
+    # Generate the plots in this process or submit them to a pool of
+    # plot workers (initialized with initPlotWorker). The PlotConfs
+    # must be picklable to be submitted.
+    # Returns the list of Futures of the submitted plots
+    Futures = []
+    for PlotConf in PlotConfs:
+        if Pool is None:
+            generatePlot(PlotConf)
+        else:
+            Futures.append(Pool.submit(generatePlot, PlotConf))
+
+    return Futures
@@ -0,0 +1,329 @@
+
+import sys, os
+import json
+import threading
+from time import perf_counter, process_time
+from collections import OrderedDict
+from contextlib import nullcontext
+
+# Stage used when profiling is not activated
+NoStage = nullcontext()
+
+class Stage:
+
+    # Purpose: context measuring the wall and CPU time of one call
+    #          to a stage, recorded in the profiler when it exits.
+    #          The stage is named after the stages it is nested in
+    #          (see StageProfiler)
+
+    # Parameters
+    # ==========
+    # Profiler: StageProfiler
+    #         Profiler where the call is recorded
+    # Name: str
+    #         Name of the stage
+
+    def __init__(self, Profiler, Name):
+        self.Profiler = Profiler
+        self.Name = Name
+
+    # End of __init__()
+
+    def __enter__(self):
+        self.Profiler.Stack.append(self.Name)
+        self.Wall = perf_counter()
+        self.Cpu = process_time()
+        return self
+
+    # End of __enter__()
+
+    def __exit__(self, *Exc):
+        Wall = perf_counter() - self.Wall
+        Cpu = process_time() - self.Cpu
+        self.Profiler.add("/".join(self.Profiler.Stack), 1, Wall, Cpu)
+        self.Profiler.Stack.pop()
+        return False
+
+    # End of __exit__()
+
+# End of class Stage
+
+class Laps:
+
+    # Purpose: measure consecutive stages of a function without
+    #          nesting them in a context: each call to lap records
+    #          the time elapsed since the previous one (or since
+    #          the Laps were created)
+
+    # Parameters
+    # ==========
+    # Profiler: StageProfiler
+    #         Profiler where the stages are recorded
+
+    def __init__(self, Profiler):
+        self.Profiler = Profiler
+        self.Wall = perf_counter()
+        self.Cpu = process_time()
+
+    # End of __init__()
+
+    def lap(self, Name):
+
+        # Purpose: record the stage ending now
+
+        # Parameters
+        # ==========
+        # Name: str
+        #         Name of the stage
+
+        Wall = perf_counter()
+        Cpu = process_time()
+        self.Profiler.add("/".join(self.Profiler.Stack + [Name]), 1,
+            Wall - self.Wall, Cpu - self.Cpu)
+        self.Wall = Wall
+        self.Cpu = Cpu
+
+    # End of lap()
+
+# End of class Laps
+
+class NullLaps:
+
+    # Purpose: Laps used when profiling is not activated (records
+    #          nothing)
+
+    def lap(self, Name):
+        pass
+
+    # End of lap()
+
+# End of class NullLaps
+
+NoLaps = NullLaps()
+
+class StageProfiler:
+
+    # Purpose: record the number of calls and the wall and CPU time
+    #          of the processing stages per day.
+    #
+    #          Nested stages are named after their parents, e.g.
+    #          "PREPRO/HATCH_FILTER", and their time is included in
+    #          the one of their parents. Stages may run in several
+    #          threads: each thread has its own stack of stages and
+    #          the CPU time is the one of the whole process
+
+    def __init__(self):
+        self.Enabled = False
+        self.Day = "-"
+        self.Local = threading.local()
+        self.Lock = threading.Lock()
+        # Records[(Day, Stage)] = [Calls, Wall, Cpu]
+        self.Records = OrderedDict({})
+
+    # End of __init__()
+
+    @property
+    def Stack(self):
+
+        # Purpose: get the stack of stages of the current thread
+
+        # Returns
+        # =======
+        # Stack: list
+        #         Names of the stages being measured, outermost first
+
+        if not hasattr(self.Local, "Stack"):
+            self.Local.Stack = []
+        return self.Local.Stack
+
+    # End of Stack()
+
+    def stage(self, Name):
+
+        # Purpose: get the context measuring one call to a stage
+
+        # Parameters
+        # ==========
+        # Name: str
+        #         Name of the stage
+
+        # Returns
+        # =======
+        # Stage: Stage
+        #         Context measuring the call (NoStage if the profiling
+        #         is not activated)
+
+        if not self.Enabled:
+            return NoStage
+        return Stage(self, Name)
+
+    # End of stage()
+
+    def laps(self):
+
+        # Purpose: get the Laps measuring consecutive stages
+
+        # Returns
+        # =======
+        # Laps: Laps
+        #         Laps of the stages (NoLaps if the profiling is not
+        #         activated)
+
+        if not self.Enabled:
+            return NoLaps
+        return Laps(self)
+
+    # End of laps()
+
+    def add(self, Name, Calls, Wall, Cpu):
+
+        # Purpose: add calls to a stage of the current day
+
+        # Parameters
+        # ==========
+        # Name: str
+        #         Name of the stage
+        # Calls: int
+        #         Number of calls
+        # Wall: float
+        #         Wall time of the calls [s]
+        # Cpu: float
+        #         CPU time of the calls [s]
+
+        with self.Lock:
+            Record = self.Records.setdefault((self.Day, Name), [0, 0.0, 0.0])
+            Record[0] += Calls
+            Record[1] += Wall
+            Record[2] += Cpu
+
+    # End of add()
+
+    def merge(self, Records):
+
+        # Purpose: merge the records of another profiler (e.g. the one
+        #          of a worker process)
+
+        # Parameters
+        # ==========
+        # Records: dict
+        #         Records of the other profiler (see __init__)
+
+        for (Day, Name), (Calls, Wall, Cpu) in Records.items():
+            Record = self.Records.setdefault((Day, Name), [0, 0.0, 0.0])
+            Record[0] += Calls
+            Record[1] += Wall
+            Record[2] += Cpu
+
+    # End of merge()
+
+    def getReport(self):
+
+        # Purpose: build the report of the stages per day, with the
+        #          totals of all the days if several were processed
+
+        # Returns
+        # =======
+        # Report: list
+        #         (Day, Stage, Calls, Wall, Cpu) of each stage
+
+        Report = [(Day, Name, Calls, Wall, Cpu)
+            for (Day, Name), (Calls, Wall, Cpu) in self.Records.items()]
+        Days = set([Day for Day, _, _, _, _ in Report if Day != "-"])
+        if len(Days) > 1:
+            Totals = OrderedDict({})
+            for Day, Name, Calls, Wall, Cpu in Report:
+                if Day == "-":
+                    continue
+                Total = Totals.setdefault(Name, [0, 0.0, 0.0])
+                Total[0] += Calls
+                Total[1] += Wall
+                Total[2] += Cpu
+            Report += [("ALL", Name, Calls, Wall, Cpu)
+                for Name, (Calls, Wall, Cpu) in Totals.items()]
+
+        return Report
+
+    # End of getReport()
+
+    def printReport(self):
+
+        # Purpose: print the report (see getReport)
+
+        print( '\n------------------------------------')
+        print( '--> SENTUS PROFILE:')
+        print( '------------------------------------')
+        Width = max([len(Name) for _, Name, _, _, _ in self.getReport()] + [5])
+        print("%-8s %-*s %10s %12s %12s" %
+            ("DAY", Width, "STAGE", "CALLS", "WALL[s]", "CPU[s]"))
+        for Day, Name, Calls, Wall, Cpu in self.getReport():
+            print("%-8s %-*s %10d %12.3f %12.3f" % (Day, Width, Name, Calls, Wall, Cpu))
+
+    # End of printReport()
+
+    def writeReport(self, Path):
+
+        # Purpose: write the report (see getReport) in CSV format if
+        #          the extension of the file is .csv, or in JSON format
+        #          otherwise
+
+        # Parameters
+        # ==========
+        # Path: str
+        #         Path to report file
+
+        Dir = os.path.dirname(Path)
+        if Dir and not os.path.exists(Dir):
+            os.makedirs(Dir)
+
+        Keys = ["day", "stage", "calls", "wall", "cpu"]
+        with open(Path, 'w') as f:
+            if Path.lower().endswith(".csv"):
+                f.write(",".join(Keys) + "\n")
+                for Line in self.getReport():
+                    f.write("%s,%s,%d,%.6f,%.6f\n" % Line)
+            else:
+                json.dump([dict(zip(Keys, Line)) for Line in self.getReport()], f, indent=1)
+
+        print("INFO: Profile report written in %s" % Path)
+
+    # End of writeReport()
+
+# End of class StageProfiler
+
+# Profiler of the current process
+Profiler = StageProfiler()
+
+def profileStage(Name):
+
+    # Purpose: get the context measuring one call to a stage with the
+    #          profiler of the current process. It measures nothing if
+    #          the profiling is not activated
+
+    # Parameters
+    # ==========
+    # Name: str
+    #         Name of the stage
+
+    # Returns
+    # =======
+    # Stage: Stage
+    #         Context measuring the call
+
+    return Profiler.stage(Name)
+
+# End of profileStage()
+
+def profileLaps():
+
+    # Purpose: get the Laps measuring consecutive stages with the
+    #          profiler of the current process. They measure nothing
+    #          if the profiling is not activated
+
+    # Returns
+    # =======
+    # Laps: Laps
+    #         Laps of the stages
+
+    return Profiler.laps()
+
+# End of profileLaps()
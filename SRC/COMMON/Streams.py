@@ -0,0 +1,149 @@
+
+import sys, os
+import threading
+from queue import Queue, Full
+from collections import deque
+
+# Marks of the items passed between threads
+ITEM = 0
+END = 1
+ERROR = 2
+
+def readAhead(Stream, Depth):
+
+    # Purpose: iterate the Stream in a background thread that keeps
+    #          up to Depth items ready in a queue, e.g. to read and
+    #          parse the next epochs while the current one is
+    #          processed. Exceptions raised by the Stream are raised
+    #          again in the consumer
+
+    # Parameters
+    # ==========
+    # Stream: iterable
+    #         Items to read ahead
+    # Depth: int
+    #         Maximum number of items ready in the queue
+
+    # Returns
+    # =======
+    # Item: generator
+    #         Items of the Stream, in the same order
+
+    Items = Queue(maxsize=Depth)
+    Stop = threading.Event()
+
+    def put(Mark, Value):
+
+        # Purpose: put an item in the queue unless the consumer stopped
+        #          (returns False in that case)
+
+        while not Stop.is_set():
+            try:
+                Items.put((Mark, Value), timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    # End of put()
+
+    def produce():
+
+        # Purpose: iterate the Stream in the background thread
+
+        try:
+            for Item in Stream:
+                if not put(ITEM, Item):
+                    return
+            put(END, None)
+        except BaseException as Error:
+            put(ERROR, Error)
+
+    # End of produce()
+
+    Producer = threading.Thread(target=produce, name="readAhead", daemon=True)
+    Producer.start()
+
+    try:
+        while True:
+            Mark, Value = Items.get()
+            if Mark == ITEM:
+                yield Value
+            elif Mark == ERROR:
+                raise Value
+            else:
+                break
+    finally:
+        Stop.set()
+        Producer.join()
+
+# End of readAhead()
+
+def writeBehind(Stream, Stage, Depth):
+
+    # Purpose: pass the items of the Stream both to the next stage and
+    #          to a background thread running Stage (e.g. the writer
+    #          of the outputs) over a queue of up to Depth items.
+    #          Exceptions raised by the Stage are raised again in the
+    #          consumer
+
+    # Parameters
+    # ==========
+    # Stream: iterable
+    #         Items to pass
+    # Stage: function
+    #         Generator function taking a stream of items, run in the
+    #         background thread
+    # Depth: int
+    #         Maximum number of items waiting in the queue
+
+    # Returns
+    # =======
+    # Item: generator
+    #         Items of the Stream, in the same order
+
+    Items = Queue(maxsize=Depth)
+    Errors = []
+
+    def iterItems():
+
+        # Purpose: iterate the items of the queue until the end mark
+
+        while True:
+            Mark, Value = Items.get()
+            if Mark == END:
+                return
+            yield Value
+
+    # End of iterItems()
+
+    def consume():
+
+        # Purpose: run the Stage over the queue in the background thread
+
+        try:
+            deque(Stage(iterItems()), maxlen=0)
+        except BaseException as Error:
+            Errors.append(Error)
+            # Drain the queue so that the producer is not blocked
+            deque(iterItems(), maxlen=0)
+
+    # End of consume()
+
+    Consumer = threading.Thread(target=consume, name="writeBehind", daemon=True)
+    Consumer.start()
+
+    try:
+        for Item in Stream:
+            if Errors:
+                break
+            Items.put((ITEM, Item))
+            yield Item
+    finally:
+        Items.put((END, None))
+        Consumer.join()
+
+    if Errors:
+        raise Errors[0]
+
+# End of writeBehind()
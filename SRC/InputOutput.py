@@ -20,11 +20,22 @@
 # Import External and Internal functions and Libraries
 #----------------------------------------------------------------------
 import sys, os
+import io
+import gzip
+import struct
+from operator import itemgetter
 from collections import OrderedDict
 from COMMON.Dates import convertYearMonthDay2JulianDay
 from COMMON import GnssConstants as Const
 from COMMON.Coordinates import llh2xyz
+from COMMON.Profiling import profileStage
 import numpy as np
+from pandas import read_csv, concat, DataFrame, Series
+from pandas.errors import EmptyDataError
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 # Input interfaces
 #----------------------------------------------------------------------
@@ -53,6 +64,34 @@ ObsIdxC["C2"]=6
 ObsIdxC["S1"]=7
 ObsIdxC["S2"]=8
 
+# OBS file record types
+OBS_CODE = "C"
+OBS_PHASE = "P"
+# Number of OBS records read at once when streaming the OBS file
+OBS_CHUNK_RECORDS = 100000
+# Number of columns of the longest OBS record
+ObsNCols = max(max(ObsIdxC.values()), max(ObsIdxP.values())) + 1
+# Types of the non numerical OBS columns
+ObsColTypes = {0: 'category', ObsIdxC["PRN"]: 'category'}
+# Extensions of the compressed OBS files (decompressed while reading)
+OBS_COMPRESSED_EXT = [".gz", ".bz2", ".xz", ".zst"]
+
+# Satellite indexes (PRN small integer codes)
+SatIdx = OrderedDict({})
+for Constel in ['G', 'E']:
+    for Prn in range(1, Const.MAX_NUM_SATS_CONSTEL + 1):
+        SatIdx["%s%02d" % (Constel, Prn)] = len(SatIdx)
+SatLabels = list(SatIdx.keys())
+NSATS = len(SatLabels)
+
+# Constellations (PRN labels prefixes) of each navigation solution
+NAV_SOLUTION_CONSTELS = OrderedDict({})
+NAV_SOLUTION_CONSTELS["GPS"] = "G"
+NAV_SOLUTION_CONSTELS["GAL"] = "E"
+NAV_SOLUTION_CONSTELS["Galileo"] = "E"
+NAV_SOLUTION_CONSTELS["GPSGAL"] = "GE"
+NAV_SOLUTION_CONSTELS["GPS+Galileo"] = "GE"
+
 # Output interfaces
 #----------------------------------------------------------------------
 # PREPRO OBS 
@@ -65,6 +104,9 @@ PreproFmt = "%6d %6s %8.3f %8.3f %4d %4d %4d "\
     "%15.3f %15.3f %15.3f %15.3f %8.3f %8.3f %10.3f %10.3f %10.3f %10.3f "\
     "%15.3f %15.3f %15.3f".split()
 
+# Full line format
+PreproLineFmt = " ".join(PreproFmt) + " \n"
+
 # File columns
 PreproIdx = OrderedDict({})
 PreproIdx["SOD"]=0
@@ -88,6 +130,57 @@ PreproIdx["CODE_IF"]=17
 PreproIdx["PHASE_IF"]=18
 PreproIdx["SMOOTH_IF"]=19
 
+# PREPRO OBS binary file (.npy) records
+PreproBinType = np.dtype([(Key, "S3" if Key == "PRN" else 
+    "i1" if Key in ("VALID", "REJECT", "STATUS") else "f8") for Key in PreproIdx])
+
+# Preprocessing info of each PREPRO OBS column
+PreproObsKeys = OrderedDict({})
+PreproObsKeys["SOD"]="Sod"
+PreproObsKeys["ELEV"]="Elevation"
+PreproObsKeys["AZIM"]="Azimuth"
+PreproObsKeys["VALID"]="Valid"
+PreproObsKeys["REJECT"]="RejectionCause"
+PreproObsKeys["STATUS"]="Status"
+PreproObsKeys["C1"]="C1"
+PreproObsKeys["C2"]="C2"
+PreproObsKeys["L1"]="L1Meters"
+PreproObsKeys["L2"]="L2Meters"
+PreproObsKeys["S1"]="S1"
+PreproObsKeys["S2"]="S2"
+PreproObsKeys["CODE_RATE"]="RangeRateL1"
+PreproObsKeys["CODE_RATE_STEP"]="RangeRateStepL1"
+PreproObsKeys["PHASE_RATE"]="PhaseRateL1"
+PreproObsKeys["PHASE_RATE_STEP"]="PhaseRateStepL1"
+PreproObsKeys["CODE_IF"]="IF_C"
+PreproObsKeys["PHASE_IF"]="IF_P"
+PreproObsKeys["SMOOTH_IF"]="SmoothIF"
+
+# PREPRO OBS columns types
+PreproColTypes = {Idx: "float64" for Idx in PreproIdx.values()}
+for Key in ("SOD", "VALID", "REJECT", "STATUS"):
+    PreproColTypes[PreproIdx[Key]] = "int64"
+PreproColTypes[PreproIdx["PRN"]] = "object"
+
+# PREPRO OBS compressed files extensions
+PREPRO_COMPRESSED_EXT = OrderedDict({})
+PREPRO_COMPRESSED_EXT["GZIP"] = ".gz"
+PREPRO_COMPRESSED_EXT["ZSTD"] = ".zst"
+# Default length of the indexed (and compressed) chunks [s]
+PREPRO_CHUNK_SECONDS = 3600
+# Configuration parameters the Preprocessing results depend on, besides
+# the MAX_* and HATCH_* ones (see getPreproCacheParams)
+PREPRO_CACHE_PARAMS = ["CYCLE_SLIPS", "CS_MAX_GAP", "RCVR_MASK", "MIN_SNR",
+    "SAMPLING_RATE", "NAV_SOLUTION", "PREPRO_PRNS", "PREPRO_SOD_RANGE"]
+# Source files (and directories) of the Preprocessing, whose contents
+# the cached results also depend on (see getPreproCacheFiles)
+PREPRO_CACHE_SOURCES = ["InputOutput.py", "Preprocessing.py", "PREPRO"]
+
+# Index of the chunks of a file (.idx), one line per chunk:
+# epochs, position in the file, rows and rows range of each PRN
+IdxHdr = "#SOD_FIRST SOD_LAST       OFFSET       SIZE    LINES        ROW PRN:FIRST_ROW-LAST_ROW\n"
+IdxFmt = "%10d %8d %12d %10d %8d %10d %s\n"
+
 # Rejection causes flags
 REJECTION_CAUSE = OrderedDict({})
 REJECTION_CAUSE["MASKANGLE"]=1
@@ -346,15 +439,71 @@ def readConf(CfgFile):
                             # Increment number of read parameters
                             NReadParams = NReadParams + 1
 
-                        # Preprocessing outputs selection [0:OFF|1:ON]
+                        # Satellites to preprocess
+                        #-----------------------------------------------
+                        # ALL or list of PRN labels (e.g: G01 E11)
+                        #-----------------------------------------------
+                        elif Key=='PREPRO_PRNS':
+                            # Check parameter and load it in Conf
+                            Conf[Key] = checkConfParam(Key, Fields, 1, NSATS, 
+                            [None] * NSATS, [None] * NSATS)
+
+                            # Increment number of read parameters
+                            NReadParams = NReadParams + 1
+
+                        # Epochs to preprocess [SECONDS]
+                        #-----------------------------------------------
+                        # p1: First SoD
+                        # p2: Last SoD
+                        #-----------------------------------------------
+                        elif Key=='PREPRO_SOD_RANGE':
+                            # Check parameter and load it in Conf
+                            Conf[Key] = checkConfParam(Key, Fields, 2, 2, 
+                            [0, 0], [Const.S_IN_D, Const.S_IN_D])
+
+                            # Increment number of read parameters
+                            NReadParams = NReadParams + 1
+
+                        # Preprocessing outputs selection [0:OFF|1:ON|2:ON+BINARY]
                         #--------------------------------------------------------------------       
                         elif Key=='PREPRO_OUT':
+                            # Check parameter and load it in Conf
+                            Conf[Key] = checkConfParam(Key, Fields, 1, 1, [0], [2])
+
+                            # Increment number of read parameters
+                            NReadParams = NReadParams + 1
+
+                        # Preprocessing engine [EPOCH|ARCS]
+                        #--------------------------------------------------------------------
+                        elif Key=='PREPRO_ENGINE':
+                            # Check parameter and load it in Conf
+                            Conf[Key] = checkConfParam(Key, Fields, 1, 1, [None], [None])
+
+                            # Increment number of read parameters
+                            NReadParams = NReadParams + 1
+
+                        # Continuous preprocessing across days [0:OFF|1:ON]
+                        #--------------------------------------------------------------------
+                        elif Key=='PREPRO_CONTINUOUS':
                             # Check parameter and load it in Conf
                             Conf[Key] = checkConfParam(Key, Fields, 1, 1, [0], [1])
 
                             # Increment number of read parameters
                             NReadParams = NReadParams + 1
 
+                        # Preprocessing outputs compression
+                        #--------------------------------------------------------------------
+                        # p1: Compression [NONE|GZIP|ZSTD]
+                        # p2: Chunks length [s] (Default: 3600)
+                        #--------------------------------------------------------------------
+                        elif Key=='PREPRO_COMPRESSION':
+                            # Check parameter and load it in Conf
+                            Conf[Key] = checkConfParam(Key, Fields, 1, 2, 
+                            [None, 1], [None, Const.S_IN_D])
+
+                            # Increment number of read parameters
+                            NReadParams = NReadParams + 1
+
                         # Corrected outputs selection [0:OFF|1:ON]
                         #--------------------------------------------------------------------       
                         elif Key=='CORR_OUT':
@@ -427,6 +576,16 @@ def readConf(CfgFile):
 
                             # Increment number of read parameters
                             NReadParams = NReadParams + 1
+
+                        # Max. time span of the last two CS points [s]
+                        #----------------------------------------
+                        elif Key== 'CS_MAX_GAP':  
+                            # Check parameter and load it in Conf
+                            Conf[Key] = checkConfParam(Key, Fields, 1, 1, 
+                            [0], [3600])
+
+                            # Increment number of read parameters
+                            NReadParams = NReadParams + 1
                         
                         # Check Pseudo-Range Measurement Out of Range
                         #-------------------------------------------
@@ -569,6 +728,75 @@ def processConf(Conf):
     #         Dictionary containing configuration with
     #         Julian Days
     
+    # Set default values of optional parameters
+    Conf.setdefault("PREPRO_ENGINE", "EPOCH")
+
+    Conf.setdefault("PREPRO_COMPRESSION", "NONE")
+
+    Conf.setdefault("PREPRO_CONTINUOUS", 0)
+
+    Conf.setdefault("PREPRO_PRNS", "ALL")
+
+    Conf.setdefault("PREPRO_SOD_RANGE", [0, Const.S_IN_D])
+
+    # Check the navigation solution constellations
+    if Conf["NAV_SOLUTION"] not in NAV_SOLUTION_CONSTELS:
+        sys.stderr.write("ERROR: Unknown navigation solution %s\n" % 
+        Conf["NAV_SOLUTION"])
+        sys.exit(-1)
+
+    # Check the satellites to preprocess: list of PRN labels or ["ALL"]
+    if not isinstance(Conf["PREPRO_PRNS"], list):
+        Conf["PREPRO_PRNS"] = [Conf["PREPRO_PRNS"]]
+    for Prn in Conf["PREPRO_PRNS"]:
+        if Prn not in SatIdx and Conf["PREPRO_PRNS"] != ["ALL"]:
+            sys.stderr.write("ERROR: Unknown satellite %s in PREPRO_PRNS\n" % Prn)
+            sys.exit(-1)
+
+    # Check the epochs to preprocess
+    if Conf["PREPRO_SOD_RANGE"][0] > Conf["PREPRO_SOD_RANGE"][1]:
+        sys.stderr.write("ERROR: PREPRO_SOD_RANGE first SoD is after the last one\n")
+        sys.exit(-1)
+
+    # The epochs are read at SAMPLING_RATE: a shorter data gap would
+    # reset the satellites state at every epoch
+    if Conf["MAX_DATA_GAP"][1] < Conf["SAMPLING_RATE"]:
+        sys.stderr.write("WARNING: MAX_DATA_GAP %g s is shorter than SAMPLING_RATE, "
+        "using %g s\n" % (Conf["MAX_DATA_GAP"][1], Conf["SAMPLING_RATE"]))
+        Conf["MAX_DATA_GAP"] = [Conf["MAX_DATA_GAP"][0], Conf["SAMPLING_RATE"]]
+
+    # The cycle slips buffer points are SAMPLING_RATE apart: a shorter
+    # span of the last two points would reset the buffers at every epoch
+    Conf.setdefault("CS_MAX_GAP", Conf["MAX_DATA_GAP"][1])
+    if Conf["CS_MAX_GAP"] <= 2 * Conf["SAMPLING_RATE"]:
+        CsMaxGap = Conf["CYCLE_SLIPS"][CSNPOINTS] * Conf["SAMPLING_RATE"] + \
+            Conf["MAX_DATA_GAP"][1]
+        sys.stderr.write("WARNING: CS_MAX_GAP %g s is not longer than two SAMPLING_RATE "
+        "periods, using %g s\n" % (Conf["CS_MAX_GAP"], CsMaxGap))
+        Conf["CS_MAX_GAP"] = CsMaxGap
+
+    # Check the preprocessing engine
+    if Conf["PREPRO_ENGINE"] not in ["EPOCH", "ARCS"]:
+        sys.stderr.write("ERROR: Unknown preprocessing engine %s\n" % 
+        Conf["PREPRO_ENGINE"])
+        sys.exit(-1)
+
+    # The state is only carried across days epoch by epoch
+    if Conf["PREPRO_CONTINUOUS"] == 1 and Conf["PREPRO_ENGINE"] != "EPOCH":
+        sys.stderr.write("ERROR: PREPRO_CONTINUOUS requires PREPRO_ENGINE EPOCH\n")
+        sys.exit(-1)
+
+    # Check the preprocessing outputs compression: [Compression, Chunks length]
+    if not isinstance(Conf["PREPRO_COMPRESSION"], list):
+        Conf["PREPRO_COMPRESSION"] = [Conf["PREPRO_COMPRESSION"], PREPRO_CHUNK_SECONDS]
+    if Conf["PREPRO_COMPRESSION"][0] not in ["NONE"] + list(PREPRO_COMPRESSED_EXT):
+        sys.stderr.write("ERROR: Unknown preprocessing outputs compression %s\n" % 
+        Conf["PREPRO_COMPRESSION"][0])
+        sys.exit(-1)
+    if Conf["PREPRO_COMPRESSION"][0] == "ZSTD" and zstandard is None:
+        sys.stderr.write("ERROR: ZSTD compression requires the zstandard package\n")
+        sys.exit(-1)
+
     ConfCopy = Conf.copy()
     for Key in ConfCopy:
         Value = ConfCopy[Key]
@@ -587,6 +815,51 @@ def processConf(Conf):
 
     return Conf
 
+# End of processConf()
+
+
+def getObsSelection(Conf):
+    
+    # Purpose: get the OBS records to preprocess: the epochs of 
+    #          PREPRO_SOD_RANGE at SAMPLING_RATE and the satellites
+    #          of PREPRO_PRNS in the NAV_SOLUTION constellations
+    
+    # Parameters
+    # ==========
+    # Conf: dict
+    #         Configuration dictionary
+
+    # Returns
+    # =======
+    # SodStart, SodEnd: int
+    #         First and last epochs to preprocess [s]
+    # Prns: list
+    #         PRN labels of the satellites to preprocess (None if all)
+    # Rate: float
+    #         Sampling rate of the epochs to preprocess [s]
+
+    Constels = NAV_SOLUTION_CONSTELS[Conf["NAV_SOLUTION"]]
+    Prns = [Label for Label in SatLabels if Label[0] in Constels and 
+        (Conf["PREPRO_PRNS"] == ["ALL"] or Label in Conf["PREPRO_PRNS"])]
+    if len(Prns) == NSATS:
+        Prns = None
+
+    SodStart, SodEnd = Conf["PREPRO_SOD_RANGE"]
+
+    return SodStart, SodEnd, Prns, Conf["SAMPLING_RATE"]
+
+# End of getObsSelection()
+
+
+def isObsSelection(SodStart, SodEnd, Prns):
+    
+    # Purpose: check if only some OBS records are selected
+    #          (see getObsSelection)
+
+    return Prns is not None or SodStart > 0 or SodEnd < Const.S_IN_D
+
+# End of isObsSelection()
+
 
 def splitLine(Line):
     
@@ -661,89 +934,1774 @@ def readObsEpoch(f):
 # End of readObsEpoch()
 
 
-def createOutputFile(Path, Hdr):
+def findObsFile(ObsFile):
     
-    # Purpose: open output file and write its header
+    # Purpose: find the OBS file or, if it does not exist, its
+    #          compressed version
     
     # Parameters
     # ==========
-    # Path: str
-    #         Path to file
-    # Hdr: str
-    #         File header
+    # ObsFile: str
+    #         Path to uncompressed OBS file
 
     # Returns
     # =======
-    # f: File descriptor
-    #         Descriptor of output file
+    # ObsFile: str
+    #         Path to the existing OBS file (the uncompressed one
+    #         if none exists)
+
+    for Ext in [""] + OBS_COMPRESSED_EXT:
+        if os.path.isfile(ObsFile + Ext):
+            return ObsFile + Ext
+
+    return ObsFile
+
+# End of findObsFile()
+
+
+def parseObsFile(ObsFile, ChunkRecords=None):
     
-    # Display Message
-    print("INFO: Creating file: %s..." % Path)
+    # Purpose: parse the OBS file records (shorter records are filled
+    #          with NaN). Compressed files (see OBS_COMPRESSED_EXT) are
+    #          decompressed on the fly, without seeking back
+    
+    # Parameters
+    # ==========
+    # ObsFile: str
+    #         Path to OBS file
+    # ChunkRecords: int
+    #         Number of records parsed at once (all the file if None)
 
-    # Create output directory, if needed
-    if not os.path.exists(os.path.dirname(Path)):
-        os.makedirs(os.path.dirname(Path))
+    # Returns
+    # =======
+    # ObsTable: DataFrame or TextFileReader
+    #         OBS records (or iterator over the chunks of records),
+    #         None if the file is empty
 
-    # Open PREPRO OBS file
-    f = open(Path, 'w')
+    try:
+        return read_csv(ObsFile, sep=r'\s+', header=None, comment='#',
+        names=range(ObsNCols), dtype=ObsColTypes, chunksize=ChunkRecords,
+        compression='infer')
+
+    # If file is empty
+    except EmptyDataError:
+        return None
+
+    # If the decompression library is not installed (e.g. zstandard)
+    except ImportError as Error:
+        sys.stderr.write("ERROR: Cannot decompress OBS file %s: %s\n" %
+        (ObsFile, Error))
+        sys.exit(-1)
 
-    # Write header
-    f.write(Hdr)
+# End of parseObsFile()
 
-    return f
 
-# End of createOutputFile()
+def readObsFile(ObsFile, SodStart=0, SodEnd=Const.S_IN_D, Prns=None, Rate=1, 
+IdxDir=None):
+    
+    # Purpose: read the whole OBS file in a single pass into typed
+    #          arrays (columnar OBS data). If only some records are
+    #          selected, the uncompressed files are read through their
+    #          index (see selectObsFileChunks). The records not selected
+    #          or not at the sampling rate are dropped before being
+    #          converted (see filterObsTable)
+    
+    # Parameters
+    # ==========
+    # ObsFile: str
+    #         Path to OBS file (may be compressed)
+    # SodStart, SodEnd: int
+    #         First and last epochs to read [s]
+    # Prns: list
+    #         PRN labels of the satellites to read (all if None)
+    # Rate: float
+    #         Sampling rate of the epochs to read [s]
+    # IdxDir: str
+    #         Directory of the index file (next to the OBS file if None)
+
+    # Returns
+    # =======
+    # ObsData: dict
+    #         Columnar OBS data (see convertObsTable2ObsData)
 
+    # Select the indexed chunks with selected records
+    Chunks = None
+    if isObsSelection(SodStart, SodEnd, Prns) and not isCompressedObsFile(ObsFile):
+        Chunks = selectObsFileChunks(ObsFile, SodStart, SodEnd, Prns, IdxDir)
 
-def generatePreproFile(fpreprobs, PreproObsInfo):
+    # Parse the selected chunks (or all the file)
+    ObsTable = parseObsRecords(ObsFile, Chunks)
+
+    # Keep the selected records
+    ObsTable = filterObsTable(ObsTable, SodStart, SodEnd, Prns, Rate)
+
+    ObsData = convertObsTable2ObsData(ObsTable, ObsFile)
+    reportUnmatchedObs(ObsFile, ObsData["UNMATCHED_C"], ObsData["UNMATCHED_P"])
+
+    return ObsData
+
+# End of readObsFile()
+
+
+def isCompressedObsFile(ObsFile):
+    
+    # Purpose: check if the OBS file is compressed (see OBS_COMPRESSED_EXT)
+
+    return any([ObsFile.endswith(Ext) for Ext in OBS_COMPRESSED_EXT])
+
+# End of isCompressedObsFile()
 
-    # Purpose: generate output file with Preprocessing results
 
+def createObsTable():
+    
+    # Purpose: create an empty table of OBS records (as parsed by read_csv)
+
+    return DataFrame({Col: Series(dtype=ObsColTypes.get(Col, np.float64))
+        for Col in range(ObsNCols)})
+
+# End of createObsTable()
+
+
+def filterObsTable(ObsTable, SodStart, SodEnd, Prns, Rate=1):
+    
+    # Purpose: keep the OBS records of a time window and, optionally,
+    #          of some satellites and of the epochs of a sampling rate
+    #          (before converting them)
+    
     # Parameters
     # ==========
-    # fpreprobs: file descriptor
-    #         Descriptor for PREPRO OBS output file
-    # PreproObsInfo: dict
-    #         Dictionary containing Preprocessing info for the 
-    #         current epoch
+    # ObsTable: DataFrame
+    #         OBS records (see parseObsFile)
+    # SodStart, SodEnd: int
+    #         First and last epochs of the window [s]
+    # Prns: list
+    #         PRN labels of the satellites (all if None)
+    # Rate: float
+    #         Sampling rate [s]: only the epochs multiple of Rate
+    #         are kept (all if 1 or less)
 
     # Returns
     # =======
-    # Nothing
+    # ObsTable: DataFrame
+    #         Selected OBS records
 
-    # Loop over satellites
-    for SatLabel, SatPreproObs in PreproObsInfo.items():
-        # Prepare outputs
-        Outputs = OrderedDict({})
-        Outputs["SOD"] = SatPreproObs["Sod"]
-        Outputs["PRN"] = SatLabel
-        Outputs["ELEV"] = SatPreproObs["Elevation"]
-        Outputs["AZIM"] = SatPreproObs["Azimuth"]
-        Outputs["VALID"] = SatPreproObs["Valid"]
-        Outputs["REJECT"] = SatPreproObs["RejectionCause"]
-        Outputs["STATUS"] = SatPreproObs["Status"]
-        Outputs["C1"] = SatPreproObs["C1"]
-        Outputs["C2"] = SatPreproObs["C2"]
-        Outputs["L1"] = SatPreproObs["L1Meters"]
-        Outputs["L2"] = SatPreproObs["L2Meters"]
-        Outputs["S1"] = SatPreproObs["S1"]
-        Outputs["S2"] = SatPreproObs["S2"]
-        Outputs["CODE_RATE"] = SatPreproObs["RangeRateL1"]
-        Outputs["CODE_RATE_STEP"] = SatPreproObs["RangeRateStepL1"]
-        Outputs["PHASE_RATE"] = SatPreproObs["PhaseRateL1"]
-        Outputs["PHASE_RATE_STEP"] = SatPreproObs["PhaseRateStepL1"]
-        Outputs["CODE_IF"] = SatPreproObs["IF_C"]
-        Outputs["PHASE_IF"] = SatPreproObs["IF_P"]
-        Outputs["SMOOTH_IF"] = SatPreproObs["SmoothIF"]
-        # Outputs["GEOMFREE"] = SatPreproObs["GeomFree_P"]
-
-        # Write line
-        for i, result in enumerate(Outputs):
-            fpreprobs.write(((PreproFmt[i] + " ") % Outputs[result]))
-
-        fpreprobs.write("\n")
+    Sod = ObsTable[ObsIdxC["SOD"]]
+    Keep = (Sod >= SodStart) & (Sod <= SodEnd)
+    if Prns is not None:
+        Keep &= ObsTable[ObsIdxC["PRN"]].isin(Prns)
+    if Rate > 1:
+        Keep &= (Sod % Rate) == 0
 
-# End of generatePreproFile
+    # If all the records are kept
+    if Keep.all():
+        return ObsTable
+
+    return ObsTable[Keep].reset_index(drop=True)
+
+# End of filterObsTable()
+
+
+def convertObsTable2ObsData(ObsTable, ObsFile):
+    
+    # Purpose: convert the table of OBS records (as parsed by read_csv)
+    #          into typed arrays (columnar OBS data)
+    
+    # Parameters
+    # ==========
+    # ObsTable: DataFrame
+    #         OBS records, with one column per field
+    # ObsFile: str
+    #         Path to OBS file (for the error messages)
+
+    # Returns
+    # =======
+    # ObsData: dict
+    #         Columnar OBS data, with one array per OBS column:
+    #         ObsData["C"]["C1"] is the array of all the C1 codes,
+    #         ObsData["P"]["L1"] is the array of all the L1 phases
+    #         and PRNs are coded as satellite indexes (see SatIdx).
+    #         ObsData["EPOCHS"] is the array of epochs SoD and
+    #         ObsData["C_IDX"]/ObsData["P_IDX"] are the offsets of
+    #         each epoch in the C/P arrays (one more than epochs):
+    #         epoch i codes are ObsData["C"][...][C_IDX[i]:C_IDX[i+1]].
+    #         The Code and Phase records are joined (see joinObsRecords)
+
+    # Get record types and all SoDs in file order
+    IsCode = (ObsTable[0] == OBS_CODE).to_numpy()
+    Sod = ObsTable[ObsIdxC["SOD"]].to_numpy(dtype=np.float64)
+
+    # Code PRN labels as satellite indexes
+    PrnColumn = ObsTable[ObsIdxC["PRN"]].astype('category')
+    Labels = PrnColumn.cat.categories
+    try:
+        LabelCodes = np.array([SatIdx[Label] for Label in Labels], dtype=np.int16)
+    except KeyError as Error:
+        sys.stderr.write("ERROR: Unknown satellite %s in OBS file %s\n" %
+        (Error.args[0], ObsFile))
+        sys.exit(-1)
+    Prn = LabelCodes[PrnColumn.cat.codes.to_numpy()] \
+        if len(Labels) > 0 else np.zeros(len(Sod), dtype=np.int16)
+
+    # Split Code and Phase records
+    ObsData = OrderedDict({})
+    ObsData["C"] = OrderedDict({})
+    for Key, Col in ObsIdxC.items():
+        if Key == "PRN":
+            ObsData["C"][Key] = Prn[IsCode]
+        else:
+            ObsData["C"][Key] = ObsTable[Col].to_numpy(dtype=np.float64)[IsCode]
+
+    ObsData["P"] = OrderedDict({})
+    for Key, Col in ObsIdxP.items():
+        if Key == "PRN":
+            ObsData["P"][Key] = Prn[~IsCode]
+        else:
+            ObsData["P"][Key] = ObsTable[Col].to_numpy(dtype=np.float64)[~IsCode]
+
+    # Build the epoch index: an epoch is a run of consecutive
+    # records with the same SoD (as in readObsEpoch)
+    EpochStarts = np.flatnonzero(np.diff(Sod) != 0) + 1
+    EpochStarts = np.concatenate(([0], EpochStarts, [len(Sod)])) \
+        if len(Sod) > 0 else np.zeros(1, dtype=np.int64)
+    CodesBefore = np.concatenate(([0], np.cumsum(IsCode)))
+    ObsData["EPOCHS"] = Sod[EpochStarts[:-1]]
+    ObsData["C_IDX"] = CodesBefore[EpochStarts]
+    ObsData["P_IDX"] = EpochStarts - ObsData["C_IDX"]
+
+    return joinObsRecords(ObsData)
+
+# End of convertObsTable2ObsData()
+
+
+def joinObsRecords(ObsData):
+    
+    # Purpose: join the Code and Phase records of the same epoch and
+    #          satellite with a sorted merge of their keys, so that the
+    #          i-th Code and the i-th Phase of each epoch are of the same
+    #          satellite. The Phases without Code follow the joined ones
+    #          in their epoch (they are only used to detect cycle slips)
+    #          and the Codes without Phase (or repeated) are removed.
+    #          Both are counted in ObsData["UNMATCHED_C"]/["UNMATCHED_P"]
+    #          (see reportUnmatchedObs)
+    
+    # Parameters
+    # ==========
+    # ObsData: dict
+    #         Columnar OBS data (see convertObsTable2ObsData)
+
+    # Returns
+    # =======
+    # ObsData: dict
+    #         Columnar OBS data with joined Code and Phase records
+
+    NEpochs = len(ObsData["EPOCHS"])
+    CodesEpoch = np.repeat(np.arange(NEpochs), np.diff(ObsData["C_IDX"]))
+    PhaseEpoch = np.repeat(np.arange(NEpochs), np.diff(ObsData["P_IDX"]))
+
+    # Keys of the records: epoch and satellite
+    CodesKey = CodesEpoch * NSATS + ObsData["C"]["PRN"]
+    PhaseKey = PhaseEpoch * NSATS + ObsData["P"]["PRN"]
+
+    # Find the Phase of each Code in the sorted Phase keys
+    PhaseOrder = np.argsort(PhaseKey, kind='stable')
+    PhaseKeySorted = PhaseKey[PhaseOrder]
+    Pos = np.minimum(np.searchsorted(PhaseKeySorted, CodesKey), max(len(PhaseKey) - 1, 0))
+    Matched = np.zeros(len(CodesKey), dtype=bool)
+    if len(PhaseKey) > 0:
+        Matched = PhaseKeySorted[Pos] == CodesKey
+
+    # Only the first Code of a satellite in an epoch is joined
+    _, FirstCodes = np.unique(CodesKey, return_index=True)
+    Repeated = np.ones(len(CodesKey), dtype=bool)
+    Repeated[FirstCodes] = False
+    Matched &= ~Repeated
+    CodesPhase = PhaseOrder[Pos[Matched]]
+
+    ObsData["UNMATCHED_C"] = int(len(CodesKey) - len(CodesPhase))
+    ObsData["UNMATCHED_P"] = int(len(PhaseKey) - len(CodesPhase))
+
+    # Order the Phases of each epoch as the joined Codes, then the
+    # Phases without Code in file order
+    Rank = np.arange(len(PhaseKey)) + len(CodesPhase)
+    Rank[CodesPhase] = np.arange(len(CodesPhase))
+    PhaseOrder = np.lexsort((Rank, PhaseEpoch))
+    if not np.array_equal(PhaseOrder, np.arange(len(PhaseKey))):
+        for Key in ObsData["P"]:
+            ObsData["P"][Key] = ObsData["P"][Key][PhaseOrder]
+
+    # Remove the Codes without Phase (and the epochs left empty)
+    if ObsData["UNMATCHED_C"] > 0:
+        for Key in ObsData["C"]:
+            ObsData["C"][Key] = ObsData["C"][Key][Matched]
+        NCodes = np.bincount(CodesEpoch[Matched], minlength=NEpochs)
+        NPhases = np.diff(ObsData["P_IDX"])
+        NonEmpty = (NCodes + NPhases) > 0
+        ObsData["EPOCHS"] = ObsData["EPOCHS"][NonEmpty]
+        ObsData["C_IDX"] = np.concatenate(([0], np.cumsum(NCodes[NonEmpty])))
+        ObsData["P_IDX"] = np.concatenate(([0], np.cumsum(NPhases[NonEmpty])))
+
+    return ObsData
+
+# End of joinObsRecords()
+
+
+def reportUnmatchedObs(ObsFile, UnmatchedCodes, UnmatchedPhases):
+    
+    # Purpose: report the OBS records that could not be joined
+    #          (see joinObsRecords)
+    
+    # Parameters
+    # ==========
+    # ObsFile: str
+    #         Path to OBS file
+    # UnmatchedCodes, UnmatchedPhases: int
+    #         Number of Code records without Phase and Phase records
+    #         without Code
+
+    if UnmatchedCodes > 0:
+        sys.stderr.write("WARNING: %d Code records without Phase record in OBS "
+        "file %s are not preprocessed\n" % (UnmatchedCodes, ObsFile))
+
+    if UnmatchedPhases > 0:
+        sys.stderr.write("WARNING: %d Phase records without Code record in OBS "
+        "file %s are only used to detect cycle slips\n" % (UnmatchedPhases, ObsFile))
+
+# End of reportUnmatchedObs()
+
+
+def getObsEpoch(ObsData, Epoch):
+    
+    # Purpose: get one epoch of the columnar OBS data (all the LoS)
+    #          with the same layout as readObsEpoch outputs
+    
+    # Parameters
+    # ==========
+    # ObsData: dict
+    #         Columnar OBS data (see readObsFile)
+    # Epoch: int
+    #         Index of the epoch in ObsData["EPOCHS"]
+
+    # Returns
+    # =======
+    # EpochObsC: list
+    #         list of the typed records for Codes
+    # EpochObsP: list
+    #         list of the typed records for Phases
+    #         EpochObsC[1][ObsIdxC["C1"]] is the C1 of the
+    #         second LoS
+
+    EpochObs = []
+
+    for Type, ColIdx, Offsets in ((OBS_CODE, ObsIdxC, ObsData["C_IDX"]),
+                                  (OBS_PHASE, ObsIdxP, ObsData["P_IDX"])):
+        # Get the records of the epoch
+        Start = Offsets[Epoch]
+        End = Offsets[Epoch + 1]
+        Columns = [[Type] * (End - Start)]
+        for Key in ColIdx:
+            Column = ObsData[Type][Key][Start:End].tolist()
+            if Key == "PRN":
+                Column = [SatLabels[Prn] for Prn in Column]
+            Columns.append(Column)
+
+        # Build the records
+        EpochObs.append([list(Record) for Record in zip(*Columns)])
+
+    return EpochObs[0], EpochObs[1]
+
+# End of getObsEpoch()
+
+
+def selectObsRecords(ObsData, CodesMask, PhaseMask):
+    
+    # Purpose: select some records of the columnar OBS data (e.g. of
+    #          some satellites), keeping their order and epochs
+    
+    # Parameters
+    # ==========
+    # ObsData: dict
+    #         Columnar OBS data (see readObsFile)
+    # CodesMask: np.array
+    #         True for the Code records to select
+    # PhaseMask: np.array
+    #         True for the Phase records to select
+
+    # Returns
+    # =======
+    # SelectedObsData: dict
+    #         Columnar OBS data of the selected records (with the
+    #         epochs of the selected records only)
+
+    # Epoch of each record
+    NEpochs = len(ObsData["EPOCHS"])
+    CodesEpoch = np.repeat(np.arange(NEpochs), np.diff(ObsData["C_IDX"]))[CodesMask]
+    PhaseEpoch = np.repeat(np.arange(NEpochs), np.diff(ObsData["P_IDX"]))[PhaseMask]
+    Epochs = np.unique(np.concatenate((CodesEpoch, PhaseEpoch)))
+
+    SelectedObsData = OrderedDict({})
+    SelectedObsData["C"] = OrderedDict([(Key, Values[CodesMask])
+        for Key, Values in ObsData["C"].items()])
+    SelectedObsData["P"] = OrderedDict([(Key, Values[PhaseMask])
+        for Key, Values in ObsData["P"].items()])
+    SelectedObsData["EPOCHS"] = ObsData["EPOCHS"][Epochs]
+    SelectedObsData["C_IDX"] = np.searchsorted(CodesEpoch, np.append(Epochs, NEpochs))
+    SelectedObsData["P_IDX"] = np.searchsorted(PhaseEpoch, np.append(Epochs, NEpochs))
+
+    return SelectedObsData
+
+# End of selectObsRecords()
+
+
+def readObsChunks(ObsFile, ChunkRecords=OBS_CHUNK_RECORDS, SodStart=0, 
+SodEnd=Const.S_IN_D, Prns=None, Rate=1, IdxDir=None):
+    
+    # Purpose: read the OBS file by chunks of whole epochs into typed
+    #          arrays, so that only one chunk is in memory at a time.
+    #          If only some records are selected, the uncompressed files
+    #          are read by the chunks of their index with selected
+    #          records (see selectObsFileChunks), and the compressed ones
+    #          until the last selected epoch. The records not selected
+    #          or not at the sampling rate are dropped before being
+    #          converted (see filterObsTable)
+    
+    # Parameters
+    # ==========
+    # ObsFile: str
+    #         Path to OBS file (may be compressed)
+    # ChunkRecords: int
+    #         Number of records parsed at once
+    # SodStart, SodEnd: int
+    #         First and last epochs to read [s]
+    # Prns: list
+    #         PRN labels of the satellites to read (all if None)
+    # Rate: float
+    #         Sampling rate of the epochs to read [s]
+    # IdxDir: str
+    #         Directory of the index file (next to the OBS file if None)
+
+    # Returns
+    # =======
+    # ObsData: generator
+    #         Columnar OBS data of each chunk (see convertObsTable2ObsData)
+
+    # Select the indexed chunks with selected records
+    Chunks = None
+    if isObsSelection(SodStart, SodEnd, Prns) and not isCompressedObsFile(ObsFile):
+        Chunks = selectObsFileChunks(ObsFile, SodStart, SodEnd, Prns, IdxDir)
+
+    # Read the selected chunks
+    if Chunks is not None:
+        for Chunk in range(len(Chunks)):
+            ObsTable = filterObsTable(parseObsRecords(ObsFile, 
+                Chunks[Chunk:Chunk + 1]), SodStart, SodEnd, Prns, Rate)
+            if len(ObsTable) > 0:
+                yield convertObsTable2ObsData(ObsTable, ObsFile)
+        return
+
+    Reader = parseObsFile(ObsFile, ChunkRecords)
+
+    # If file is empty
+    if Reader is None:
+        return
+
+    # Records of the last epoch of the previous chunk
+    Pending = None
+
+    with Reader:
+        for ObsTable in Reader:
+            if Pending is not None:
+                ObsTable = concat([Pending, ObsTable], ignore_index=True)
+
+            # Stop after the last selected epoch
+            Sod = ObsTable[ObsIdxC["SOD"]].to_numpy(dtype=np.float64)
+            if Sod[0] > SodEnd:
+                Pending = None
+                break
+
+            # Keep the last epoch for the next chunk (it may continue)
+            Last = np.flatnonzero(Sod != Sod[-1])
+            Last = Last[-1] + 1 if len(Last) > 0 else 0
+            Pending = ObsTable.iloc[Last:]
+
+            if Last > 0:
+                yield convertObsTable2ObsData(filterObsTable(ObsTable.iloc[:Last], 
+                    SodStart, SodEnd, Prns, Rate), ObsFile)
+
+    if Pending is not None:
+        yield convertObsTable2ObsData(filterObsTable(Pending, 
+            SodStart, SodEnd, Prns, Rate), ObsFile)
+
+# End of readObsChunks()
+
+
+def iterObsEpochs(ObsFile, ChunkRecords=OBS_CHUNK_RECORDS, SodStart=0, 
+SodEnd=Const.S_IN_D, Prns=None, Rate=1, IdxDir=None):
+    
+    # Purpose: stream the epochs of the OBS file (all the LoS) with
+    #          bounded memory, reading it by chunks
+    
+    # Parameters
+    # ==========
+    # ObsFile: str
+    #         Path to OBS file (may be compressed)
+    # ChunkRecords: int
+    #         Number of records parsed at once
+    # SodStart, SodEnd: int
+    #         First and last epochs to read [s]
+    # Prns: list
+    #         PRN labels of the satellites to read (all if None)
+    # Rate: float
+    #         Sampling rate of the epochs to read [s]
+    # IdxDir: str
+    #         Directory of the index file (next to the OBS file if None)
+
+    # Returns
+    # =======
+    # ObsInfo: generator
+    #         Codes and Phases records of each epoch (see getObsEpoch)
+
+    Chunks = readObsChunks(ObsFile, ChunkRecords, SodStart, SodEnd, Prns, Rate, IdxDir)
+
+    # Records not joined (see joinObsRecords)
+    UnmatchedCodes = 0
+    UnmatchedPhases = 0
+
+    while True:
+        with profileStage("READ_OBS"):
+            ObsData = next(Chunks, None)
+        if ObsData is None:
+            break
+
+        UnmatchedCodes += ObsData["UNMATCHED_C"]
+        UnmatchedPhases += ObsData["UNMATCHED_P"]
+
+        for Epoch in range(len(ObsData["EPOCHS"])):
+            with profileStage("GET_EPOCH"):
+                ObsInfo = getObsEpoch(ObsData, Epoch)
+            yield ObsInfo
+
+    reportUnmatchedObs(ObsFile, UnmatchedCodes, UnmatchedPhases)
+
+# End of iterObsEpochs()
+
+
+def getObsIndexPath(ObsFile, IdxDir=None):
+    
+    # Purpose: get the path to the index file of an OBS file
+    #          (see indexObsFile)
+    
+    # Parameters
+    # ==========
+    # ObsFile: str
+    #         Path to uncompressed OBS file
+    # IdxDir: str
+    #         Directory of the index files (next to the OBS file if None)
+
+    # Returns
+    # =======
+    # IdxFile: str
+    #         Path to index file
+
+    if IdxDir is None:
+        return ObsFile + ".idx"
+
+    return os.path.join(IdxDir, os.path.basename(ObsFile) + ".idx")
+
+# End of getObsIndexPath()
+
+
+def indexObsFile(ObsFile, ChunkSeconds=PREPRO_CHUNK_SECONDS, IdxDir=None):
+    
+    # Purpose: build the index of an OBS file by chunks of ChunkSeconds
+    #          of epochs (see ChunkIndex) in its .idx file, so that 
+    #          the records of a time window or of some satellites can
+    #          be read without parsing the whole file (see loadObsWindow).
+    #          If the index file cannot be written (e.g. read-only
+    #          directory), the file is not indexed
+    
+    # Parameters
+    # ==========
+    # ObsFile: str
+    #         Path to uncompressed OBS file
+    # ChunkSeconds: int
+    #         Length of the indexed chunks [s]
+    # IdxDir: str
+    #         Directory of the index file (next to the OBS file if None)
+
+    # Returns
+    # =======
+    # IdxFile: str
+    #         Path to index file (None if it cannot be written)
+
+    if isCompressedObsFile(ObsFile):
+        sys.stderr.write("ERROR: Compressed OBS file %s cannot be indexed\n" % ObsFile)
+        sys.exit(-1)
+
+    IdxFile = getObsIndexPath(ObsFile, IdxDir)
+
+    # Check that the index file can be written before reading the file
+    Dir = os.path.dirname(os.path.abspath(IdxFile))
+    try:
+        if not os.path.isdir(Dir):
+            os.makedirs(Dir)
+        Writable = os.access(Dir, os.W_OK)
+    except OSError:
+        Writable = False
+    if not Writable:
+        sys.stderr.write("WARNING: Cannot write index file %s, OBS file %s is "
+        "not indexed\n" % (IdxFile, ObsFile))
+        return None
+
+    # Display Message
+    print("INFO: Indexing file: %s..." % ObsFile)
+
+    Index = ChunkIndex(ChunkSeconds)
+    Offset = 0
+    ChunkOffset = 0
+    # Current epoch and PRN labels of its records
+    Sod = None
+    Labels = []
+
+    with open(ObsFile, 'rb') as f:
+        for Line in f:
+            Fields = Line.split()
+            if Fields and Fields[0][:1] != b'#':
+                LineSod = float(Fields[ObsIdxC["SOD"]])
+                if LineSod != Sod:
+                    if Labels:
+                        Index.add(Labels, Sod)
+                        Labels = []
+                    if Index.isNewChunk(LineSod):
+                        Index.end(ChunkOffset, Offset - ChunkOffset)
+                        ChunkOffset = Offset
+                    Sod = LineSod
+                Labels.append(Fields[ObsIdxC["PRN"]].decode())
+            Offset += len(Line)
+
+    if Labels:
+        Index.add(Labels, Sod)
+    Index.end(ChunkOffset, Offset - ChunkOffset)
+
+    # Replace the index file only when the new one is complete
+    try:
+        Index.write(IdxFile + ".tmp")
+        os.replace(IdxFile + ".tmp", IdxFile)
+
+    except OSError as Error:
+        sys.stderr.write("WARNING: Cannot write index file %s, OBS file %s is "
+        "not indexed: %s\n" % (IdxFile, ObsFile, Error))
+        return None
+
+    return IdxFile
+
+# End of indexObsFile()
+
+
+def loadObsWindow(ObsFile, SodStart=0, SodEnd=Const.S_IN_D, Prns=None, IdxDir=None):
+    
+    # Purpose: read the records of a time window (and optionally some
+    #          satellites) from an OBS file using its index, which is
+    #          built if it does not exist or is older than the file 
+    #          (see indexObsFile): only the chunks with epochs in the
+    #          window and records of the satellites are parsed (all the
+    #          file if it cannot be indexed)
+    
+    # Parameters
+    # ==========
+    # ObsFile: str
+    #         Path to uncompressed OBS file
+    # SodStart, SodEnd: int
+    #         First and last epochs of the window [s]
+    # Prns: list
+    #         PRN labels of the satellites, e.g. ["G01", "E11"] (all if None)
+    # IdxDir: str
+    #         Directory of the index file (next to the OBS file if None)
+
+    # Returns
+    # =======
+    # ObsData: dict
+    #         Columnar OBS data of the window (see convertObsTable2ObsData)
+
+    Chunks = selectObsFileChunks(ObsFile, SodStart, SodEnd, Prns, IdxDir)
+
+    # Parse the selected chunks (or all the file)
+    ObsTable = parseObsRecords(ObsFile, Chunks)
+
+    # Keep the records of the window
+    ObsTable = filterObsTable(ObsTable, SodStart, SodEnd, Prns)
+
+    ObsData = convertObsTable2ObsData(ObsTable, ObsFile)
+    reportUnmatchedObs(ObsFile, ObsData["UNMATCHED_C"], ObsData["UNMATCHED_P"])
+
+    return ObsData
+
+# End of loadObsWindow()
+
+
+def selectObsFileChunks(ObsFile, SodStart, SodEnd, Prns=None, IdxDir=None):
+    
+    # Purpose: select the chunks of an OBS file with epochs in a time
+    #          window and, optionally, records of some satellites using 
+    #          its index, which is built if it does not exist or is older
+    #          than the file (see indexObsFile)
+    
+    # Parameters
+    # ==========
+    # ObsFile: str
+    #         Path to uncompressed OBS file
+    # SodStart, SodEnd: int
+    #         First and last epochs of the window [s]
+    # Prns: list
+    #         PRN labels of the satellites (all if None)
+    # IdxDir: str
+    #         Directory of the index file (next to the OBS file if None)
+
+    # Returns
+    # =======
+    # Chunks: np.array
+    #         Selected chunks of the index (see readIndexFile), None if
+    #         the file cannot be indexed
+
+    IdxFile = getObsIndexPath(ObsFile, IdxDir)
+    if not os.path.isfile(IdxFile) or \
+    os.path.getmtime(IdxFile) < os.path.getmtime(ObsFile):
+        IdxFile = indexObsFile(ObsFile, IdxDir=IdxDir)
+        if IdxFile is None:
+            return None
+
+    Chunks, PrnRows = readIndexFile(IdxFile)
+
+    return Chunks[selectIndexChunks(Chunks, PrnRows, SodStart, SodEnd, Prns)]
+
+# End of selectObsFileChunks()
+
+
+def parseObsRecords(ObsFile, Chunks=None):
+    
+    # Purpose: parse the records of some chunks of an OBS file
+    #          (see selectObsFileChunks) or of all the file
+    
+    # Parameters
+    # ==========
+    # ObsFile: str
+    #         Path to OBS file (may be compressed if all the file is parsed)
+    # Chunks: np.array
+    #         Chunks of the index (see readIndexFile), all the file if None
+
+    # Returns
+    # =======
+    # ObsTable: DataFrame
+    #         OBS records of the chunks
+
+    # Parse all the file at once
+    if Chunks is None:
+        ObsTable = parseObsFile(ObsFile)
+
+        # If file is empty
+        if ObsTable is None:
+            ObsTable = createObsTable()
+
+        return ObsTable
+
+    Text = readIndexedChunks(ObsFile, Chunks)
+
+    try:
+        return read_csv(io.BytesIO(Text), sep=r'\s+', header=None, comment='#',
+        names=range(ObsNCols), dtype=ObsColTypes)
+
+    # If no chunk is selected
+    except EmptyDataError:
+        return createObsTable()
+
+# End of parseObsRecords()
+
+
+def createOutputFile(Path, Hdr, Compression="NONE", Offset=None):
+    
+    # Purpose: open output file and write its header
+    
+    # Parameters
+    # ==========
+    # Path: str
+    #         Path to file
+    # Hdr: str
+    #         File header
+    # Compression: str
+    #         Compression of the file [NONE|GZIP|ZSTD]
+    # Offset: int
+    #         If provided, resume the existing file from this position
+    #         (see PreproCheckpoint), discarding the rest of the file
+
+    # Returns
+    # =======
+    # f: File descriptor or ChunkedOutputFile
+    #         Descriptor of output file
+    
+    # If the file is resumed
+    if Offset is not None:
+        # Display Message
+        print("INFO: Resuming file: %s..." % Path)
+
+        if Compression == "NONE":
+            f = open(Path, 'r+')
+            f.truncate(Offset)
+            f.seek(Offset)
+        else:
+            f = ChunkedOutputFile(Path, Compression, Offset)
+
+        return f
+
+    # Display Message
+    print("INFO: Creating file: %s..." % Path)
+
+    # Create output directory, if needed
+    if not os.path.exists(os.path.dirname(Path)):
+        os.makedirs(os.path.dirname(Path))
+
+    # Open PREPRO OBS file
+    if Compression == "NONE":
+        f = open(Path, 'w')
+    else:
+        f = ChunkedOutputFile(Path, Compression)
+
+    # Write header
+    f.write(Hdr)
+
+    # The header is the first compressed chunk
+    if Compression != "NONE":
+        f.endChunk()
+
+    return f
+
+# End of createOutputFile()
+
+
+class ChunkedOutputFile:
+
+    # Purpose: write a compressed text file in chunks that can be
+    #          decompressed independently (gzip members or zstd frames,
+    #          so that the whole file is still a valid gzip or zstd
+    #          file). The chunks are ended by the writer (see ChunkIndex)
+
+    # Parameters
+    # ==========
+    # Path: str
+    #         Path to file
+    # Compression: str
+    #         Compression of the file [GZIP|ZSTD]
+    # Offset: int
+    #         If provided, resume the existing file from this position
+    #         (the end of a chunk)
+
+    def __init__(self, Path, Compression, Offset=None):
+        self.name = Path
+        self.Compression = Compression
+        if Offset is None:
+            self.f = open(Path, 'wb')
+        else:
+            self.f = open(Path, 'r+b')
+            self.f.truncate(Offset)
+            self.f.seek(Offset)
+        self.Text = []
+        if Compression == "ZSTD":
+            self.Compressor = zstandard.ZstdCompressor(level=3)
+
+    # End of __init__()
+
+    def write(self, Text):
+
+        # Purpose: add text to the current chunk
+
+        self.Text.append(Text)
+
+    # End of write()
+
+    def compress(self, Data):
+
+        # Purpose: compress one chunk
+
+        if self.Compression == "GZIP":
+            return gzip.compress(Data, compresslevel=6, mtime=0)
+
+        return self.Compressor.compress(Data)
+
+    # End of compress()
+
+    def endChunk(self):
+
+        # Purpose: compress and write the current chunk
+
+        # Returns
+        # =======
+        # Offset, Size: int
+        #         Position and size of the chunk in the file
+
+        Offset = self.f.tell()
+        self.f.write(self.compress("".join(self.Text).encode()))
+        self.Text = []
+
+        return Offset, self.f.tell() - Offset
+
+    # End of endChunk()
+
+    def flush(self):
+
+        # Purpose: flush the chunks written
+
+        self.f.flush()
+
+    # End of flush()
+
+    def close(self):
+
+        # Purpose: write the pending text and close the file
+
+        if self.Text:
+            self.endChunk()
+        self.f.close()
+
+    # End of close()
+
+# End of class ChunkedOutputFile
+
+
+class ChunkIndex:
+
+    # Purpose: build the index of a file by chunks of ChunkSeconds of
+    #          epochs (see IdxHdr), so that the records of a time window
+    #          or of some satellites can be read without scanning the
+    #          whole file (see loadPreproWindow and loadObsWindow)
+
+    # Parameters
+    # ==========
+    # ChunkSeconds: int
+    #         Length of the chunks [s]
+
+    def __init__(self, ChunkSeconds=PREPRO_CHUNK_SECONDS):
+        self.ChunkSeconds = ChunkSeconds
+        self.Chunks = []
+        # Rows before the current chunk
+        self.Row = 0
+        # Current chunk: number, epochs and PRN labels of its rows
+        self.Chunk = None
+        self.SodFirst = None
+        self.SodLast = None
+        self.Labels = []
+
+    # End of __init__()
+
+    def isNewChunk(self, Sod):
+
+        # Purpose: check if the epoch starts a new chunk
+
+        return self.Chunk is not None and int(Sod // self.ChunkSeconds) != self.Chunk
+
+    # End of isNewChunk()
+
+    def add(self, Labels, SodFirst, SodLast=None):
+
+        # Purpose: add the rows of some epochs of the current chunk
+
+        # Parameters
+        # ==========
+        # Labels: list
+        #         PRN labels of the rows
+        # SodFirst, SodLast: int
+        #         First and last epochs of the rows
+
+        if self.Chunk is None:
+            self.Chunk = int(SodFirst // self.ChunkSeconds)
+            self.SodFirst = SodFirst
+        self.SodLast = SodFirst if SodLast is None else SodLast
+        self.Labels.extend(Labels)
+
+    # End of add()
+
+    def end(self, Offset, Size):
+
+        # Purpose: end the current chunk
+
+        # Parameters
+        # ==========
+        # Offset, Size: int
+        #         Position and size of the chunk in the file
+
+        if self.Chunk is None:
+            return
+
+        # Rows range of each PRN
+        Labels = np.array(self.Labels)
+        Prns, First = np.unique(Labels, return_index=True)
+        Last = len(Labels) - 1 - np.unique(Labels[::-1], return_index=True)[1]
+        Ranges = ",".join(["%s:%d-%d" % (Prn, self.Row + F, self.Row + L)
+            for Prn, F, L in zip(Prns.tolist(), First.tolist(), Last.tolist())])
+
+        self.Chunks.append((self.SodFirst, self.SodLast, Offset, Size,
+            len(Labels), self.Row, Ranges))
+        self.Row += len(Labels)
+        self.Chunk = None
+        self.Labels = []
+
+    # End of end()
+
+    def restore(self, Chunks):
+
+        # Purpose: restore the chunks indexed before resuming a file
+
+        self.Chunks = list(Chunks)
+        self.Row = sum([Chunk[4] for Chunk in self.Chunks])
+
+    # End of restore()
+
+    def write(self, Path):
+
+        # Purpose: write the index file
+
+        with open(Path, 'w') as f:
+            f.write(IdxHdr)
+            f.writelines([IdxFmt % Chunk for Chunk in self.Chunks])
+
+    # End of write()
+
+# End of class ChunkIndex
+
+
+def readIndexFile(Path):
+
+    # Purpose: read the index of the chunks of a file (see ChunkIndex)
+
+    # Parameters
+    # ==========
+    # Path: str
+    #         Path to index file
+
+    # Returns
+    # =======
+    # Chunks: np.array
+    #         One row per chunk: SOD_FIRST, SOD_LAST, OFFSET, SIZE, LINES, ROW
+    # PrnRows: list
+    #         Rows range of each PRN in each chunk:
+    #         PrnRows[Chunk]["G01"] = [FirstRow, LastRow]
+
+    Chunks = []
+    PrnRows = []
+
+    with open(Path, 'r') as f:
+        for Line in f:
+            if Line[0] == '#':
+                continue
+            Fields = Line.split()
+            Chunks.append([int(Field) for Field in Fields[:6]])
+            PrnRows.append({Range.split(':')[0]: 
+                [int(Row) for Row in Range.split(':')[1].split('-')]
+                for Range in Fields[6].split(',')} if len(Fields) > 6 else {})
+
+    return np.array(Chunks, dtype=np.int64).reshape(-1, 6), PrnRows
+
+# End of readIndexFile()
+
+
+def selectIndexChunks(Chunks, PrnRows, SodStart, SodEnd, Prns=None):
+
+    # Purpose: select the chunks with epochs in a time window and, 
+    #          optionally, rows of some satellites
+
+    # Parameters
+    # ==========
+    # Chunks, PrnRows:
+    #         Index of the file (see readIndexFile)
+    # SodStart, SodEnd: int
+    #         First and last epochs of the window [s]
+    # Prns: list
+    #         PRN labels (all if None)
+
+    # Returns
+    # =======
+    # Selected: list
+    #         Indexes of the selected chunks
+
+    Selected = []
+    for i, (SodFirst, SodLast) in enumerate(Chunks[:, :2].tolist()):
+        if SodLast < SodStart or SodFirst > SodEnd:
+            continue
+        if Prns is not None and not any([Prn in PrnRows[i] for Prn in Prns]):
+            continue
+        Selected.append(i)
+
+    return Selected
+
+# End of selectIndexChunks()
+
+
+class PreproFileWriter:
+
+    # Purpose: write the Preprocessing results in the PREPRO OBS file.
+    #          The lines are accumulated as tuples of values and written
+    #          in blocks formatted with PreproLineFmt, instead of 
+    #          formatting and writing each field separately.
+    #          The file is indexed by chunks of ChunkSeconds of epochs
+    #          in its .idx file (see ChunkIndex), and if it is 
+    #          compressed, each chunk is compressed independently
+
+    # Parameters
+    # ==========
+    # fpreprobs: file descriptor or ChunkedOutputFile
+    #         Descriptor for PREPRO OBS output file
+    # fpreprobin: PreproBinWriter
+    #         PREPRO OBS binary output file (optional)
+    # BlockSize: int
+    #         Number of lines formatted and written at once
+    # ChunkSeconds: int
+    #         Length of the indexed (and compressed) chunks [s]
+    # Checkpoint: PreproCheckpoint
+    #         Checkpoints saved at the end of each chunk (optional)
+
+    # Get the values of the PREPRO OBS columns (but PRN) from the
+    # Preprocessing info of one satellite
+    getValues = itemgetter(*PreproObsKeys.values())
+
+    def __init__(self, fpreprobs, fpreprobin=None, BlockSize=10000,
+    ChunkSeconds=PREPRO_CHUNK_SECONDS, Checkpoint=None):
+        self.f = fpreprobs
+        self.fbin = fpreprobin
+        self.BlockSize = BlockSize
+        self.Lines = []
+        self.Checkpoint = Checkpoint
+
+        # Index of the chunks and position of the text written
+        self.Index = ChunkIndex(ChunkSeconds)
+        self.Compressed = isinstance(fpreprobs, ChunkedOutputFile)
+        self.Offset = 0 if self.Compressed else fpreprobs.tell()
+        self.ChunkOffset = self.Offset
+
+    # End of __init__()
+
+    def endChunk(self):
+
+        # Purpose: write the lines of the current chunk and index it
+
+        self.flush()
+        Chunk = self.Index.Chunk
+        if self.Compressed:
+            Offset, Size = self.f.endChunk()
+        else:
+            Offset, Size = self.ChunkOffset, self.Offset - self.ChunkOffset
+            self.ChunkOffset = self.Offset
+        self.Index.end(Offset, Size)
+
+        if self.Checkpoint is not None and Chunk is not None:
+            self.Checkpoint.save(Chunk, self.getPositions())
+
+    # End of endChunk()
+
+    def getPositions(self):
+
+        # Purpose: flush the files and get the positions of the outputs
+        #          written, to resume them (see resume)
+
+        # Returns
+        # =======
+        # Positions: dict
+        #         Text and binary files positions and chunks indexed
+
+        self.f.flush()
+        Positions = {"OFFSET": self.f.f.tell() if self.Compressed else self.Offset,
+            "RECORDS": None, "CHUNKS": list(self.Index.Chunks)}
+        if self.fbin is not None:
+            self.fbin.f.flush()
+            Positions["RECORDS"] = self.fbin.NRecords
+
+        return Positions
+
+    # End of getPositions()
+
+    def resume(self, Positions):
+
+        # Purpose: restore the chunks indexed before resuming the files
+        #          (opened from their positions, see createOutputFile)
+
+        self.Index.restore(Positions["CHUNKS"])
+
+    # End of resume()
+
+    def writeLines(self, Lines):
+
+        # Purpose: format and write lines
+
+        # Parameters
+        # ==========
+        # Lines: list
+        #         Tuples with the values of the PREPRO OBS columns
+
+        # Text lines
+        Text = "".join([PreproLineFmt % Line for Line in Lines])
+        self.f.write(Text)
+        self.Offset += len(Text)
+
+        # Binary records
+        if self.fbin is not None:
+            self.fbin.write(np.array(Lines, dtype=PreproBinType))
+
+    # End of writeLines()
+
+    def flush(self):
+
+        # Purpose: write the accumulated lines
+
+        if self.Lines:
+            self.writeLines(self.Lines)
+            self.Lines = []
+
+    # End of flush()
+
+    def write(self, PreproObsInfo):
+
+        # Purpose: accumulate the Preprocessing results of one epoch
+
+        # Parameters
+        # ==========
+        # PreproObsInfo: dict
+        #         Dictionary containing Preprocessing info for the 
+        #         current epoch
+
+        Lines = [(Values[0], SatLabel) + Values[1:] for SatLabel, Values in 
+            zip(PreproObsInfo.keys(), map(self.getValues, PreproObsInfo.values()))]
+
+        if Lines:
+            if self.Index.isNewChunk(Lines[0][0]):
+                self.endChunk()
+            self.Index.add(list(PreproObsInfo.keys()), Lines[0][0])
+
+        self.Lines.extend(Lines)
+
+        if len(self.Lines) >= self.BlockSize:
+            self.flush()
+
+    # End of write()
+
+    def writeArrays(self, PreproObsData):
+
+        # Purpose: write the columnar Preprocessing results 
+        #          (see runPreprocessingArcs)
+
+        # Parameters
+        # ==========
+        # PreproObsData: dict
+        #         Dictionary containing one array per PREPRO OBS column
+
+        self.flush()
+
+        NLines = len(PreproObsData["SOD"])
+
+        # Ends of the indexed chunks (the lines are in epochs order)
+        Chunks = PreproObsData["SOD"] // self.Index.ChunkSeconds
+        Ends = (np.flatnonzero(np.diff(Chunks)) + 1).tolist() + [NLines]
+
+        # Loop over blocks of lines
+        Start = 0
+        while Start < NLines:
+            End = min(Start + self.BlockSize, Ends[0])
+
+            Columns = []
+            for Key in PreproIdx:
+                Column = PreproObsData[Key][Start:End].tolist()
+                if Key == "PRN":
+                    Column = [SatLabels[Prn] for Prn in Column]
+                Columns.append(Column)
+
+            if self.Index.isNewChunk(Columns[0][0]):
+                self.endChunk()
+            self.Index.add(Columns[PreproIdx["PRN"]], Columns[0][0], Columns[0][-1])
+
+            self.writeLines(list(zip(*Columns)))
+
+            Start = End
+            if End == Ends[0]:
+                Ends.pop(0)
+
+    # End of writeArrays()
+
+    def close(self):
+
+        # Purpose: write the pending lines, the index and close the files
+
+        self.endChunk()
+        self.f.close()
+        self.Index.write(self.f.name + ".idx")
+        if self.fbin is not None:
+            self.fbin.close()
+
+    # End of close()
+
+# End of class PreproFileWriter
+
+
+def generatePreproFile(fpreprobs, PreproObsInfo):
+
+    # Purpose: generate output file with Preprocessing results
+
+    # Parameters
+    # ==========
+    # fpreprobs: PreproFileWriter
+    #         PREPRO OBS output file
+    # PreproObsInfo: dict
+    #         Dictionary containing Preprocessing info for the 
+    #         current epoch
+
+    # Returns
+    # =======
+    # Nothing
+
+    fpreprobs.write(PreproObsInfo)
+
+# End of generatePreproFile
+
+
+def writePreproEpochs(fpreprobs, PreproStream):
+
+    # Purpose: write the Preprocessing results of a stream of epochs
+    #          in the output file, passing them to the next stage
+
+    # Parameters
+    # ==========
+    # fpreprobs: PreproFileWriter
+    #         PREPRO OBS output file
+    # PreproStream: iterable
+    #         Preprocessing info of each epoch (see runPreprocessing)
+
+    # Returns
+    # =======
+    # PreproObsInfo: generator
+    #         Preprocessing info of each epoch, once written
+
+    for PreproObsInfo in PreproStream:
+        with profileStage("WRITE_PREPRO"):
+            fpreprobs.write(PreproObsInfo)
+        yield PreproObsInfo
+
+# End of writePreproEpochs()
+
+
+def generatePreproFileArrays(fpreprobs, PreproObsData):
+
+    # Purpose: generate output file with the columnar Preprocessing
+    #          results (see runPreprocessingArcs), with the same format
+    #          as generatePreproFile
+
+    # Parameters
+    # ==========
+    # fpreprobs: PreproFileWriter
+    #         PREPRO OBS output file
+    # PreproObsData: dict
+    #         Dictionary containing one array per PREPRO OBS column
+
+    # Returns
+    # =======
+    # Nothing
+
+    fpreprobs.writeArrays(PreproObsData)
+
+# End of generatePreproFileArrays
+
+
+def readPreproFile(PreproObsFile):
+
+    # Purpose: read the whole PREPRO OBS file at once into a typed
+    #          DataFrame whose columns are labeled as in PreproIdx
+
+    # Parameters
+    # ==========
+    # PreproObsFile: str
+    #         Path to PREPRO OBS file
+
+    # Returns
+    # =======
+    # PreproObsData: DataFrame
+    #         PREPRO OBS data, PreproObsData[PreproIdx["C1"]]
+
+    PreproObsData = read_csv(PreproObsFile, sep=r'\s+', skiprows=1, header=None,
+        names=list(PreproIdx.values()), dtype=PreproColTypes)
+
+    return PreproObsData
+
+# End of readPreproFile()
+
+
+def readIndexedChunks(Path, Chunks):
+
+    # Purpose: read (and decompress) some chunks of an indexed file
+
+    # Parameters
+    # ==========
+    # Path: str
+    #         Path to file
+    # Chunks: np.array
+    #         Selected chunks of the index (see readIndexFile)
+
+    # Returns
+    # =======
+    # Text: bytes
+    #         Text of the chunks
+
+    Text = []
+    with open(Path, 'rb') as f:
+        for Offset, Size in Chunks[:, 2:4].tolist():
+            f.seek(Offset)
+            Data = f.read(Size)
+            if Path.endswith(PREPRO_COMPRESSED_EXT["ZSTD"]):
+                if zstandard is None:
+                    sys.stderr.write("ERROR: Reading %s requires the zstandard package\n" %
+                    Path)
+                    sys.exit(-1)
+                Text.append(zstandard.ZstdDecompressor().decompress(Data))
+            elif Path.endswith(PREPRO_COMPRESSED_EXT["GZIP"]):
+                Text.append(gzip.decompress(Data))
+            else:
+                Text.append(Data)
+
+    return b"".join(Text)
+
+# End of readIndexedChunks()
+
+
+def findPreproIndex(PreproObsFile):
+
+    # Purpose: find the index of a PREPRO OBS file. The binary .npy 
+    #          file has the same rows as the text file and uses its
+    #          index (the latest one if the text file was written 
+    #          with several compressions)
+
+    Candidates = [PreproObsFile + ".idx"]
+    if PreproObsFile.endswith(".npy"):
+        Candidates = [os.path.splitext(PreproObsFile)[0] + ".dat" + Ext + ".idx"
+            for Ext in [""] + list(PREPRO_COMPRESSED_EXT.values())]
+
+    Candidates = [IdxFile for IdxFile in Candidates if os.path.isfile(IdxFile)]
+    if Candidates:
+        return max(Candidates, key=os.path.getmtime)
+
+    sys.stderr.write("ERROR: Index of PREPRO OBS file %s not found\n" % PreproObsFile)
+    sys.exit(-1)
+
+# End of findPreproIndex()
+
+
+def loadPreproWindow(PreproObsFile, SodStart=0, SodEnd=Const.S_IN_D, Prns=None):
+
+    # Purpose: read the epochs of a time window (and optionally some
+    #          satellites) from a PREPRO OBS file using its index 
+    #          (see ChunkIndex): only the chunks with epochs in the
+    #          window and rows of the satellites are read (and 
+    #          decompressed). The file may be the text file (plain or
+    #          compressed) or the binary .npy file, of which only the
+    #          rows ranges of the satellites are memory-mapped
+
+    # Parameters
+    # ==========
+    # PreproObsFile: str
+    #         Path to PREPRO OBS file (.dat, .dat.gz, .dat.zst or .npy)
+    # SodStart, SodEnd: int
+    #         First and last epochs of the window [s]
+    # Prns: list
+    #         PRN labels of the satellites, e.g. ["G01", "E11"] (all if None)
+
+    # Returns
+    # =======
+    # PreproObsData: DataFrame
+    #         PREPRO OBS data of the window (see readPreproFile)
+
+    Chunks, PrnRows = readIndexFile(findPreproIndex(PreproObsFile))
+    Selected = selectIndexChunks(Chunks, PrnRows, SodStart, SodEnd, Prns)
+
+    # Binary file: memory-map the rows of the selected chunks
+    if PreproObsFile.endswith(".npy"):
+        Ranges = []
+        for i in Selected:
+            if Prns is None:
+                Ranges.append([Chunks[i, 5], Chunks[i, 5] + Chunks[i, 4]])
+            else:
+                Rows = [PrnRows[i][Prn] for Prn in Prns if Prn in PrnRows[i]]
+                Ranges.append([min(Rows)[0], max([Last for _, Last in Rows]) + 1])
+
+        Records = np.load(PreproObsFile, mmap_mode='r')
+        Records = np.concatenate([Records[First:Last] for First, Last in Ranges] +
+            [Records[:0]])
+
+        Columns = OrderedDict({})
+        for Key, Idx in PreproIdx.items():
+            if Key == "PRN":
+                Columns[Idx] = Records[Key].astype("U3").astype(object)
+            elif PreproFmt[Idx].endswith("d"):
+                Columns[Idx] = Records[Key].astype(np.int64)
+            else:
+                Columns[Idx] = np.asarray(Records[Key])
+        PreproObsData = DataFrame(Columns)
+
+    # Text file: read the selected chunks
+    else:
+        Text = readIndexedChunks(PreproObsFile, Chunks[Selected])
+        try:
+            PreproObsData = read_csv(io.BytesIO(Text), sep=r'\s+', header=None,
+                names=list(PreproIdx.values()), dtype=PreproColTypes)
+
+        # If no chunk overlaps the window
+        except EmptyDataError:
+            PreproObsData = DataFrame({Idx: Series(dtype=Type)
+            for Idx, Type in PreproColTypes.items()})
+
+    # Keep the epochs and satellites of the window
+    Sod = PreproObsData[PreproIdx["SOD"]]
+    Keep = (Sod >= SodStart) & (Sod <= SodEnd)
+    if Prns is not None:
+        Keep &= PreproObsData[PreproIdx["PRN"]].isin(Prns)
+    PreproObsData = PreproObsData[Keep].reset_index(drop=True)
+
+    return PreproObsData
+
+# End of loadPreproWindow()
+
+
+def convertPreproArrays2DataFrame(PreproObsData):
+
+    # Purpose: convert the columnar Preprocessing results (see 
+    #          runPreprocessingArcs) into a DataFrame with the same
+    #          layout as readPreproFile (values are not rounded to
+    #          the PREPRO OBS file resolution)
+
+    # Parameters
+    # ==========
+    # PreproObsData: dict
+    #         Dictionary containing one array per PREPRO OBS column
+
+    # Returns
+    # =======
+    # PreproObsDf: DataFrame
+    #         PREPRO OBS data, PreproObsDf[PreproIdx["C1"]]
+
+    Columns = OrderedDict({})
+    for Key, Idx in PreproIdx.items():
+        if Key == "PRN":
+            Columns[Idx] = np.array(SatLabels, dtype=object)[PreproObsData[Key]]
+        elif PreproFmt[Idx].endswith("d"):
+            Columns[Idx] = PreproObsData[Key].astype(np.int64)
+        else:
+            Columns[Idx] = PreproObsData[Key]
+
+    return DataFrame(Columns)
+
+# End of convertPreproArrays2DataFrame()
+
+
+class PreproBinWriter:
+
+    # Purpose: write the PREPRO OBS records in a binary .npy file
+    #          (see PreproBinType) that can be memory-mapped with 
+    #          np.load(Path, mmap_mode='r'). The records are appended 
+    #          as they are generated and the array shape in the header
+    #          is patched when the file is closed
+
+    # Parameters
+    # ==========
+    # Path: str
+    #         Path to file
+    # NRecords: int
+    #         If provided, resume the existing file after this number
+    #         of records (see PreproCheckpoint)
+
+    def __init__(self, Path, NRecords=None):
+        # Header length for any number of records (aligned to 64 bytes)
+        self.HdrLen = -(-len(self.buildHeader(10**18)) // 64) * 64
+
+        # If the file is resumed
+        if NRecords is not None:
+            # Display Message
+            print("INFO: Resuming file: %s..." % Path)
+
+            self.f = open(Path, 'r+b')
+            self.NRecords = NRecords
+            self.f.truncate(self.HdrLen + NRecords * PreproBinType.itemsize)
+            self.f.seek(0, os.SEEK_END)
+            return
+
+        # Display Message
+        print("INFO: Creating file: %s..." % Path)
+
+        # Create output directory, if needed
+        if not os.path.exists(os.path.dirname(Path)):
+            os.makedirs(os.path.dirname(Path))
+
+        self.f = open(Path, 'wb')
+        self.NRecords = 0
+
+        # Write a provisional header
+        self.writeHeader()
+
+    # End of __init__()
+
+    def buildHeader(self, NRecords):
+        return "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % \
+            (np.lib.format.dtype_to_descr(PreproBinType), NRecords)
+
+    def writeHeader(self):
+        # Magic string, version 1.0, header length and padded header
+        Header = self.buildHeader(self.NRecords).ljust(self.HdrLen - 10 - 1) + "\n"
+        self.f.write(b"\x93NUMPY\x01\x00" + struct.pack("<H", len(Header)) + 
+            Header.encode("latin1"))
+
+    def write(self, Records):
+
+        # Purpose: append records to the file
+
+        # Parameters
+        # ==========
+        # Records: np.array
+        #         Records of PreproBinType
+
+        self.f.write(Records.tobytes())
+        self.NRecords += len(Records)
+
+    # End of write()
+
+    def close(self):
+
+        # Purpose: patch the header with the number of records
+        #          and close the file
+
+        self.f.seek(0)
+        self.writeHeader()
+        self.f.close()
+
+    # End of close()
+
+# End of class PreproBinWriter
+
+
+def readPreproBinFile(PreproBinObsFile):
+
+    # Purpose: read the PREPRO OBS binary file (memory-mapped, without 
+    #          parsing) into a DataFrame with the same layout as 
+    #          readPreproFile (values are not rounded to the PREPRO OBS
+    #          text file resolution)
+
+    # Parameters
+    # ==========
+    # PreproBinObsFile: str
+    #         Path to PREPRO OBS binary file
+
+    # Returns
+    # =======
+    # PreproObsData: DataFrame
+    #         PREPRO OBS data, PreproObsData[PreproIdx["C1"]]
+
+    # Display Message
+    print("INFO: Reading file: %s..." % PreproBinObsFile)
+
+    try:
+        Records = np.load(PreproBinObsFile, mmap_mode='r')
+    except ValueError:
+        # Empty files cannot be memory-mapped
+        Records = np.load(PreproBinObsFile)
+
+    Columns = OrderedDict({})
+    for Key, Idx in PreproIdx.items():
+        if Key == "PRN":
+            Columns[Idx] = Records[Key].astype("U3").astype(object)
+        elif PreproFmt[Idx].endswith("d"):
+            Columns[Idx] = Records[Key].astype(np.int64)
+        else:
+            Columns[Idx] = np.asarray(Records[Key])
+
+    return DataFrame(Columns)
+
+# End of readPreproBinFile()
+
+
+def readPreproBinArrays(PreproBinObsFile):
+
+    # Purpose: read the PREPRO OBS binary file into columnar
+    #          Preprocessing results, as given by runPreprocessingArcs
+
+    # Parameters
+    # ==========
+    # PreproBinObsFile: str
+    #         Path to PREPRO OBS binary file
+
+    # Returns
+    # =======
+    # PreproObsData: dict
+    #         Dictionary containing one array per PREPRO OBS column
+    #         (PRNs coded as satellite indexes, see SatIdx)
+
+    Records = np.load(PreproBinObsFile)
+
+    PreproObsData = OrderedDict({})
+    for Key in PreproIdx:
+        if Key == "PRN":
+            Labels, Codes = np.unique(Records[Key], return_inverse=True)
+            PreproObsData[Key] = np.array([SatIdx[Label.decode()] for Label in Labels],
+                dtype=np.int64)[Codes]
+        elif PreproFmt[PreproIdx[Key]].endswith("d"):
+            PreproObsData[Key] = Records[Key].astype(np.int64)
+        else:
+            PreproObsData[Key] = Records[Key]
+
+    return PreproObsData
+
+# End of readPreproBinArrays()
+
+
+def getPreproCacheParams(Conf):
+
+    # Purpose: get the configuration parameters the Preprocessing
+    #          results depend on, to look for them in the results cache
+
+    # Parameters
+    # ==========
+    # Conf: dict
+    #         Configuration dictionary
+
+    # Returns
+    # =======
+    # Params: list
+    #         (Name, Value) of the parameters
+
+    return [(Key, Conf[Key]) for Key in sorted(Conf) 
+        if Key in PREPRO_CACHE_PARAMS or Key.startswith(("MAX_", "HATCH_"))]
+
+# End of getPreproCacheParams()
+
+
+def getPreproCacheFiles(ObsFile):
+
+    # Purpose: get the files the Preprocessing results depend on, to
+    #          look for them in the results cache: the OBS file and the
+    #          Preprocessing source files, so that the results of
+    #          another version of the code are not reused
+
+    # Parameters
+    # ==========
+    # ObsFile: str
+    #         Path to OBS file
+
+    # Returns
+    # =======
+    # Files: list
+    #         Paths to the files
+
+    SrcDir = os.path.dirname(os.path.abspath(__file__))
+
+    Files = [ObsFile]
+    for Source in PREPRO_CACHE_SOURCES:
+        Path = os.path.join(SrcDir, Source)
+        if os.path.isdir(Path):
+            Files += [os.path.join(Path, Name) for Name in sorted(os.listdir(Path))
+                if Name.endswith(".py")]
+        else:
+            Files.append(Path)
+
+    return Files
+
+# End of getPreproCacheFiles()
 
 
 def openInputFile(Path):
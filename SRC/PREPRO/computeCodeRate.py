@@ -1,13 +1,18 @@
+import numpy as np
 import COMMON.GnssConstants as Const
 
-def computeCodeRate(PreProObs, PrevPreproObsInfo, SatLabel):
+def computeCodeRate(PreProObs, PrevPreproObsInfo, Sats):
+    # Get previous values of the satellites
+    Prev1 = PrevPreproObsInfo.PrevC1[Sats]
+    Prev2 = PrevPreproObsInfo.PrevC2[Sats]
+
     # Check inconsistencies 0/0 
-    if PrevPreproObsInfo[SatLabel]["PrevC1"] == Const.NAN and PrevPreproObsInfo[SatLabel]["PrevC2"] == Const.NAN:
-        rangeRate_f1 = Const.NAN
-        rangeRate_f2 = Const.NAN
-    else:
-        rangeRate_f1 = (PreProObs["C1"] - PrevPreproObsInfo[SatLabel]["PrevC1"]) / (PreProObs["Sod"] - PrevPreproObsInfo[SatLabel]["PrevEpoch"])
-        rangeRate_f2 = (PreProObs["C2"] - PrevPreproObsInfo[SatLabel]["PrevC2"]) / (PreProObs["Sod"] - PrevPreproObsInfo[SatLabel]["PrevEpoch"])
+    Compute = (Prev1 != Const.NAN) | (Prev2 != Const.NAN)
+    rangeRate_f1 = np.full(len(Sats), Const.NAN)
+    rangeRate_f2 = np.full(len(Sats), Const.NAN)
+    DeltaT = PreProObs["Sod"][Compute] - PrevPreproObsInfo.PrevEpoch[Sats][Compute]
+    rangeRate_f1[Compute] = (PreProObs["C1"][Compute] - Prev1[Compute]) / DeltaT
+    rangeRate_f2[Compute] = (PreProObs["C2"][Compute] - Prev2[Compute]) / DeltaT
     
     # Update dictionaries
     PreProObs["RangeRateL1"] = rangeRate_f1
@@ -16,14 +21,18 @@ def computeCodeRate(PreProObs, PrevPreproObsInfo, SatLabel):
     # Return updated dictionaries
     return PreProObs
 
-def computeCodeRateStep(PreProObs, PrevPreproObsInfo, SatLabel):
+def computeCodeRateStep(PreProObs, PrevPreproObsInfo, Sats):
+    # Get previous values of the satellites
+    Prev1 = PrevPreproObsInfo.PrevRangeRateL1[Sats]
+    Prev2 = PrevPreproObsInfo.PrevRangeRateL2[Sats]
+
     # Check inconsistencies 0/0 
-    if PrevPreproObsInfo[SatLabel]["PrevRangeRateL1"] == Const.NAN and PrevPreproObsInfo[SatLabel]["PrevRangeRateL2"] == Const.NAN:
-        rangeRateStep_f1 = Const.NAN
-        rangeRateStep_f2 = Const.NAN
-    else:
-        rangeRateStep_f1 = (PreProObs["RangeRateL1"] - PrevPreproObsInfo[SatLabel]["PrevRangeRateL1"]) / (PreProObs["Sod"] - PrevPreproObsInfo[SatLabel]["PrevEpoch"])
-        rangeRateStep_f2 = (PreProObs["RangeRateL2"] - PrevPreproObsInfo[SatLabel]["PrevRangeRateL2"]) / (PreProObs["Sod"] - PrevPreproObsInfo[SatLabel]["PrevEpoch"])
+    Compute = (Prev1 != Const.NAN) | (Prev2 != Const.NAN)
+    rangeRateStep_f1 = np.full(len(Sats), Const.NAN)
+    rangeRateStep_f2 = np.full(len(Sats), Const.NAN)
+    DeltaT = PreProObs["Sod"][Compute] - PrevPreproObsInfo.PrevEpoch[Sats][Compute]
+    rangeRateStep_f1[Compute] = (PreProObs["RangeRateL1"][Compute] - Prev1[Compute]) / DeltaT
+    rangeRateStep_f2[Compute] = (PreProObs["RangeRateL2"][Compute] - Prev2[Compute]) / DeltaT
     
     # Update dictionaries
     PreProObs["RangeRateStepL1"] = rangeRateStep_f1
@@ -1,14 +1,18 @@
+import numpy as np
 import COMMON.GnssConstants as Const
 
-def computePhaseRate(PreProObs, PrevPreproObsInfo, SatLabel):
-    
+def computePhaseRate(PreProObs, PrevPreproObsInfo, Sats):
+    # Get previous values of the satellites
+    Prev1 = PrevPreproObsInfo.PrevL1[Sats]
+    Prev2 = PrevPreproObsInfo.PrevL2[Sats]
+
     # Check inconsistencies 0/0 
-    if PrevPreproObsInfo[SatLabel]["PrevL1"] == Const.NAN and PrevPreproObsInfo[SatLabel]["PrevL2"] == Const.NAN:
-        phaseRate_f1 = Const.NAN
-        phaseRate_f2 = Const.NAN
-    else:
-        phaseRate_f1 = (PreProObs["L1Meters"] - PrevPreproObsInfo[SatLabel]["PrevL1"]) / (PreProObs["Sod"] - PrevPreproObsInfo[SatLabel]["PrevEpoch"])
-        phaseRate_f2 = (PreProObs["L2Meters"] - PrevPreproObsInfo[SatLabel]["PrevL2"]) / (PreProObs["Sod"] - PrevPreproObsInfo[SatLabel]["PrevEpoch"])
+    Compute = (Prev1 != Const.NAN) | (Prev2 != Const.NAN)
+    phaseRate_f1 = np.full(len(Sats), Const.NAN)
+    phaseRate_f2 = np.full(len(Sats), Const.NAN)
+    DeltaT = PreProObs["Sod"][Compute] - PrevPreproObsInfo.PrevEpoch[Sats][Compute]
+    phaseRate_f1[Compute] = (PreProObs["L1Meters"][Compute] - Prev1[Compute]) / DeltaT
+    phaseRate_f2[Compute] = (PreProObs["L2Meters"][Compute] - Prev2[Compute]) / DeltaT
     
     # Update dictionaries
     PreProObs["PhaseRateL1"] = phaseRate_f1
@@ -17,14 +21,18 @@ def computePhaseRate(PreProObs, PrevPreproObsInfo, SatLabel):
     # Return updated dictionaries
     return PreProObs
 
-def computePhaseRateStep(PreProObs, PrevPreproObsInfo, SatLabel):
+def computePhaseRateStep(PreProObs, PrevPreproObsInfo, Sats):
+    # Get previous values of the satellites
+    Prev1 = PrevPreproObsInfo.PrevPhaseRateL1[Sats]
+    Prev2 = PrevPreproObsInfo.PrevPhaseRateL2[Sats]
+
     # Check inconsistencies 0/0 
-    if PrevPreproObsInfo[SatLabel]["PrevPhaseRateL1"] == Const.NAN and PrevPreproObsInfo[SatLabel]["PrevPhaseRateL2"] == Const.NAN:
-        phaseRateStep_f1 = Const.NAN
-        phaseRateStep_f2 = Const.NAN
-    else:
-        phaseRateStep_f1 = (PreProObs["PhaseRateL1"] - PrevPreproObsInfo[SatLabel]["PrevPhaseRateL1"]) / (PreProObs["Sod"] - PrevPreproObsInfo[SatLabel]["PrevEpoch"])
-        phaseRateStep_f2 = (PreProObs["PhaseRateL2"] - PrevPreproObsInfo[SatLabel]["PrevPhaseRateL2"]) / (PreProObs["Sod"] - PrevPreproObsInfo[SatLabel]["PrevEpoch"])
+    Compute = (Prev1 != Const.NAN) | (Prev2 != Const.NAN)
+    phaseRateStep_f1 = np.full(len(Sats), Const.NAN)
+    phaseRateStep_f2 = np.full(len(Sats), Const.NAN)
+    DeltaT = PreProObs["Sod"][Compute] - PrevPreproObsInfo.PrevEpoch[Sats][Compute]
+    phaseRateStep_f1[Compute] = (PreProObs["PhaseRateL1"][Compute] - Prev1[Compute]) / DeltaT
+    phaseRateStep_f2[Compute] = (PreProObs["PhaseRateL2"][Compute] - Prev2[Compute]) / DeltaT
     
     # Update dictionaries
     PreProObs["PhaseRateStepL1"] = phaseRateStep_f1
@@ -0,0 +1,239 @@
+import numpy as np
+from InputOutput import TH, CSNEPOCHS, CSNPOINTS, CSPDEGREE, NSATS
+
+class CycleSlipDetector:
+
+    # Purpose: detect cycle slips in the Geometry-Free combination of
+    #          the carrier phases of every satellite.
+    #
+    #          For each satellite, the last CYCLE_SLIPS points of the
+    #          Geometry-Free are kept in a fixed-size ring buffer and
+    #          the prediction of the polynomial fit at the current
+    #          epoch is computed as a dot product with the first row
+    #          of the Vandermonde pseudo-inverse. These weights only
+    #          depend on the epochs offsets, so they are computed once
+    #          and cached (regular sampling reuses a few of them).
+    #
+    #          The buffers logic (fill, shift and resets) is the same
+    #          as the GF_L_Prev/GF_Epoch_Prev lists: logical buffer slot
+    #          i is stored in the ring at (Head + i) % NPoints, so that
+    #          shifting the buffer is just moving the Head.
+
+    # Parameters
+    # ==========
+    # Conf: dict
+    #         Configuration dictionary
+    # NSats: int
+    #         Number of satellites indexes (see SatIdx)
+
+    # Maximum number of cached prediction weights
+    MAX_CACHED_WEIGHTS = 4096
+
+    def __init__(self, Conf, NSats=NSATS):
+        self.NPoints = int(Conf["CYCLE_SLIPS"][CSNPOINTS])
+        self.NEpochs = int(Conf["CYCLE_SLIPS"][CSNEPOCHS])
+        self.Degree = int(Conf["CYCLE_SLIPS"][CSPDEGREE])
+        self.Threshold = Conf["CYCLE_SLIPS"][TH]
+        # Maximum time from the second buffer slot [s] (see update)
+        self.MaxGap = Conf["CS_MAX_GAP"]
+
+        # Ring buffers with previous epochs and GF carrier phase observables
+        self.EpochPrev = np.zeros((NSats, self.NPoints))
+        self.GFPrev = np.zeros((NSats, self.NPoints))
+        # Ring position of the first buffer slot
+        self.Head = np.zeros(NSats, dtype=np.int64)
+        # Number of filled buffer slots
+        self.BuffIdx = np.zeros(NSats, dtype=np.int64)
+        # Number of cycle slips flags since last reset
+        self.FlagCount = np.zeros(NSats, dtype=np.int64)
+        # Flag indicating if a cycle slip has been detected
+        self.DetectFlag = np.zeros(NSats, dtype=np.int64)
+
+        self.Weights = {}
+
+    # End of __init__()
+
+    def reset(self, Sats):
+
+        # Purpose: reset the buffers of the satellites
+
+        # Parameters
+        # ==========
+        # Sats: int or np.array
+        #         Satellite index(es)
+
+        self.EpochPrev[Sats] = 0.0
+        self.GFPrev[Sats] = 0.0
+        self.Head[Sats] = 0
+        self.BuffIdx[Sats] = 0
+        self.FlagCount[Sats] = 0
+
+    # End of reset()
+
+    def shiftEpochs(self, Seconds):
+
+        # Purpose: refer the buffered epochs to an origin Seconds later
+        #          (e.g. the next day, see PreproState.shiftDay)
+
+        self.EpochPrev -= Seconds
+
+    # End of shiftEpochs()
+
+    def getWeights(self, Offsets):
+
+        # Purpose: get the weights predicting the polynomial fit at
+        #          the current epoch from the buffer points
+
+        # Parameters
+        # ==========
+        # Offsets: tuple
+        #         Buffer epochs minus current epoch (ring order)
+
+        # Returns
+        # =======
+        # Weights: np.array
+        #         Prediction weights (ring order)
+
+        Weights = self.Weights.get(Offsets)
+
+        if Weights is None:
+            # Scale the offsets to keep the Vandermonde well conditioned
+            # (the constant term, i.e. the prediction, is not affected)
+            Tau = np.array(Offsets)
+            Scale = max(np.abs(Tau).max(), 1.0)
+            Vander = np.vander(Tau / Scale, self.Degree + 1, increasing=True)
+            Weights = np.linalg.pinv(Vander)[0]
+
+            # Cache the weights
+            if len(self.Weights) >= self.MAX_CACHED_WEIGHTS:
+                self.Weights.clear()
+            self.Weights[Offsets] = Weights
+
+        return Weights
+
+    # End of getWeights()
+
+    def update(self, Sat, Sod, GF):
+
+        # Purpose: process the Geometry-Free of one satellite and
+        #          update its cycle slip flag (DetectFlag)
+
+        # Parameters
+        # ==========
+        # Sat: int
+        #         Satellite index
+        # Sod: float
+        #         Second of day
+        # GF: float
+        #         Geometry-Free of phases in cycles
+
+        NPoints = self.NPoints
+        Head = self.Head[Sat]
+        BuffIdx = self.BuffIdx[Sat]
+
+        # Check Data Gaps with respect to the second buffer slot
+        if Sod - self.EpochPrev[Sat, (Head + 1) % NPoints] < self.MaxGap:
+
+            # Cycle slips detection
+            if BuffIdx == NPoints:
+
+                # Predict the GF at the current epoch and compare
+                Weights = self.getWeights(tuple((self.EpochPrev[Sat] - Sod).tolist()))
+                Residual = abs(GF - np.dot(Weights, self.GFPrev[Sat]))
+                self.DetectFlag[Sat] = 1 if Residual > self.Threshold else 0
+
+                # Update CS flags
+                self.FlagCount[Sat] += self.DetectFlag[Sat]
+
+                # If CS flags are full then flag the measurement and reset buffers
+                if self.FlagCount[Sat] == self.NEpochs:
+                    self.DetectFlag[Sat] = 1
+                    self.reset(Sat)
+                    self.EpochPrev[Sat, 0] = Sod
+
+                else:
+                    # Shift the buffers and store last values in the first slot
+                    Head = (Head - 1) % NPoints
+                    self.Head[Sat] = Head
+                    self.EpochPrev[Sat, Head] = Sod
+                    self.GFPrev[Sat, Head] = GF
+
+            else:
+                # If buffer is not full, fill the buffer with new information
+                Slot = (Head + BuffIdx) % NPoints
+                self.EpochPrev[Sat, Slot] = Sod
+                self.GFPrev[Sat, Slot] = GF
+                self.BuffIdx[Sat] = BuffIdx + 1
+
+        else:
+            # Reset the buffers and store the epoch
+            self.reset(Sat)
+            self.EpochPrev[Sat, 0] = Sod
+            self.BuffIdx[Sat] = 1
+
+    # End of update()
+
+    def updateBatch(self, Sats, Sods, GFs):
+
+        # Purpose: process the Geometry-Free of all the satellites of
+        #          one epoch at once and update their cycle slip flags
+        #          (same results as calling update for each of them)
+
+        # Parameters
+        # ==========
+        # Sats: np.array
+        #         Satellites indexes (without repetitions)
+        # Sods: np.array
+        #         Second of day of each satellite
+        # GFs: np.array
+        #         Geometry-Free of phases in cycles of each satellite
+
+        NPoints = self.NPoints
+        Head = self.Head[Sats]
+        BuffIdx = self.BuffIdx[Sats]
+
+        # Check Data Gaps with respect to the second buffer slot
+        NoGap = Sods - self.EpochPrev[Sats, (Head + 1) % NPoints] < self.MaxGap
+        Full = NoGap & (BuffIdx == NPoints)
+        Fill = NoGap & (BuffIdx != NPoints)
+
+        # Cycle slips detection
+        if Full.any():
+            FullSats = Sats[Full]
+            FullSods = Sods[Full]
+            Offsets = self.EpochPrev[FullSats] - FullSods[:, np.newaxis]
+            Weights = np.array([self.getWeights(tuple(Row)) for Row in Offsets.tolist()])
+            Residuals = np.abs(GFs[Full] - np.einsum('ij,ij->i', Weights, self.GFPrev[FullSats]))
+            self.DetectFlag[FullSats] = Residuals > self.Threshold
+            self.FlagCount[FullSats] += self.DetectFlag[FullSats]
+
+            # If CS flags are full then flag the measurement and reset buffers
+            Slip = self.FlagCount[FullSats] == self.NEpochs
+            SlipSats = FullSats[Slip]
+            self.DetectFlag[SlipSats] = 1
+            self.reset(SlipSats)
+            self.EpochPrev[SlipSats, 0] = FullSods[Slip]
+
+            # Otherwise, shift the buffers and store last values in the first slot
+            ShiftSats = FullSats[~Slip]
+            ShiftHead = (Head[Full][~Slip] - 1) % NPoints
+            self.Head[ShiftSats] = ShiftHead
+            self.EpochPrev[ShiftSats, ShiftHead] = FullSods[~Slip]
+            self.GFPrev[ShiftSats, ShiftHead] = GFs[Full][~Slip]
+
+        # If buffer is not full, fill the buffer with new information
+        FillSats = Sats[Fill]
+        Slots = (Head[Fill] + BuffIdx[Fill]) % NPoints
+        self.EpochPrev[FillSats, Slots] = Sods[Fill]
+        self.GFPrev[FillSats, Slots] = GFs[Fill]
+        self.BuffIdx[FillSats] += 1
+
+        # Reset the buffers and store the epoch
+        GapSats = Sats[~NoGap]
+        self.reset(GapSats)
+        self.EpochPrev[GapSats, 0] = Sods[~NoGap]
+        self.BuffIdx[GapSats] = 1
+
+    # End of updateBatch()
+
+# End of class CycleSlipDetector
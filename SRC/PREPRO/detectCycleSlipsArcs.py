@@ -0,0 +1,52 @@
+import numpy as np
+from InputOutput import FLAG
+from PREPRO.cycleSlipDetector import CycleSlipDetector
+
+def detectCycleSlipsArcs(Conf, Prn, Sod, GF, HasCode, Offsets):
+
+    # Purpose: run the cycle slips detector over the phase records of
+    #          a whole day, epoch by epoch, as runPreprocessing does
+
+    # Parameters
+    # ==========
+    # Conf: dict
+    #         Configuration dictionary
+    # Prn: np.array
+    #         Satellite index of each phase record
+    # Sod: np.array
+    #         SoD of each phase record
+    # GF: np.array
+    #         Geometry-free of phases (in cycles) of each phase record
+    # HasCode: np.array
+    #         True if the phase record has a code record in its epoch
+    # Offsets: np.array
+    #         Offsets of each epoch in the phase records
+
+    # Returns
+    # =======
+    # CsFlags: np.array
+    #         Cycle slip flag consumed by the code record of each
+    #         phase record (0 if no code record)
+
+    CsFlags = np.zeros(len(Sod), dtype=np.int8)
+
+    # If check Cycle Slips is not activated
+    if Conf["CYCLE_SLIPS"][FLAG] != 1:
+        return CsFlags
+
+    CycleSlips = CycleSlipDetector(Conf)
+    Prn = Prn.astype(np.int64)
+
+    # Loop over epochs
+    for Start, End in zip(Offsets[:-1].tolist(), Offsets[1:].tolist()):
+        if Start == End:
+            continue
+        Sats = Prn[Start:End]
+        CycleSlips.updateBatch(Sats, Sod[Start:End], GF[Start:End])
+
+        # The code records of the epoch consume the flags
+        Consumed = Sats[HasCode[Start:End]]
+        CsFlags[Start:End] = CycleSlips.DetectFlag[Sats] * HasCode[Start:End]
+        CycleSlips.DetectFlag[Consumed] = 0
+
+    return CsFlags
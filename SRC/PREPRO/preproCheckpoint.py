@@ -0,0 +1,176 @@
+import sys, os
+import pickle
+import threading
+from InputOutput import ObsIdxC, PREPRO_CHUNK_SECONDS, getPreproCacheParams
+from COMMON.Profiling import profileStage
+
+class PreproCheckpoint:
+
+    # Purpose: save periodic checkpoints of the preprocessing of one
+    #          day, so that a run that died can be resumed from the
+    #          last one instead of reprocessing the whole day.
+    #
+    #          A checkpoint is saved when the PREPRO OBS file writer
+    #          ends a chunk (see PreproFileWriter.endChunk): it holds
+    #          the preprocessing state (PreproState) after the last
+    #          epoch of the chunk and the positions of the PREPRO
+    #          outputs written up to that epoch. The state is copied
+    #          when the first epoch of the next chunk is read (see
+    #          checkpointEpochs), because the writer may run behind
+    #          the preprocessing in another thread.
+    #
+    #          When resuming, the outputs are truncated at the saved
+    #          positions and the epochs up to the saved one are skipped,
+    #          giving the same outputs as an uninterrupted run
+
+    # Parameters
+    # ==========
+    # Path: str
+    #         Path to checkpoint file
+    # Conf: dict
+    #         Configuration dictionary (a checkpoint is only resumed
+    #         with the same preprocessing parameters, see
+    #         getPreproCacheParams)
+    # ChunkSeconds: int
+    #         Length of the PREPRO OBS file chunks [s]
+
+    def __init__(self, Path, Conf, ChunkSeconds=PREPRO_CHUNK_SECONDS):
+        self.Path = Path
+        self.Conf = repr(getPreproCacheParams(Conf))
+        self.BinOut = Conf["PREPRO_OUT"] == 2
+        self.ChunkSeconds = ChunkSeconds
+
+        # Chunk and epoch of the last epoch read
+        self.Chunk = None
+        self.Sod = None
+
+        # Copies of the state at the end of each chunk, until saved
+        self.States = {}
+        self.Lock = threading.Lock()
+
+        # Last epoch processed and outputs positions of the resumed
+        # checkpoint (see load)
+        self.ResumeSod = None
+        self.Positions = None
+
+    # End of __init__()
+
+    def load(self):
+
+        # Purpose: load the checkpoint to resume the day
+
+        # Returns
+        # =======
+        # PrevPreproObsInfo: PreproState
+        #         Preprocessing state after the last epoch processed
+        #         (None if there is no checkpoint, or it was saved with
+        #         other preprocessing parameters or without the binary
+        #         outputs now requested)
+
+        if not os.path.isfile(self.Path):
+            return None
+
+        with open(self.Path, 'rb') as f:
+            Checkpoint = pickle.load(f)
+
+        if Checkpoint["CONF"] != self.Conf:
+            sys.stderr.write("WARNING: Checkpoint %s was saved with other "
+            "preprocessing parameters and is discarded\n" % self.Path)
+            return None
+
+        # The binary outputs cannot be resumed if they were not written
+        if self.BinOut and Checkpoint["POSITIONS"]["RECORDS"] is None:
+            sys.stderr.write("WARNING: Checkpoint %s was saved without binary "
+            "outputs and is discarded\n" % self.Path)
+            return None
+
+        # Display Message
+        print("INFO: Resuming from checkpoint: %s (SoD %d)..." %
+        (self.Path, Checkpoint["SOD"]))
+
+        self.ResumeSod = Checkpoint["SOD"]
+        self.Positions = Checkpoint["POSITIONS"]
+
+        return pickle.loads(Checkpoint["STATE"])
+
+    # End of load()
+
+    def checkpointEpochs(self, ObsStream, PrevPreproObsInfo):
+
+        # Purpose: copy the preprocessing state at the end of each chunk
+        #          of epochs of a stream (and skip the epochs processed
+        #          before resuming)
+
+        # Parameters
+        # ==========
+        # ObsStream: iterable
+        #         OBS Codes and Phases of each epoch (see iterObsEpochs)
+        # PrevPreproObsInfo: PreproState
+        #         Preprocessing state, updated by the next stage
+
+        # Returns
+        # =======
+        # ObsInfo: generator
+        #         OBS Codes and Phases of each epoch to process
+
+        for ObsInfo in ObsStream:
+            Sod = (ObsInfo[0] or ObsInfo[1])[0][ObsIdxC["SOD"]]
+            if self.ResumeSod is not None and Sod <= self.ResumeSod:
+                continue
+
+            # When the epoch starts a new chunk, the state is the one
+            # after the last epoch of the previous chunk
+            Chunk = int(Sod // self.ChunkSeconds)
+            if self.Chunk is not None and Chunk != self.Chunk:
+                with profileStage("CHECKPOINT"):
+                    State = pickle.dumps(PrevPreproObsInfo, pickle.HIGHEST_PROTOCOL)
+                with self.Lock:
+                    self.States[self.Chunk] = (self.Sod, State)
+            self.Chunk = Chunk
+            self.Sod = Sod
+
+            yield ObsInfo
+
+    # End of checkpointEpochs()
+
+    def save(self, Chunk, Positions):
+
+        # Purpose: save the checkpoint of the end of a chunk, once its
+        #          outputs are written
+
+        # Parameters
+        # ==========
+        # Chunk: int
+        #         Chunk written
+        # Positions: dict
+        #         Positions of the outputs (see PreproFileWriter.getPositions)
+
+        with self.Lock:
+            Snapshot = self.States.get(Chunk)
+            for Old in [Key for Key in self.States if Key <= Chunk]:
+                del self.States[Old]
+
+        # If the chunk is not ended yet (e.g. the last one)
+        if Snapshot is None:
+            return
+
+        Sod, State = Snapshot
+        with profileStage("CHECKPOINT"):
+            # Replace the previous checkpoint only when the new one is complete
+            with open(self.Path + ".tmp", 'wb') as f:
+                pickle.dump({"CONF": self.Conf, "SOD": Sod, "STATE": State,
+                    "POSITIONS": Positions}, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(self.Path + ".tmp", self.Path)
+
+    # End of save()
+
+    def remove(self):
+
+        # Purpose: remove the checkpoint once the day is completed
+
+        if os.path.isfile(self.Path):
+            os.remove(self.Path)
+
+    # End of remove()
+
+# End of class PreproCheckpoint
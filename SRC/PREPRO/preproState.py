@@ -0,0 +1,133 @@
+import sys, os
+import pickle
+import numpy as np
+from COMMON import GnssConstants as Const
+from InputOutput import NSATS, getPreproCacheParams
+from PREPRO.cycleSlipDetector import CycleSlipDetector
+
+class PreproState:
+
+    # Purpose: store the preprocessing state of the previous epoch of
+    #          all the satellites, with one array per field indexed by
+    #          satellite index (see SatIdx):
+    #          PrevPreproObsInfo.PrevC1[SatIdx["G01"]]
+
+    # Parameters
+    # ==========
+    # Conf: dict
+    #         Configuration dictionary
+    # NSats: int
+    #         Number of satellites indexes
+
+    def __init__(self, Conf, NSats=NSATS):
+        self.PrevEpoch = np.full(NSats, float(Const.S_IN_D))     # Previous SoD
+
+        self.PrevElev = np.full((NSats, 2), Const.NAN)           # Previous two elevations
+
+        self.ResetHatchFilter = np.ones(NSats, dtype=bool)       # Flag to reset Hatch filter
+        self.Ksmooth = np.zeros(NSats)                           # Hatch filter K
+        self.PrevSmooth = np.zeros(NSats)                        # Previous Smooth Observable
+        self.IF_P_Prev = np.zeros(NSats)                         # Previous IF of the phases
+
+        self.PrevL1 = np.full(NSats, Const.NAN)                  # Previous L1
+        self.PrevPhaseRateL1 = np.full(NSats, Const.NAN)         # Previous Phase Rate
+        self.PrevC1 = np.full(NSats, Const.NAN)                  # Previous C1
+        self.PrevRangeRateL1 = np.full(NSats, Const.NAN)         # Previous Code Rate
+
+        self.PrevL2 = np.full(NSats, Const.NAN)                  # Previous L2
+        self.PrevPhaseRateL2 = np.full(NSats, Const.NAN)         # Previous Phase Rate
+        self.PrevC2 = np.full(NSats, Const.NAN)                  # Previous C2
+        self.PrevRangeRateL2 = np.full(NSats, Const.NAN)         # Previous Code Rate
+
+        self.CycleSlips = CycleSlipDetector(Conf, NSats)         # GF buffers and CS flags
+
+    # End of __init__()
+
+    def shiftDay(self, Seconds=Const.S_IN_D):
+
+        # Purpose: refer the epochs of the state to the next day, so
+        #          that the satellites arcs continue across midnight
+        #          (the SoD rolls over from 86399 to 0). The satellites
+        #          never seen keep their initial PrevEpoch
+
+        # Parameters
+        # ==========
+        # Seconds: int
+        #         Seconds between the origins of the epochs
+
+        Seen = self.PrevEpoch < Const.S_IN_D
+        self.PrevEpoch[Seen] -= Seconds
+        self.CycleSlips.shiftEpochs(Seconds)
+
+    # End of shiftDay()
+
+# End of class PreproState
+
+
+def savePreproState(StateFile, Conf, PrevPreproObsInfo):
+
+    # Purpose: save the preprocessing state at the end of a day, to
+    #          continue the next day from it (see loadPreproState)
+
+    # Parameters
+    # ==========
+    # StateFile: str
+    #         Path to state file
+    # Conf: dict
+    #         Configuration dictionary (the state is only continued
+    #         with the same preprocessing parameters, see
+    #         getPreproCacheParams)
+    # PrevPreproObsInfo: PreproState
+    #         Preprocessing state after the last epoch of the day
+
+    # Create output directory, if needed
+    if not os.path.exists(os.path.dirname(StateFile)):
+        os.makedirs(os.path.dirname(StateFile))
+
+    with open(StateFile + ".tmp", 'wb') as f:
+        pickle.dump({"CONF": repr(getPreproCacheParams(Conf)), "STATE": PrevPreproObsInfo}, f,
+            pickle.HIGHEST_PROTOCOL)
+    os.replace(StateFile + ".tmp", StateFile)
+
+# End of savePreproState()
+
+
+def loadPreproState(StateFile, Conf):
+
+    # Purpose: load the preprocessing state at the end of the previous
+    #          day and refer it to the current day (see shiftDay)
+
+    # Parameters
+    # ==========
+    # StateFile: str
+    #         Path to state file of the previous day
+    # Conf: dict
+    #         Configuration dictionary
+
+    # Returns
+    # =======
+    # PrevPreproObsInfo: PreproState
+    #         Preprocessing state at the start of the day (None if the
+    #         previous day was not processed with the same
+    #         preprocessing parameters)
+
+    if not os.path.isfile(StateFile):
+        return None
+
+    with open(StateFile, 'rb') as f:
+        SavedState = pickle.load(f)
+
+    if SavedState["CONF"] != repr(getPreproCacheParams(Conf)):
+        sys.stderr.write("WARNING: State %s was saved with other "
+        "preprocessing parameters and is discarded\n" % StateFile)
+        return None
+
+    # Display Message
+    print("INFO: Continuing from state: %s..." % StateFile)
+
+    PrevPreproObsInfo = SavedState["STATE"]
+    PrevPreproObsInfo.shiftDay()
+
+    return PrevPreproObsInfo
+
+# End of loadPreproState()
@@ -1,48 +1,48 @@
-def rejectMeasurement(PreproObs, Criterion):
-    PreproObs["Valid"] = 0
+def rejectMeasurement(PreproObs, Criterion, Mask):
+    PreproObs["Valid"][Mask] = 0
     if Criterion == "RCVR_MASK":
-        PreproObs["RejectionCause"] = 1
+        PreproObs["RejectionCause"][Mask] = 1
         
     elif Criterion == "MAX_DATA_GAP":
-        PreproObs["RejectionCause"] = 2
+        PreproObs["RejectionCause"][Mask] = 2
         
     elif Criterion == "MIN_SNR_F1":
-        PreproObs["RejectionCause"] = 3
+        PreproObs["RejectionCause"][Mask] = 3
         
     elif Criterion == "MIN_SNR_F2":
-        PreproObs["RejectionCause"] = 4
+        PreproObs["RejectionCause"][Mask] = 4
         
     elif Criterion == "MIN_SNR_F2":
-        PreproObs["RejectionCause"] = 5
+        PreproObs["RejectionCause"][Mask] = 5
         
     elif Criterion == "MIN_SNR_F2":
-        PreproObs["RejectionCause"] = 6
+        PreproObs["RejectionCause"][Mask] = 6
         
     elif Criterion == "MAX_PHASE_RATE_F1":
-        PreproObs["RejectionCause"] = 7
+        PreproObs["RejectionCause"][Mask] = 7
         
     elif Criterion == "MAX_PHASE_RATE_F2":
-        PreproObs["RejectionCause"] = 8
+        PreproObs["RejectionCause"][Mask] = 8
         
     elif Criterion == "MAX_PHASE_RATE_STEP_F1":
-        PreproObs["RejectionCause"] = 9
+        PreproObs["RejectionCause"][Mask] = 9
         
     elif Criterion == "MAX_PHASE_RATE_STEP_F2":
-        PreproObs["RejectionCause"] = 10
+        PreproObs["RejectionCause"][Mask] = 10
         
     elif Criterion == "MAX_RANGE_RATE_F1":
-        PreproObs["RejectionCause"] = 11
+        PreproObs["RejectionCause"][Mask] = 11
         
     elif Criterion == "MAX_RANGE_RATE_F2":
-        PreproObs["RejectionCause"] = 12
+        PreproObs["RejectionCause"][Mask] = 12
         
     elif Criterion == "MAX_RANGE_RATE_STEP_F1":
-        PreproObs["RejectionCause"] = 13
+        PreproObs["RejectionCause"][Mask] = 13
         
     elif Criterion == "MAX_RANGE_RATE_STEP_F2":
-        PreproObs["RejectionCause"] = 14
+        PreproObs["RejectionCause"][Mask] = 14
 
     elif Criterion == "CYCLE_SLIPS":
-        PreproObs["RejectionCause"] = 15
+        PreproObs["RejectionCause"][Mask] = 15
 
     return PreproObs
\ No newline at end of file
@@ -1,38 +1,25 @@
 from COMMON import GnssConstants as Const
-from InputOutput import CSNEPOCHS, CSNPOINTS
 
-def resetPrevPreproObsInfo(Conf, PreproObs, PrevPreproObsInfo, SatLabel, condition):
-    
-    # access to PhaseObs or CodeObs Prev data and modify it
-    if condition == 0:
-        # Update PhaseObs relevant data
-        PrevPreproObsInfo[SatLabel]["CycleSlipBuffIdx"] = 0
-        PrevPreproObsInfo[SatLabel]["CycleSlipFlagIdx"] = 0
-        PrevPreproObsInfo[SatLabel]["GF_L_Prev"] = [0.0] * int(Conf["CYCLE_SLIPS"][CSNPOINTS])
-        PrevPreproObsInfo[SatLabel]["GF_Epoch_Prev"] = [0.0] * int(Conf["CYCLE_SLIPS"][CSNPOINTS])
-        PrevPreproObsInfo[SatLabel]["CycleSlipFlags"] = [0.0] * int(Conf["CYCLE_SLIPS"][CSNEPOCHS])
+def resetPrevPreproObsInfo(PrevPreproObsInfo, Sats, Sods):
 
-        return PrevPreproObsInfo[SatLabel]
+    # Reset the code state of the satellites (mask writes)
+    PrevPreproObsInfo.PrevEpoch[Sats] = Sods
 
-    elif condition == 1:
-        # Update CodeObs relevant data
-        PrevPreproObsInfo[SatLabel]["PrevEpoch"] = PreproObs["Sod"]
+    PrevPreproObsInfo.PrevElev[Sats] = Const.NAN
 
-        PrevPreproObsInfo[SatLabel]["PrevElev"] = [Const.NAN] * 2
+    PrevPreproObsInfo.ResetHatchFilter[Sats] = True
+    PrevPreproObsInfo.Ksmooth[Sats] = 0
+    PrevPreproObsInfo.PrevSmooth[Sats] = 0
+    PrevPreproObsInfo.IF_P_Prev[Sats] = 0
 
-        PrevPreproObsInfo[SatLabel]["ResetHatchFilter"] = 1
-        PrevPreproObsInfo[SatLabel]["Ksmooth"] = 0
-        PrevPreproObsInfo[SatLabel]["PrevSmooth"] = 0
-        PrevPreproObsInfo[SatLabel]["IF_P_Prev"] = 0
+    PrevPreproObsInfo.PrevL1[Sats] = Const.NAN
+    PrevPreproObsInfo.PrevPhaseRateL1[Sats] = Const.NAN
+    PrevPreproObsInfo.PrevC1[Sats] = Const.NAN
+    PrevPreproObsInfo.PrevRangeRateL1[Sats] = Const.NAN
 
-        PrevPreproObsInfo[SatLabel]["PrevL1"] = Const.NAN
-        PrevPreproObsInfo[SatLabel]["PrevPhaseRateL1"] = Const.NAN
-        PrevPreproObsInfo[SatLabel]["PrevC1"] = Const.NAN
-        PrevPreproObsInfo[SatLabel]["PrevRangeRateL1"] = Const.NAN
+    PrevPreproObsInfo.PrevL2[Sats] = Const.NAN
+    PrevPreproObsInfo.PrevPhaseRateL2[Sats] = Const.NAN
+    PrevPreproObsInfo.PrevC2[Sats] = Const.NAN
+    PrevPreproObsInfo.PrevRangeRateL2[Sats] = Const.NAN
 
-        PrevPreproObsInfo[SatLabel]["PrevL2"] = Const.NAN
-        PrevPreproObsInfo[SatLabel]["PrevPhaseRateL2"] = Const.NAN
-        PrevPreproObsInfo[SatLabel]["PrevC2"] = Const.NAN
-        PrevPreproObsInfo[SatLabel]["PrevRangeRateL2"] = Const.NAN
-
-        return PrevPreproObsInfo[SatLabel]
\ No newline at end of file
+    return PrevPreproObsInfo
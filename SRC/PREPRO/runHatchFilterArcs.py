@@ -0,0 +1,58 @@
+def runHatchFilterArcs(Conf, Dt, IF_C, IF_P, Reset):
+
+    # Purpose: run the Hatch filter over the records of the
+    #          satellites arcs (records sorted by satellite and time)
+
+    # Parameters
+    # ==========
+    # Conf: dict
+    #         Configuration dictionary
+    # Dt: list
+    #         Time since the previous record of the satellite
+    # IF_C: list
+    #         Iono-free of codes of each record
+    # IF_P: list
+    #         Iono-free of phases of each record
+    # Reset: list
+    #         True if the filter is reset at the record
+
+    # Returns
+    # =======
+    # SmoothIF: list
+    #         Smoothed Iono-free of codes of each record
+    # Ksmooth: list
+    #         Hatch filter K after each record
+
+    HatchTime = Conf["HATCH_TIME"]
+
+    SmoothIF = [0.0] * len(Reset)
+    Ksmooth = [0] * len(Reset)
+    K = 0
+    PrevSmooth = 0
+    IF_P_Prev = 0
+
+    # Loop over records
+    for i, ResetI in enumerate(Reset):
+        if ResetI:
+            # Reset Hatch filter (the first measurement accounts for
+            # one sampling period)
+            K = Conf["SAMPLING_RATE"]
+            Smooth = IF_C[i]
+
+        else:
+            # Calculate Smoothing time
+            SmoothingTime = K + Dt[i]
+            if K >= HatchTime:
+                SmoothingTime = HatchTime
+
+            # Hatch filter
+            Alpha = Dt[i] / SmoothingTime
+            Smooth = Alpha * IF_C[i] + (1 - Alpha) * (PrevSmooth + (IF_P[i] - IF_P_Prev))
+            K = K + Dt[i]
+
+        PrevSmooth = Smooth
+        IF_P_Prev = IF_P[i]
+        SmoothIF[i] = Smooth
+        Ksmooth[i] = K
+
+    return SmoothIF, Ksmooth
@@ -0,0 +1,60 @@
+import numpy as np
+from InputOutput import NSATS
+from InputOutput import selectObsRecords
+
+def splitObsShards(Window, NShards):
+
+    # Purpose: split the OBS data of a time window (see splitObsWindows)
+    #          in shards of satellites that can be preprocessed
+    #          independently, as the preprocessing state of each
+    #          satellite only depends on its own records.
+    #
+    #          The satellites are assigned from the one with most
+    #          records to the shard with fewest records so far, so that
+    #          the shards have about the same number of records
+
+    # Parameters
+    # ==========
+    # Window: dict
+    #         Time window (see splitObsWindows)
+    # NShards: int
+    #         Number of shards
+
+    # Returns
+    # =======
+    # Shards: list
+    #         Time window of each shard, with the records of its
+    #         satellites (empty shards are dropped)
+
+    ObsData = Window["OBS"]
+    CodesPrn = ObsData["C"]["PRN"].astype(np.int64)
+    PhasePrn = ObsData["P"]["PRN"].astype(np.int64)
+
+    # Number of records of each satellite
+    Counts = np.bincount(np.concatenate((CodesPrn, PhasePrn)), minlength=NSATS)
+
+    # Assign the satellites to the shards
+    Loads = np.zeros(NShards, dtype=np.int64)
+    SatShard = np.full(NSATS, -1)
+    for Sat in np.argsort(-Counts, kind='stable')[:np.count_nonzero(Counts)]:
+        Shard = np.argmin(Loads)
+        SatShard[Sat] = Shard
+        Loads[Shard] += Counts[Sat]
+
+    # Output code records of the window (not in the warm-up)
+    Output = ObsData["C"]["SOD"] >= Window["SOD_START"]
+
+    Shards = []
+    for Shard in range(NShards):
+        CodesMask = SatShard[CodesPrn] == Shard
+        PhaseMask = SatShard[PhasePrn] == Shard
+        if not CodesMask.any() and not PhaseMask.any():
+            continue
+
+        ShardWindow = dict(Window)
+        ShardWindow["OBS"] = selectObsRecords(ObsData, CodesMask, PhaseMask)
+        ShardWindow["CODES"] = Window["CODES"][CodesMask[Output]]
+        ShardWindow["WARMUP"] = int(np.sum(CodesMask & ~Output))
+        Shards.append(ShardWindow)
+
+    return Shards
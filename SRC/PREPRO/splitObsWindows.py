@@ -0,0 +1,101 @@
+import numpy as np
+from COMMON import GnssConstants as Const
+from InputOutput import NSATS
+from InputOutput import selectObsRecords
+
+def splitObsWindows(Conf, ObsData, NWindows):
+
+    # Purpose: split the OBS data of a day in time windows that can be
+    #          preprocessed independently (see runPreprocessingWindow).
+    #
+    #          Each window starts early with the warm-up records of the
+    #          satellites tracked at its start: from the start of their
+    #          arc, so that the preprocessing state of each satellite
+    #          (Hatch filter, rates and cycle slips buffers) is the same
+    #          as in the serial run when the window starts. An arc starts
+    #          at the first record of the satellite or after a data gap
+    #          longer than MAX_DATA_GAP, which resets the whole state of
+    #          the satellite (if the record before the gap has a code,
+    #          which consumes the last cycle slip flag)
+
+    # Parameters
+    # ==========
+    # Conf: dict
+    #         Configuration dictionary
+    # ObsData: dict
+    #         Columnar OBS data of the day (see readObsFile)
+    # NWindows: int
+    #         Number of windows (with about the same number of codes)
+
+    # Returns
+    # =======
+    # Windows: list
+    #         Dictionary of each window, with its SoD range [SOD_START,
+    #         SOD_END), its OBS data (with the warm-up records), the
+    #         previous code epoch of each satellite (PREV_EPOCH, see
+    #         PreproState), the indexes of its output code records in
+    #         the day (CODES) and the number of warm-up records (WARMUP)
+
+    CodesObs = ObsData["C"]
+    PhaseObs = ObsData["P"]
+    NEpochs = len(ObsData["EPOCHS"])
+
+    # Epoch of each record
+    EpochsIdx = np.arange(NEpochs)
+    CodesEpoch = np.repeat(EpochsIdx, np.diff(ObsData["C_IDX"]))
+    PhaseEpoch = np.repeat(EpochsIdx, np.diff(ObsData["P_IDX"]))
+
+    # Windows limits: epochs splitting the codes in equal parts
+    Limits = [-np.inf, np.inf]
+    if NEpochs > 1:
+        Bounds = np.searchsorted(ObsData["C_IDX"],
+            np.arange(1, NWindows) * len(CodesObs["SOD"]) / NWindows)
+        Bounds = np.unique(np.clip(Bounds, 1, NEpochs - 1))
+        Limits = [-np.inf] + ObsData["EPOCHS"][Bounds].tolist() + [np.inf]
+
+    # Records of each satellite and epoch, sorted by satellite and time
+    # (an epoch may have the code and the phase records)
+    Keys = np.concatenate((CodesObs["PRN"].astype(np.int64) * NEpochs + CodesEpoch,
+        PhaseObs["PRN"].astype(np.int64) * NEpochs + PhaseEpoch))
+    Keys, Inverse = np.unique(Keys, return_inverse=True)
+    HasCode = np.zeros(len(Keys), dtype=bool)
+    HasCode[Inverse[:len(CodesEpoch)]] = True
+    Sat = Keys // NEpochs
+    Sod = ObsData["EPOCHS"][Keys % NEpochs]
+
+    # Start of the arc of each record
+    ArcStart = np.ones(len(Keys), dtype=bool)
+    ArcStart[1:] = (Sat[1:] == Sat[:-1]) & \
+        (Sod[1:] - Sod[:-1] > Conf["MAX_DATA_GAP"][1]) & HasCode[:-1]
+    ArcStart[1:] |= Sat[1:] != Sat[:-1]
+    ArcIdx = np.maximum.accumulate(np.where(ArcStart, np.arange(len(Keys)), 0))
+
+    # Previous code epoch of the arc start (none for the first record)
+    PrevIdx = ArcIdx - 1
+    First = (ArcIdx == 0) | (Sat[np.maximum(PrevIdx, 0)] != Sat)
+    PrevEpoch = np.where(First, float(Const.S_IN_D), Sod[np.maximum(PrevIdx, 0)])
+
+    Windows = []
+    for SodStart, SodEnd in zip(Limits[:-1], Limits[1:]):
+        # First record of each satellite in the window
+        InWindow = np.flatnonzero((Sod >= SodStart) & (Sod < SodEnd))
+        _, FirstRecords = np.unique(Sat[InWindow], return_index=True)
+        FirstRecords = InWindow[FirstRecords]
+
+        # Start of the records of each satellite
+        SatStart = np.full(NSATS, np.inf)
+        SatStart[Sat[FirstRecords]] = Sod[ArcIdx[FirstRecords]]
+        SatPrevEpoch = np.full(NSATS, float(Const.S_IN_D))
+        SatPrevEpoch[Sat[FirstRecords]] = PrevEpoch[FirstRecords]
+
+        # Records of the window
+        CodesMask = (CodesObs["SOD"] >= SatStart[CodesObs["PRN"]]) & (CodesObs["SOD"] < SodEnd)
+        PhaseMask = (PhaseObs["SOD"] >= SatStart[PhaseObs["PRN"]]) & (PhaseObs["SOD"] < SodEnd)
+
+        Windows.append({"SOD_START": SodStart, "SOD_END": SodEnd,
+            "OBS": selectObsRecords(ObsData, CodesMask, PhaseMask),
+            "PREV_EPOCH": SatPrevEpoch,
+            "CODES": np.flatnonzero(CodesMask & (CodesObs["SOD"] >= SodStart)),
+            "WARMUP": int(np.sum(CodesMask & (CodesObs["SOD"] < SodStart)))})
+
+    return Windows
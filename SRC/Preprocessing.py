@@ -25,9 +25,14 @@ Common = os.path.dirname(os.path.dirname(
     os.path.abspath(sys.argv[0]))) + '/COMMON'
 sys.path.insert(0, Common)
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from operator import itemgetter
 from COMMON import GnssConstants as Const
 from InputOutput import ObsIdxC, ObsIdxP, REJECTION_CAUSE
 from InputOutput import FLAG, VALUE, TH, CSNEPOCHS, CSNPOINTS, CSPDEGREE
+from InputOutput import PreproIdx, PreproObsKeys, SatIdx, SatLabels
+from InputOutput import getObsEpoch
 import numpy as np
 
 from PREPRO.resetPrevPrproObsInfo import resetPrevPreproObsInfo
@@ -35,6 +40,20 @@ from PREPRO.rejectMeasurement import rejectMeasurement
 from PREPRO.buildIonoFree import buildIonoFree
 from PREPRO.computePhaseRate import computePhaseRate, computePhaseRateStep
 from PREPRO.computeCodeRate import computeCodeRate, computeCodeRateStep
+from PREPRO.detectCycleSlipsArcs import detectCycleSlipsArcs
+from PREPRO.runHatchFilterArcs import runHatchFilterArcs
+from PREPRO.splitObsWindows import splitObsWindows
+from PREPRO.splitObsShards import splitObsShards
+from PREPRO.preproState import PreproState
+from COMMON.Profiling import profileLaps, profileStage
+
+# Wavelengths and Gamma per satellite index
+SatWaveF1 = np.array([Const.GPS_L1_WAVE if Label[0] == 'G' else Const.GAL_E1_WAVE
+    for Label in SatLabels])
+SatWaveF2 = np.array([Const.GPS_L2_WAVE if Label[0] == 'G' else Const.GAL_E5A_WAVE
+    for Label in SatLabels])
+SatGammaF1F2 = np.array([Const.GPS_GAMMA_L1L2 if Label[0] == 'G' else Const.GAL_GAMMA_E1E5A
+    for Label in SatLabels])
 
 
 # Preprocessing internal functions
@@ -63,15 +82,18 @@ def runPreprocessing(Conf, ObsInfo, PrevPreproObsInfo):
 
     #         * Filtering/Smoothing of Code-Phase Measurements with a Hatch filter 
 
+    #          All the satellites of the epoch are processed at once
+    #          with array operations over the satellites indexes
+
     # Parameters
     # ==========
     # Conf: dict
     #         Configuration dictionary
     # ObsInfo: list
     #         OBS info for current epoch
-    # PrevPreproObsInfo: dict
-    #         Preprocessed observations for previous epoch per sat
-    #         PrevPreproObsInfo["G01"]["C1"]
+    # PrevPreproObsInfo: PreproState
+    #         Preprocessing state of the previous epoch per sat
+    #         PrevPreproObsInfo.PrevC1[SatIdx["G01"]]
 
     # Returns
     # =======
@@ -79,430 +101,605 @@ def runPreprocessing(Conf, ObsInfo, PrevPreproObsInfo):
     #         Preprocessed observations for current epoch per sat
     #         PreproObsInfo["G01"]["C1"]
     
+    # Profile the preprocessing stages (if activated)
+    Laps = profileLaps()
+
     # Get Observations
     CodesObs = ObsInfo[0]
     PhaseObs = ObsInfo[1]
 
-    # Stablish a general condition for CodeObs y PhaseObs
-    # 0 for PhaseObs and 1 for CodeObs
-    condition = 0
-
     # CHALLENGE:
     # if check Cycle Slips activated
     if (Conf["CYCLE_SLIPS"][FLAG] == 1):
 
-        # Loop over Phase measurements
-        for iObs, SatPhaseObs in enumerate(PhaseObs):
-            # Get SOD
-            Sod = float(SatPhaseObs[ObsIdxP["SOD"]])
-
-            # Get satellite label
-            SatLabel = SatPhaseObs[ObsIdxP["PRN"]]
-            
-            # Compute Geometry-Free in cycles
-            # The geometry free is the difference between Phase1 and Phase2 measurements
-            GF =  float(SatPhaseObs[ObsIdxP["L1"]]) - float(SatPhaseObs[ObsIdxP["L2"]])
-
-            # Check Data Gaps 
-            # If there is a data gap we need to reset the buffers 
-            if Sod - PrevPreproObsInfo[SatLabel]["GF_Epoch_Prev"][1] < Conf["MAX_DATA_GAP"][1]:
-
-                # Cycle slips detection
-                if PrevPreproObsInfo[SatLabel]["CycleSlipBuffIdx"] == Conf["CYCLE_SLIPS"][CSNPOINTS]:
-                    
-                    # Fit a polynomial using previous GF measurements to compare the predicted value
-                    # with the observed one
-                    # --------------------------------------------------------------------------------------------------------------------
-                    polynom = np.polynomial.polynomial.polyfit(PrevPreproObsInfo[SatLabel]["GF_Epoch_Prev"],
-                                                            PrevPreproObsInfo[SatLabel]["GF_L_Prev"], 
-                                                            int(Conf["CYCLE_SLIPS"][CSPDEGREE]))
-                    # Predict the next value
-                    targetPred = np.polynomial.polynomial.polyval(Sod, polynom)
-
-                    # Calculate the residual between the predicted and observed
-                    residual = abs(GF - targetPred)
-
-                    # Compute CS flag
-                    PrevPreproObsInfo[SatLabel]["CycleSlipDetectFlag"] = 1 if residual > Conf["CYCLE_SLIPS"][TH] else 0
-
-                    # Update CS flag buffer
-                    if PrevPreproObsInfo[SatLabel]["CycleSlipDetectFlag"] == 1:
-                        # Shift the buffer for CS flags and store last value as a detected flag
-                        PrevPreproObsInfo[SatLabel]["CycleSlipFlags"][PrevPreproObsInfo[SatLabel]["CycleSlipFlagIdx"]] = 1
-                        PrevPreproObsInfo[SatLabel]["CycleSlipFlagIdx"] += 1 % int(Conf["CYCLE_SLIPS"][CSNEPOCHS])
-
-                    # If CS is full then flag the measurement
-                    if sum(PrevPreproObsInfo[SatLabel]["CycleSlipFlags"]) == Conf["CYCLE_SLIPS"][CSNEPOCHS]:
-                        
-                        # Flag the measurement
-                        PrevPreproObsInfo[SatLabel]["CycleSlipDetectFlag"] = 1
-
-                        # Reset PrevpreproObsInfo dict to default values and Buffers
-                        PrevPreproObsInfo[SatLabel] = resetPrevPreproObsInfo(Conf, PhaseObs, PrevPreproObsInfo, SatLabel, condition)
-                        PrevPreproObsInfo[SatLabel]["GF_Epoch_Prev"][0] = Sod
-
-                        # If threshold was exceeded, don't update the buffer with the new observation
-                    else:
-                        # Update Buffers
-                        # Shift the buffer for GF and store last value
-                        PrevPreproObsInfo[SatLabel]["GF_L_Prev"][1:] = PrevPreproObsInfo[SatLabel]["GF_L_Prev"][:-1]
-                        PrevPreproObsInfo[SatLabel]["GF_L_Prev"][0] = GF
-
-                        # Shift the buffer for SoD and store last value
-                        PrevPreproObsInfo[SatLabel]["GF_Epoch_Prev"][1:] = PrevPreproObsInfo[SatLabel]["GF_Epoch_Prev"][:-1]
-                        PrevPreproObsInfo[SatLabel]["GF_Epoch_Prev"][0] = Sod
-                else:
-                    # If buffer is not full, fill the buffer with new information
-                    PrevPreproObsInfo[SatLabel]["GF_L_Prev"][PrevPreproObsInfo[SatLabel]["CycleSlipBuffIdx"]] = GF
-                    PrevPreproObsInfo[SatLabel]["GF_Epoch_Prev"][PrevPreproObsInfo[SatLabel]["CycleSlipBuffIdx"]] = Sod
-                    PrevPreproObsInfo[SatLabel]["CycleSlipBuffIdx"] += 1
-            else:
-                # Reset the buffer and store the epoch
-                PrevPreproObsInfo[SatLabel] = resetPrevPreproObsInfo(Conf, PhaseObs, PrevPreproObsInfo, SatLabel, condition)
-                PrevPreproObsInfo[SatLabel]["GF_Epoch_Prev"][PrevPreproObsInfo[SatLabel]["CycleSlipBuffIdx"]] = Sod
-                PrevPreproObsInfo[SatLabel]["CycleSlipBuffIdx"] += 1
-
-        # end of for iObs, SatPhaseObs in enumerate(PhaseObs):
-    # End of if (Conf["CYCLE_SLIPS"][FLAG] == 1)
+        # Run the cycle slips detector over all the Phase measurements at once
+        # The geometry free is the difference between Phase1 and Phase2 measurements
+        PrevPreproObsInfo.CycleSlips.updateBatch(
+            np.array([SatIdx[SatPhaseObs[ObsIdxP["PRN"]]] for SatPhaseObs in PhaseObs], dtype=np.int64),
+            np.array([float(SatPhaseObs[ObsIdxP["SOD"]]) for SatPhaseObs in PhaseObs]),
+            np.array([float(SatPhaseObs[ObsIdxP["L1"]]) - float(SatPhaseObs[ObsIdxP["L2"]]) 
+            for SatPhaseObs in PhaseObs]))
 
+    # End of if (Conf["CYCLE_SLIPS"][FLAG] == 1)
+    Laps.lap("CYCLE_SLIPS")
 
-    # Initialize output
-    PreproObsInfo = OrderedDict({})
-    
-    # Once the loop for PhaseObs is finished update the condition to one so the correct rejection is applied
-    condition = 1
 
-    # Loop over Code measurements
-    for iObs, SatCodesObs in enumerate(CodesObs):
+    # Get the Phases of each Code measurement (the records are joined
+    # by the reader, see joinObsRecords)
+    ObsLabels = []
+    SatRows = []
+    for SatCodesObs, SatPhaseObs in zip(CodesObs, PhaseObs):
 
         # Get satellite label
         SatLabel = SatCodesObs[ObsIdxC["PRN"]]
 
-        # Get constellation
-        Constel = SatLabel[0]
+        assert(SatLabel == SatPhaseObs[ObsIdxP["PRN"]])
+
+        ObsLabels.append(SatLabel)
+        SatRows.append([float(SatCodesObs[ObsIdxC[Key]]) 
+            for Key in ("SOD", "ELEV", "AZIM", "C1", "C2", "S1", "S2")] + 
+            [float(SatPhaseObs[ObsIdxP["L1"]]), float(SatPhaseObs[ObsIdxP["L2"]])])
+
+    # End of for iObs, SatCodesObs in enumerate(CodesObs):
+
+    # Get satellites indexes
+    Sats = np.array([SatIdx[SatLabel] for SatLabel in ObsLabels], dtype=np.int64)
+    NObs = len(Sats)
+    Rows = np.array(SatRows, dtype=np.float64).reshape(NObs, 9)
+
+    # Initialize output info
+    PreproObs = OrderedDict({
+        "Sod": Rows[:, 0],                          # Second of day
+        
+        "Elevation": Rows[:, 1],                    # Elevation
+        "Azimuth": Rows[:, 2],                      # Azimuth
+        
+        "C1": Rows[:, 3],                           # GPS L1C/A pseudorange
+        "C2": Rows[:, 4],                           # GPS L1P pseudorange
+        "L1": Rows[:, 7],                           # GPS L1 carrier phase (in cycles)
+        "L1Meters": Rows[:, 7] * SatWaveF1[Sats],   # GPS L1 carrier phase (in m)
+        "S1": Rows[:, 5],                           # GPS L1C/A C/No
+        "L2": Rows[:, 8],                           # GPS L2 carrier phase (in cycles)
+        "L2Meters": Rows[:, 8] * SatWaveF2[Sats],   # GPS L2 carrier phase  (in m)
+        "S2": Rows[:, 6],                           # GPS L2 C/No
+        
+        "GeomFree_P": np.full(NObs, Const.NAN),     # Geometry-free of Phases
+        "IF_C": np.full(NObs, Const.NAN),           # Iono-free of Codes
+        "IF_P": np.full(NObs, Const.NAN),           # Iono-free of Phases
+        "SmoothIF": np.full(NObs, Const.NAN),       # Smoothed Iono-free of Codes 
+        
+        "Valid": np.ones(NObs, dtype=np.int64),     # Measurement Status
+        "RejectionCause": np.zeros(NObs, dtype=np.int64), # Cause of rejection flag
+        "Status": np.zeros(NObs, dtype=np.int64),   # Smoothing status
+        
+        "RangeRateL1": np.full(NObs, Const.NAN),    # L1 Code Rate
+        "RangeRateStepL1": np.full(NObs, Const.NAN),# L1 Code Rate Step
+        "PhaseRateL1": np.full(NObs, Const.NAN),    # L1 Phase Rate
+        "PhaseRateStepL1": np.full(NObs, Const.NAN),# L1 Phase Rate Step
         
-        Wave = {}
-        # Get wavelengths
-        if Constel == 'G':
+        "RangeRateL2": np.full(NObs, Const.NAN),    # L2 Code Rate
+        "RangeRateStepL2": np.full(NObs, Const.NAN),# L2 Code Rate Step
+        "PhaseRateL2": np.full(NObs, Const.NAN),    # L2 Phase Rate
+        "PhaseRateStepL2": np.full(NObs, Const.NAN),# L2 Phase Rate Step
+    }) # End of PreproObs
+
+    # Get Valid
+    PreproObs["Valid"][PreproObs["Sod"] == 0] = 0
+    Laps.lap("GET_MEASUREMENTS")
+
+
+    # Check measurements data gaps
+    #--------------------------------------------------------------------
+    # TODO: Periodo de no visibilidad si DeltaT es mayor a 1000 rejection cause sigue igual, o viceversa
+    # verificar con la elevacion con las epocas anteriores  
+    DeltaT = PreproObs["Sod"] - PrevPreproObsInfo.PrevEpoch[Sats]
+    DataGap = DeltaT > Conf["MAX_DATA_GAP"][1]
+    if DataGap.any():
+        if Conf["MAX_DATA_GAP"][0] == 1:
+            Reject = DataGap & (DeltaT < 1000)
+            PreproObs = rejectMeasurement(PreproObs, "MAX_DATA_GAP", Reject)
+            PrevPreproObsInfo.PrevElev[Sats[Reject], 0] = PrevPreproObsInfo.PrevElev[Sats[Reject], 1]
+            PrevPreproObsInfo.PrevElev[Sats[Reject], 1] = PreproObs["Elevation"][Reject]
+        PrevPreproObsInfo = resetPrevPreproObsInfo(PrevPreproObsInfo, 
+            Sats[DataGap], PreproObs["Sod"][DataGap])
+    Laps.lap("DATA_GAPS")
+
+
+    # Check Satellite Elevation Angle in front of the minimum by configuration
+    #--------------------------------------------------------------------
+    PreproObs = rejectMeasurement(PreproObs, "RCVR_MASK", 
+        PreproObs["Elevation"] < Conf["RCVR_MASK"])
+
+
+    # Measurement quality monitoring
+    #--------------------------------------------------------------------
+    # Check signal to noise ratio in front of minimum by configuration (if activated)
+    #--------------------------------------------------------------------
+    if Conf["MIN_SNR"][0] == 1:
+        LowS1 = PreproObs["S1"] < Conf["MIN_SNR"][1]
+        PreproObs = rejectMeasurement(PreproObs, "MIN_SNR_F1", LowS1)
+        PreproObs = rejectMeasurement(PreproObs, "MIN_SNR_F2", 
+            ~LowS1 & (PreproObs["S2"] < Conf["MIN_SNR"][1]))
+    # End if Const["MIN_SNR"][0] == 1:
+
+
+    # Check Pseudo-Ranges out of range in front of maximum by configuration
+    #--------------------------------------------------------------------
+    if Conf["MAX_PSR_OUTRNG"][0] == 1:
+        OutC1 = PreproObs["C1"] > Conf["MAX_PSR_OUTRNG"][1]
+        PreproObs = rejectMeasurement(PreproObs, "MAX_PSR_OUTRNG_F1", OutC1)
+        PreproObs = rejectMeasurement(PreproObs, "MAX_PSR_OUTRNG_F2", 
+            ~OutC1 & (PreproObs["C2"] > Conf["MAX_PSR_OUTRNG"][1]))
+    # End if Conf["MAX_PSR_OUTRNG"][0] == 1
+    Laps.lap("MEASUREMENTS_CHECKS")
+
+
+    # Build Measurement Combinations of Code and Phases
+    #--------------------------------------------------------------------
+    PreproObs = buildIonoFree(PreproObs, SatGammaF1F2[Sats])
+
+
+    #Perform the Code Carrier Smoothing with a Hatch Filter of 100 seconds
+    #--------------------------------------------------------------------
+    DeltaT = PreproObs["Sod"] - PrevPreproObsInfo.PrevEpoch[Sats]
+    Ksmooth = PrevPreproObsInfo.Ksmooth[Sats]
+    Reset = PrevPreproObsInfo.ResetHatchFilter[Sats]
+    Smooth = ~Reset
+
+    # Set Ksmooth and Reset Hatch filter (the first measurement
+    # accounts for one sampling period)
+    Ksmooth[Reset] = Conf["SAMPLING_RATE"]
+    PreproObs["SmoothIF"][Reset] = PreproObs["IF_C"][Reset]
+
+    if Smooth.any():
+        # Calculate Smoothing time with a time window of 100s
+        SmoothingTime = np.where(Ksmooth[Smooth] >= Conf["HATCH_TIME"], 
+            Conf["HATCH_TIME"], Ksmooth[Smooth] + DeltaT[Smooth])
+
+        # CALL HATCH FILTER
+        Alpha = DeltaT[Smooth] / SmoothingTime
+        PreproObs["SmoothIF"][Smooth] = Alpha * PreproObs["IF_C"][Smooth] + (1 - Alpha) * \
+            (PrevPreproObsInfo.PrevSmooth[Sats[Smooth]] + 
+            (PreproObs["IF_P"][Smooth] - PrevPreproObsInfo.IF_P_Prev[Sats[Smooth]]))
+
+        Ksmooth[Smooth] = Ksmooth[Smooth] + DeltaT[Smooth]
+
+    # Update the Prev info
+    PrevPreproObsInfo.ResetHatchFilter[Sats] = False
+    PrevPreproObsInfo.Ksmooth[Sats] = Ksmooth
+    PrevPreproObsInfo.PrevSmooth[Sats] = PreproObs["SmoothIF"]
+    PrevPreproObsInfo.IF_P_Prev[Sats] = PreproObs["IF_P"]
+    Laps.lap("HATCH_FILTER")
+
+
+    # Check Phase Rate (if activated)
+    #--------------------------------------------------------------------
+    PreproObs = computePhaseRate(PreproObs, PrevPreproObsInfo, Sats)
+
+    if Conf["MAX_PHASE_RATE"][0] == 1:
+        Check = PreproObs["PhaseRateL1"] != Const.NAN
+        for Freq in ("1", "2"):
+            Reject = Check & (np.abs(PreproObs["PhaseRateL" + Freq]) > Conf["MAX_PHASE_RATE"][1])
+            PreproObs = rejectMeasurement(PreproObs, "MAX_PHASE_RATE_F" + Freq, Reject)
+            # Reset the hatch filter 
+            PrevPreproObsInfo.ResetHatchFilter[Sats[Reject]] = True
+    # End if Conf["MAX_PHASE_RATE"][0] == 1
+
+
+    # Check Phase Rate Step (if activated)
+    #--------------------------------------------------------------------
+    PreproObs = computePhaseRateStep(PreproObs, PrevPreproObsInfo, Sats)
+
+    if Conf["MAX_PHASE_RATE_STEP"][0] == 1:
+        Check = PreproObs["PhaseRateStepL1"] != Const.NAN
+        for Freq in ("1", "2"):
+            Reject = Check & (np.abs(PreproObs["PhaseRateStepL" + Freq]) > Conf["MAX_PHASE_RATE_STEP"][1])
+            PreproObs = rejectMeasurement(PreproObs, "MAX_PHASE_RATE_STEP_F" + Freq, Reject)
+            # Reset the hatch filter 
+            PrevPreproObsInfo.ResetHatchFilter[Sats[Reject]] = True
+    # End if Conf["MAX_PHASE_RATE_STEP"][0]
+
+
+    # Check Code Rate detector (if activated)
+    #--------------------------------------------------------------------
+    # Compute the Code Rate in m/s as the first derivative of the raw codes
+    PreproObs = computeCodeRate(PreproObs, PrevPreproObsInfo, Sats)
+
+    if Conf["MAX_CODE_RATE"][0] == 1:
+        Check = PreproObs["RangeRateL1"] != Const.NAN
+        for Freq in ("1", "2"):
+            Reject = Check & (np.abs(PreproObs["RangeRateL" + Freq]) > Conf["MAX_CODE_RATE"][1])
+            PreproObs = rejectMeasurement(PreproObs, "MAX_RANGE_RATE_F" + Freq, Reject)
+            # Reset the hatch filter 
+            PrevPreproObsInfo.ResetHatchFilter[Sats[Reject]] = True
+    # End if Conf["MAX_CODE_RATE"][0] == 1
+
+
+    # Check Code Rate Step Detector (if activated)
+    #--------------------------------------------------------------------
+    # Compute Code Rate Step in m/s2 as the second derivative of Raw Codes
+    PreproObs = computeCodeRateStep(PreproObs, PrevPreproObsInfo, Sats)
+
+    if Conf["MAX_CODE_RATE_STEP"][0] == 1:
+        Check = PreproObs["RangeRateStepL1"] != Const.NAN
+        for Freq in ("1", "2"):
+            Reject = Check & (np.abs(PreproObs["RangeRateStepL" + Freq]) > Conf["MAX_CODE_RATE_STEP"][1])
+            PreproObs = rejectMeasurement(PreproObs, "MAX_RANGE_RATE_STEP_F" + Freq, Reject)
+            # Reset the hatch filter 
+            PrevPreproObsInfo.ResetHatchFilter[Sats[Reject]] = True
+    # End if Conf["MAX_CODE_RATE_STEP"][0] == 1
+    Laps.lap("RATES_CHECKS")
+
+    # Reject Measurement for Cycle Slips if activated
+    #--------------------------------------------------------------------
+    PreproObs = rejectMeasurement(PreproObs, "CYCLE_SLIPS", 
+        PrevPreproObsInfo.CycleSlips.DetectFlag[Sats] == 1)
+    PrevPreproObsInfo.CycleSlips.DetectFlag[Sats] = 0
+
+    # Update Smoothing status if it is superior to 100s
+    PreproObs["Status"] = ((Ksmooth >= (Conf["HATCH_STATE_F"]*Conf["HATCH_TIME"])) & 
+        (PreproObs["Valid"] == 1)).astype(np.int64)
+
+    # Update Previous values
+    PrevPreproObsInfo.PrevEpoch[Sats] = PreproObs["Sod"]
+
+    PrevPreproObsInfo.PrevL1[Sats] = PreproObs["L1Meters"]
+    PrevPreproObsInfo.PrevPhaseRateL1[Sats] = PreproObs["PhaseRateL1"]
+    PrevPreproObsInfo.PrevC1[Sats] = PreproObs["C1"]
+    PrevPreproObsInfo.PrevRangeRateL1[Sats] = PreproObs["RangeRateL1"]
+    
+    PrevPreproObsInfo.PrevL2[Sats] = PreproObs["L2Meters"]
+    PrevPreproObsInfo.PrevPhaseRateL2[Sats] = PreproObs["PhaseRateL2"]
+    PrevPreproObsInfo.PrevC2[Sats] = PreproObs["C2"]
+    PrevPreproObsInfo.PrevRangeRateL2[Sats] = PreproObs["RangeRateL2"]
+
+    # Build the Preprocessed information per satellite
+    Keys = list(PreproObs.keys())
+    PreproObsInfo = OrderedDict(
+        (SatLabel, dict(zip(Keys, SatValues))) for SatLabel, SatValues in 
+        zip(ObsLabels, zip(*[Values.tolist() for Values in PreproObs.values()])))
+    Laps.lap("UPDATE_OUTPUTS")
 
-            # L1 wavelength
-            Wave["F1"] = Const.GPS_L1_WAVE
+    return PreproObsInfo
 
-            # L2 wavelength
-            Wave["F2"] = Const.GPS_L2_WAVE
+# End of function runPreprocessing()
 
-            # Gamma GPS
-            GammaF1F2 = Const.GPS_GAMMA_L1L2
+def preprocessEpochs(Conf, ObsStream, PrevPreproObsInfo):
 
-        elif Constel == 'E':
+    # Purpose: preprocess a stream of OBS epochs, one epoch at a time
 
-            # E1 wavelength
-            Wave["F1"] = Const.GAL_E1_WAVE
+    # Parameters
+    # ==========
+    # Conf: dict
+    #         Configuration dictionary
+    # ObsStream: iterable
+    #         OBS Codes and Phases of each epoch (see iterObsEpochs)
+    # PrevPreproObsInfo: PreproState
+    #         Preprocessing state of the previous epoch, updated
+    #         along the stream
 
-            # E5a wavelength
-            Wave["F2"] = Const.GAL_E5A_WAVE
+    # Returns
+    # =======
+    # PreproObsInfo: generator
+    #         Preprocessing info of each epoch (see runPreprocessing)
 
-            # Gamma Galileo
-            GammaF1F2 = Const.GAL_GAMMA_E1E5A
+    for ObsInfo in ObsStream:
+        with profileStage("PREPRO"):
+            PreproObsInfo = runPreprocessing(Conf, ObsInfo, PrevPreproObsInfo)
+        yield PreproObsInfo
 
-        # Get Phases
-        SatPhaseObs = PhaseObs[iObs]
+# End of function preprocessEpochs()
 
-        while SatPhaseObs[ObsIdxP["PRN"]] != SatLabel:
-            PhaseObs.pop(iObs)
-            SatPhaseObs = PhaseObs[iObs]
+def runPreprocessingWindow(Conf, Window):
 
-        assert(SatLabel == SatPhaseObs[ObsIdxP["PRN"]])
+    # Purpose: preprocess the OBS data of a time window of the day
+    #          epoch by epoch, starting from the warm-up records
+    #          (see splitObsWindows), which are not output
 
-        # Initialize output info
-        SatPreproObsInfo = {
-            "Sod": 0.0,                   # Second of day
-            
-            "Elevation": 0.0,             # Elevation
-            "Azimuth": 0.0,               # Azimuth
-            
-            "C1": 0.0,                    # GPS L1C/A pseudorange
-            "C2": 0.0,                    # GPS L1P pseudorange
-            "L1": 0.0,                    # GPS L1 carrier phase (in cycles)
-            "L1Meters": 0.0,              # GPS L1 carrier phase (in m)
-            "S1": 0.0,                    # GPS L1C/A C/No
-            "L2": 0.0,                    # GPS L2 carrier phase (in cycles)
-            "L2Meters": 0.0,              # GPS L2 carrier phase  (in m)
-            "S2": 0.0,                    # GPS L2 C/No
-            
-            "GeomFree_P": Const.NAN,      # Geometry-free of Phases
-            "IF_C": Const.NAN,            # Iono-free of Codes
-            "IF_P": Const.NAN,            # Iono-free of Phases
-            "SmoothIF": Const.NAN,        # Smoothed Iono-free of Codes 
-            
-            "Valid": 1,                   # Measurement Status
-            "RejectionCause": 0,          # Cause of rejection flag
-            "Status": 0,                  # Smoothing status
-            
-            "RangeRateL1": Const.NAN,     # L1 Code Rate
-            "RangeRateStepL1": Const.NAN, # L1 Code Rate Step
-            "PhaseRateL1": Const.NAN,     # L1 Phase Rate
-            "PhaseRateStepL1": Const.NAN, # L1 Phase Rate Step
-            
-            "RangeRateL2": Const.NAN,     # L2 Code Rate
-            "RangeRateStepL2": Const.NAN, # L2 Code Rate Step
-            "PhaseRateL2": Const.NAN,     # L2 Phase Rate
-            "PhaseRateStepL2": Const.NAN, # L2 Phase Rate Step
-        } # End of SatPreproObsInfo
-
-        # Prepare outputs
-        # Get SoD
-        SatPreproObsInfo["Sod"] = float(SatCodesObs[ObsIdxC["SOD"]])
-        # Get Elevation
-        SatPreproObsInfo["Elevation"] = float(SatCodesObs[ObsIdxC["ELEV"]])
-        # Get Azimuth
-        SatPreproObsInfo["Azimuth"] = float(SatCodesObs[ObsIdxC["AZIM"]])
-        # Get C1
-        SatPreproObsInfo["C1"] = float(SatCodesObs[ObsIdxC["C1"]])
-        # Get C2
-        SatPreproObsInfo["C2"] = float(SatCodesObs[ObsIdxC["C2"]])
-        # Get S1
-        SatPreproObsInfo["S1"] = float(SatCodesObs[ObsIdxC["S1"]])
-        # Get S2
-        SatPreproObsInfo["S2"] = float(SatCodesObs[ObsIdxC["S2"]])
-        # Get L1
-        SatPreproObsInfo["L1"] = float(SatPhaseObs[ObsIdxP["L1"]]) 
-        # Get L2
-        SatPreproObsInfo["L2"] = float(SatPhaseObs[ObsIdxP["L2"]])
-        # Get L1-meters
-        SatPreproObsInfo["L1Meters"] = SatPreproObsInfo["L1"] * Wave["F1"]
-        # Get L2-meters
-        SatPreproObsInfo["L2Meters"] = SatPreproObsInfo["L2"] * Wave["F2"]
-        # Get Valid
-        if SatPreproObsInfo["Sod"] == 0:
-            SatPreproObsInfo["Valid"] = 0
-
-        # Prepare output for the satellite
-        PreproObsInfo[SatLabel] = SatPreproObsInfo
-    
-    # Loop over satellites
-    for SatLabel, PreproObs in PreproObsInfo.items():
-
-        # Get constellation
-        Constel = SatLabel[0]
-        Wave = {}
-        # Get wavelengths
-        if Constel == 'G':
-
-            # L1 wavelength
-            Wave["F1"] = Const.GPS_L1_WAVE
-
-            # L1 wavelength
-            Wave["F2"] = Const.GPS_L2_WAVE
-
-            # Gamma
-            GammaF1F2 = Const.GPS_GAMMA_L1L2
-
-        elif Constel == 'E':
-
-            # L1 wavelength
-            Wave["F1"] = Const.GAL_E1_WAVE
-
-            # L1 wavelength
-            Wave["F2"] = Const.GAL_E5A_WAVE
-
-            # Gamma
-            GammaF1F2 = Const.GAL_GAMMA_E1E5A
-        # End of if if Constel == 'G':
-
-
-        # Check measurements data gaps
-        #--------------------------------------------------------------------
-        # TODO: Periodo de no visibilidad si DeltaT es mayor a 1000 rejection cause sigue igual, o viceversa
-        # verificar con la elevacion con las epocas anteriores  
-        if (PreproObs["Sod"] - PrevPreproObsInfo[SatLabel]["PrevEpoch"]) > Conf["MAX_DATA_GAP"][1]:
-            if Conf["MAX_DATA_GAP"][0] == 1 and (PreproObs["Sod"] - PrevPreproObsInfo[SatLabel]["PrevEpoch"]) < 1000:
-                PreproObs = rejectMeasurement(PreproObs, "MAX_DATA_GAP")
-                PrevPreproObsInfo[SatLabel]["PrevElev"][0] = PrevPreproObsInfo[SatLabel]["PrevElev"][1]
-                PrevPreproObsInfo[SatLabel]["PrevElev"][1] = PreproObs["Elevation"]
-            PrevPreproObsInfo[SatLabel] = resetPrevPreproObsInfo(Conf, PreproObs, PrevPreproObsInfo, SatLabel, condition)
-            
-        # if PreproObs["Sod"] - PrevPreproObsInfo[SatLabel]["PrevEpoch"] > Conf["MAX_DATA_GAP"][1]:
-        #     if Conf["MAX_DATA_GAP"][0] == 1 and (PrevPreproObsInfo[SatLabel]["PrevElev"][0] != Const.NAN) and (PrevPreproObsInfo[SatLabel]["PrevElev"][1] != Const.NAN):
-        #         PreproObs = rejectMeasurement(PreproObs, "MAX_DATA_GAP")
-        #         PrevPreproObsInfo[SatLabel]["PrevElev"][0] = PrevPreproObsInfo[SatLabel]["PrevElev"][1]
-        #         PrevPreproObsInfo[SatLabel]["PrevElev"][1] = PreproObs["Elevation"]
-        #     PrevPreproObsInfo[SatLabel] = resetPrevPreproObsInfo(Conf, PreproObs)
-
-
-        # Check Satellite Elevation Angle in front of the minimum by configuration
-        #--------------------------------------------------------------------
-        if PreproObs["Elevation"] < Conf["RCVR_MASK"]:
-            PreproObs = rejectMeasurement(PreproObs, "RCVR_MASK")
-        #End if PreproObs["Elevation"] > Conf["RCVR_MASK"]
-
-
-        # Measurement quality monitoring
-        #--------------------------------------------------------------------
-        # Check signal to noise ratio in front of minimum by configuration (if activated)
-        #--------------------------------------------------------------------
-        if Conf["MIN_SNR"][0] == 1:
-            if PreproObs["S1"] < Conf["MIN_SNR"][1]:
-                PreproObs = rejectMeasurement(PreproObs, "MIN_SNR_F1")
-            elif PreproObs["S2"] < Conf["MIN_SNR"][1]:
-                PreproObs = rejectMeasurement(PreproObs, "MIN_SNR_F2")
-            # End if PreproObs["S1"] > Conf["MIN_SNR"][1] || PreproObs["S2"] > Conf["MIN_SNR"][1]
-        # End if Const["MIN_SNR"][0] == 1:
-
-
-        # Check Pseudo-Ranges out of range in front of maximum by configuration
-        #--------------------------------------------------------------------
-        if Conf["MAX_PSR_OUTRNG"][0] == 1:
-            if PreproObs["C1"] > Conf["MAX_PSR_OUTRNG"][1]:
-                PreproObs = rejectMeasurement(PreproObs, "MAX_PSR_OUTRNG_F1")
-            elif PreproObs["C2"] > Conf["MAX_PSR_OUTRNG"][1]:
-                PreproObs = rejectMeasurement(PreproObs, "MAX_PSR_OUTRNG_F2")
-            # End if PreproObs["C1"] > Conf["MAX_PSR_OUTRNG"][1] || PreproObs["C2"] > Conf["MAX_PSR_OUTRNG"][1]
-        # End if Conf["MAX_PSR_OUTRNG"][0] == 1
-
-
-        # Build Measurement Combinations of Code and Phases
-        #--------------------------------------------------------------------
-        PreproObs = buildIonoFree(PreproObs, GammaF1F2)
-
-
-        #Perform the Code Carrier Smoothing with a Hatch Filter of 100 seconds
-        #--------------------------------------------------------------------
-        if PrevPreproObsInfo[SatLabel]["ResetHatchFilter"] == 1:
-
-            # Set Ksmooth and Reset Hatch filter
-            PrevPreproObsInfo[SatLabel]["Ksmooth"] = 1
-            PrevPreproObsInfo[SatLabel]["ResetHatchFilter"] = 0
-
-            # Update the Prev and Prepro dicts
-            PreproObs["SmoothIF"] = PreproObs["IF_C"]
-            PrevPreproObsInfo[SatLabel]["PrevSmooth"] = PreproObs["SmoothIF"]
-            PrevPreproObsInfo[SatLabel]["IF_P_Prev"] = PreproObs["IF_P"] 
+    # Parameters
+    # ==========
+    # Conf: dict
+    #         Configuration dictionary
+    # Window: dict
+    #         Time window (see splitObsWindows)
 
+    # Returns
+    # =======
+    # PreproObsData: dict
+    #         Columnar preprocessed observations of the window, one
+    #         array per PREPRO OBS column in the order of the code
+    #         records (see runPreprocessingArcs)
+
+    ObsData = Window["OBS"]
+
+    # Preprocessing state at the start of the warm-up
+    PrevPreproObsInfo = PreproState(Conf)
+    PrevPreproObsInfo.PrevEpoch[:] = Window["PREV_EPOCH"]
+
+    # Get the values of the PREPRO OBS columns (but PRN)
+    getValues = itemgetter(*PreproObsKeys.values())
+
+    Prns = []
+    Values = []
+    for Epoch, Sod in enumerate(ObsData["EPOCHS"].tolist()):
+        PreproObsInfo = runPreprocessing(Conf, getObsEpoch(ObsData, Epoch),
+            PrevPreproObsInfo)
+
+        # Drop the warm-up epochs
+        if Sod < Window["SOD_START"]:
+            continue
+
+        Prns.extend([SatIdx[SatLabel] for SatLabel in PreproObsInfo])
+        Values.extend(map(getValues, PreproObsInfo.values()))
+
+    # Build the PREPRO OBS columns
+    Columns = np.array(Values, dtype=np.float64).reshape(len(Values), len(PreproObsKeys))
+    PreproObsData = OrderedDict({})
+    for Key in PreproIdx:
+        if Key == "PRN":
+            PreproObsData[Key] = np.array(Prns, dtype=np.int16)
         else:
-            # Calculate Smoothing time
-            SmoothingTime = PrevPreproObsInfo[SatLabel]["Ksmooth"] + (PreproObs["Sod"] - PrevPreproObsInfo[SatLabel]["PrevEpoch"])
+            PreproObsData[Key] = Columns[:, list(PreproObsKeys).index(Key)]
+            if Key in ("SOD", "VALID", "REJECT", "STATUS"):
+                PreproObsData[Key] = PreproObsData[Key].astype(np.int64)
 
-            # Set smooth time with a time window of 100s
-            if PrevPreproObsInfo[SatLabel]["Ksmooth"] >= Conf["HATCH_TIME"]:
-                SmoothingTime = Conf["HATCH_TIME"]
-            # End if PrevPreproObsInfo[SatLabel]["Ksmooth"] >= Conf["HATCH_TIME"]
-        
-            # CALL HATCH FILTER
-            Alpha = (PreproObs["Sod"] - PrevPreproObsInfo[SatLabel]["PrevEpoch"]) / SmoothingTime
-            PreproObs["SmoothIF"] = Alpha * PreproObs["IF_C"] + (1 - Alpha) * (PrevPreproObsInfo[SatLabel]["PrevSmooth"] + (PreproObs["IF_P"] - PrevPreproObsInfo[SatLabel]["IF_P_Prev"]))
-            
-            PrevPreproObsInfo[SatLabel]["Ksmooth"] = PrevPreproObsInfo[SatLabel]["Ksmooth"] + (PreproObs["Sod"] - PrevPreproObsInfo[SatLabel]["PrevEpoch"])
-            PrevPreproObsInfo[SatLabel]["PrevSmooth"] = PreproObs["SmoothIF"]
-            PrevPreproObsInfo[SatLabel]["IF_P_Prev"] = PreproObs["IF_P"]
-        # End if PrevPreproObsInfo[SatLabel]["ResetHatchFilter"] == 1
-
-
-        # Check Phase Rate (if activated)
-        #--------------------------------------------------------------------
-        PreproObs = computePhaseRate(PreproObs, PrevPreproObsInfo, SatLabel)
-
-        if Conf["MAX_PHASE_RATE"][0] == 1 and PreproObs["PhaseRateL1"] != Const.NAN:
-            if  abs(PreproObs["PhaseRateL1"]) > Conf["MAX_PHASE_RATE"][1]:
-                PreproObs = rejectMeasurement(PreproObs, "MAX_PHASE_RATE_F1")
-                # Reset the hatch filter 
-                PrevPreproObsInfo[SatLabel]["ResetHatchFilter"] = 1
-            if  abs(PreproObs["PhaseRateL2"]) > Conf["MAX_PHASE_RATE"][1]:
-                PreproObs = rejectMeasurement(PreproObs, "MAX_PHASE_RATE_F2")
-                # Reset the hatch filter 
-                PrevPreproObsInfo[SatLabel]["ResetHatchFilter"] = 1
-            # End if PreproObs["PhaseRateL1"] > Conf["MAX_PHASE_RATE"][1] || PreproObs["PhaseRateL2"] > Conf["MAX_PHASE_RATE"][1]
-        # End if Conf["MAX_PHASE_RATE"][0] == 1
-
-
-        # Check Phase Rate Step (if activated)
-        #--------------------------------------------------------------------
-        PreproObs = computePhaseRateStep(PreproObs, PrevPreproObsInfo, SatLabel)
-
-        if Conf["MAX_PHASE_RATE_STEP"][0] == 1 and PreproObs["PhaseRateStepL1"] != Const.NAN:
-            if  abs(PreproObs["PhaseRateStepL1"]) > Conf["MAX_PHASE_RATE_STEP"][1]:
-                PreproObs = rejectMeasurement(PreproObs, "MAX_PHASE_RATE_STEP_F1")
-                # Reset the hatch filter 
-                PrevPreproObsInfo[SatLabel]["ResetHatchFilter"] = 1
-            if  abs(PreproObs["PhaseRateStepL2"]) > Conf["MAX_PHASE_RATE_STEP"][1]:
-                PreproObs = rejectMeasurement(PreproObs, "MAX_PHASE_RATE_STEP_F2")
-                # Reset the hatch filter 
-                PrevPreproObsInfo[SatLabel]["ResetHatchFilter"] = 1
-            # End if  PreproObs["PhaseRateStepL1"] > Conf["MAX_PHASE_RATE_STEP"][1] || PreproObs["PhaseRateStepL2"] > Conf["MAX_PHASE_RATE_STEP"][1]
-        # End if Conf["MAX_PHASE_RATE_STEP"][0]
-
-
-        # Check Code Rate detector (if activated)
-        #--------------------------------------------------------------------
-        # Compute the Code Rate in m/s as the first derivative of the raw codes
-        PreproObs = computeCodeRate(PreproObs, PrevPreproObsInfo, SatLabel)
-        if Conf["MAX_CODE_RATE"][0] == 1 and PreproObs["RangeRateL1"] != Const.NAN:
-            if abs(PreproObs["RangeRateL1"]) > Conf["MAX_CODE_RATE"][1]:
-                PreproObs = rejectMeasurement(PreproObs, "MAX_RANGE_RATE_F1")
-                # Reset the hatch filter 
-                PrevPreproObsInfo[SatLabel]["ResetHatchFilter"] = 1
-            if abs(PreproObs["RangeRateL2"]) > Conf["MAX_CODE_RATE"][1]:
-                PreproObs = rejectMeasurement(PreproObs, "MAX_RANGE_RATE_F2")
-                # Reset the hatch filter 
-                PrevPreproObsInfo[SatLabel]["ResetHatchFilter"] = 1
-            # End if PreproObs["RangeRateL1"] > Conf["MAX_CODE_RATE"][1] || PreproObs["RangeRateL2"] > Conf["MAX_CODE_RATE"][1]
-        # End if Conf["MAX_CODE_RATE"][0] == 1
-
-
-        # Check Code Rate Step Detector (if activated)
-        #--------------------------------------------------------------------
-        # Compute Code Rate Step in m/s2 as the second derivative of Raw Codes
-        PreproObs = computeCodeRateStep(PreproObs, PrevPreproObsInfo, SatLabel)
-
-        if Conf["MAX_CODE_RATE_STEP"][0] == 1 and PreproObs["RangeRateStepL1"] != Const.NAN:
-            if abs(PreproObs["RangeRateStepL1"]) > Conf["MAX_CODE_RATE_STEP"][1]:
-                PreproObs = rejectMeasurement(PreproObs, "MAX_RANGE_RATE_STEP_F1")
-                # Reset the hatch filter 
-                PrevPreproObsInfo[SatLabel]["ResetHatchFilter"] = 1
-            if abs(PreproObs["RangeRateStepL2"]) > Conf["MAX_CODE_RATE_STEP"][1]:
-                PreproObs = rejectMeasurement(PreproObs, "MAX_RANGE_RATE_STEP_F2")
-                # Reset the hatch filter 
-                PrevPreproObsInfo[SatLabel]["ResetHatchFilter"] = 1
-            # End if PreproObs["RangeRateStepL1"] > Conf["MAX_CODE_RATE_STEP"][1] || PreproObs["RangeRateStepL2"] > Conf["MAX_CODE_RATE_STEP"][1]
-        # End if Conf["MAX_CODE_RATE_STEP"][0] == 1
-
-        # Reject Measurement for Cycle Slips if activated
-        #--------------------------------------------------------------------
-        if  PrevPreproObsInfo[SatLabel]["CycleSlipDetectFlag"] == 1:
-            PreproObs = rejectMeasurement(PreproObs, "CYCLE_SLIPS")
-            PrevPreproObsInfo[SatLabel]["CycleSlipDetectFlag"] = 0
-
-        # Update Smoothing status if it is superior to 100s
-        # print(PrevPreproObsInfo[SatLabel]["Ksmooth"])
-        if (PrevPreproObsInfo[SatLabel]["Ksmooth"] >= (Conf["HATCH_STATE_F"]*Conf["HATCH_TIME"])) and PreproObs["Valid"] == 1:
-            PreproObs["Status"] = 1
-        else:
-            PreproObs["Status"] = 0
+    return PreproObsData
 
-        # Update Previous values
-        PrevPreproObsInfo[SatLabel]["PrevEpoch"] = PreproObs["Sod"]
+# End of function runPreprocessingWindow()
 
-        PrevPreproObsInfo[SatLabel]["Status"] = PreproObs["Status"]
-        
-        PrevPreproObsInfo[SatLabel]["PrevL1"] = PreproObs["L1Meters"]
-        PrevPreproObsInfo[SatLabel]["PrevPhaseRateL1"] = PreproObs["PhaseRateL1"]
-        PrevPreproObsInfo[SatLabel]["PrevC1"] = PreproObs["C1"]
-        PrevPreproObsInfo[SatLabel]["PrevRangeRateL1"] = PreproObs["RangeRateL1"]
-        
-        PrevPreproObsInfo[SatLabel]["PrevL2"] = PreproObs["L2Meters"]
-        PrevPreproObsInfo[SatLabel]["PrevPhaseRateL2"] = PreproObs["PhaseRateL2"]
-        PrevPreproObsInfo[SatLabel]["PrevC2"] = PreproObs["C2"]
-        PrevPreproObsInfo[SatLabel]["PrevRangeRateL2"] = PreproObs["RangeRateL2"]
+def runPreprocessingWindows(Conf, ObsData, NWindows, NShards=1):
 
-        # Update Proprocessed information
-        PreproObsInfo[SatLabel] = PreproObs
+    # Purpose: preprocess the OBS data of a day split in time windows
+    #          (see splitObsWindows) and/or in shards of satellites
+    #          (see splitObsShards) in parallel worker processes. It
+    #          gives the same results as calling runPreprocessing epoch
+    #          by epoch over the whole day
 
-        
-    # End of for SatLabel, PreproObs in PreproObsInfo.items():
+    # Parameters
+    # ==========
+    # Conf: dict
+    #         Configuration dictionary
+    # ObsData: dict
+    #         Columnar OBS data of the day (see readObsFile)
+    # NWindows: int
+    #         Number of time windows
+    # NShards: int
+    #         Number of shards of satellites of each time window
 
-    return PreproObsInfo
+    # Returns
+    # =======
+    # PreproObsData: dict
+    #         Columnar preprocessed observations of the day, in the
+    #         order of the code records (see runPreprocessingArcs)
 
-# End of function runPreprocessing()
+    Windows = splitObsWindows(Conf, ObsData, NWindows)
+    if NShards > 1:
+        Windows = [Shard for Window in Windows
+            for Shard in splitObsShards(Window, NShards)] or Windows
+
+    # Display Message
+    print("INFO: Preprocessing %d parts of the day (%d warm-up records of %d)..." %
+    (len(Windows), sum([Window["WARMUP"] for Window in Windows]), len(ObsData["C"]["SOD"])))
+
+    if len(Windows) > 1:
+        with ProcessPoolExecutor(max_workers=len(Windows)) as Pool:
+            Results = list(Pool.map(partial(runPreprocessingWindow, Conf), Windows))
+    else:
+        Results = [runPreprocessingWindow(Conf, Windows[0])]
+
+    # Merge the parts in the order of the code records
+    PreproObsData = OrderedDict({})
+    for Key in PreproIdx:
+        PreproObsData[Key] = np.empty(len(ObsData["C"]["SOD"]), dtype=Results[0][Key].dtype)
+        for Window, Result in zip(Windows, Results):
+            PreproObsData[Key][Window["CODES"]] = Result[Key]
+
+    return PreproObsData
+
+# End of function runPreprocessingWindows()
+
+
+
+def runPreprocessingArcs(Conf, ObsData):
+    
+    # Purpose: preprocess the GNSS raw measurements of a whole day
+    #          with array operations over the satellites arcs.
+    #          It gives the same results as calling runPreprocessing
+    #          epoch by epoch: only the cycle slips detector and the 
+    #          Hatch filter are run sequentially
+
+    # Parameters
+    # ==========
+    # Conf: dict
+    #         Configuration dictionary
+    # ObsData: dict
+    #         Columnar OBS data of the day (see readObsFile)
+
+    # Returns
+    # =======
+    # PreproObsData: dict
+    #         Columnar preprocessed observations, one array per
+    #         PREPRO OBS column in the order of the code records
+    #         PreproObsData["C1"][i]
+
+    # Profile the preprocessing stages (if activated)
+    Laps = profileLaps()
+
+    CodesObs = ObsData["C"]
+    PhaseObs = ObsData["P"]
+    NCodes = len(CodesObs["SOD"])
+
+    # Get the Phase of each Code record: the records of each epoch are
+    # joined by the reader (see joinObsRecords)
+    #--------------------------------------------------------------------
+    CodesEpoch = np.repeat(np.arange(len(ObsData["EPOCHS"])), np.diff(ObsData["C_IDX"]))
+    CodesPhase = ObsData["P_IDX"][CodesEpoch] + np.arange(NCodes) - ObsData["C_IDX"][CodesEpoch]
+    PhaseHasCode = np.zeros(len(PhaseObs["SOD"]), dtype=bool)
+    PhaseHasCode[CodesPhase] = True
+    Laps.lap("GET_MEASUREMENTS")
+
+    # Check Cycle Slips over the Phase measurements
+    #--------------------------------------------------------------------
+    CsFlags = detectCycleSlipsArcs(Conf, PhaseObs["PRN"], PhaseObs["SOD"],
+    PhaseObs["L1"] - PhaseObs["L2"], PhaseHasCode, ObsData["P_IDX"])[CodesPhase]
+    Laps.lap("CYCLE_SLIPS")
+
+    # Sort the code records by satellite (and time)
+    #--------------------------------------------------------------------
+    Order = np.argsort(CodesObs["PRN"], kind='stable')
+    Prn = CodesObs["PRN"][Order]
+    Sod = CodesObs["SOD"][Order]
+    C1 = CodesObs["C1"][Order]
+    C2 = CodesObs["C2"][Order]
+    L1Meters = PhaseObs["L1"][CodesPhase][Order] * SatWaveF1[Prn]
+    L2Meters = PhaseObs["L2"][CodesPhase][Order] * SatWaveF2[Prn]
+    GammaF1F2 = SatGammaF1F2[Prn]
+    CsFlags = CsFlags[Order]
+
+    # First record of each satellite
+    First = np.ones(NCodes, dtype=bool)
+    First[1:] = Prn[1:] != Prn[:-1]
+
+    # Time since the previous record of the satellite
+    PrevEpoch = np.roll(Sod, 1)
+    PrevEpoch[First] = Const.S_IN_D
+    Dt = Sod - PrevEpoch
+
+    # Check measurements data gaps: a gap starts a new arc
+    #--------------------------------------------------------------------
+    DataGap = Dt > Conf["MAX_DATA_GAP"][1]
+    ArcStart = First | DataGap
+    InArc = ~ArcStart
+
+    # Rates and Rate Steps along the arcs
+    def computeArcRate(Values):
+        Rate = np.full(NCodes, Const.NAN)
+        Rate[InArc] = (Values[InArc] - np.roll(Values, 1)[InArc]) / Dt[InArc]
+        return Rate
+
+    def computeArcRateStep(RateF1, RateF2):
+        PrevRateF1 = np.roll(RateF1, 1)
+        PrevRateF2 = np.roll(RateF2, 1)
+        Compute = InArc & ~((PrevRateF1 == Const.NAN) & (PrevRateF2 == Const.NAN))
+        StepF1 = np.full(NCodes, Const.NAN)
+        StepF2 = np.full(NCodes, Const.NAN)
+        StepF1[Compute] = (RateF1[Compute] - PrevRateF1[Compute]) / Dt[Compute]
+        StepF2[Compute] = (RateF2[Compute] - PrevRateF2[Compute]) / Dt[Compute]
+        return StepF1, StepF2
+
+    PhaseRateL1 = computeArcRate(L1Meters)
+    PhaseRateL2 = computeArcRate(L2Meters)
+    PhaseRateStepL1, PhaseRateStepL2 = computeArcRateStep(PhaseRateL1, PhaseRateL2)
+    RangeRateL1 = computeArcRate(C1)
+    RangeRateL2 = computeArcRate(C2)
+    RangeRateStepL1, RangeRateStepL2 = computeArcRateStep(RangeRateL1, RangeRateL2)
+    Laps.lap("RATES")
+
+    # Measurements validation
+    #--------------------------------------------------------------------
+    Valid = np.ones(NCodes, dtype=np.int64)
+    Valid[Sod == 0] = 0
+    RejectionCause = np.zeros(NCodes, dtype=np.int64)
+    ResetHatchFilter = np.zeros(NCodes, dtype=bool)
+
+    def rejectMeasurements(Mask, Criterion):
+        Valid[Mask] = 0
+        if Criterion in REJECTION_CAUSE:
+            RejectionCause[Mask] = REJECTION_CAUSE[Criterion]
+
+    # Data gaps
+    if Conf["MAX_DATA_GAP"][0] == 1:
+        rejectMeasurements(DataGap & (Dt < 1000), "DATA_GAP")
+
+    # Satellite Elevation Angle
+    rejectMeasurements(CodesObs["ELEV"][Order] < Conf["RCVR_MASK"], "MASKANGLE")
+
+    # Signal to noise ratio
+    if Conf["MIN_SNR"][0] == 1:
+        LowS1 = CodesObs["S1"][Order] < Conf["MIN_SNR"][1]
+        rejectMeasurements(LowS1, "MIN_SNR_F1")
+        rejectMeasurements(~LowS1 & (CodesObs["S2"][Order] < Conf["MIN_SNR"][1]), "MIN_SNR_F2")
+
+    # Pseudo-Ranges out of range (the rejection cause is not updated)
+    if Conf["MAX_PSR_OUTRNG"][0] == 1:
+        OutRngC1 = C1 > Conf["MAX_PSR_OUTRNG"][1]
+        rejectMeasurements(OutRngC1, None)
+        rejectMeasurements(~OutRngC1 & (C2 > Conf["MAX_PSR_OUTRNG"][1]), None)
+
+    # Rates and Rate Steps (the Hatch filter is reset at next epoch)
+    for Check, ValueF1, ValueF2, CriterionF1, CriterionF2 in (
+        ("MAX_PHASE_RATE", PhaseRateL1, PhaseRateL2,
+            "MAX_PHASE_RATE_F1", "MAX_PHASE_RATE_F2"),
+        ("MAX_PHASE_RATE_STEP", PhaseRateStepL1, PhaseRateStepL2,
+            "MAX_PHASE_RATE_STEP_F1", "MAX_PHASE_RATE_STEP_F2"),
+        ("MAX_CODE_RATE", RangeRateL1, RangeRateL2,
+            "MAX_CODE_RATE_F1", "MAX_CODE_RATE_F2"),
+        ("MAX_CODE_RATE_STEP", RangeRateStepL1, RangeRateStepL2,
+            "MAX_CODE_RATE_STEP_F1", "MAX_CODE_RATE_STEP_F2")):
+        if Conf[Check][0] == 1:
+            Checked = ValueF1 != Const.NAN
+            ExceededF1 = Checked & (np.abs(ValueF1) > Conf[Check][1])
+            rejectMeasurements(ExceededF1, CriterionF1)
+            ExceededF2 = Checked & (np.abs(ValueF2) > Conf[Check][1])
+            rejectMeasurements(ExceededF2, CriterionF2)
+            ResetHatchFilter |= ExceededF1 | ExceededF2
+
+    # Cycle Slips
+    rejectMeasurements(CsFlags == 1, "CYCLE_SLIP")
+    Laps.lap("MEASUREMENTS_CHECKS")
+
+    # Build Measurement Combinations of Code and Phases
+    #--------------------------------------------------------------------
+    IF_C = (C2 - GammaF1F2 * C1) / (1 - GammaF1F2)
+    IF_P = (L2Meters - GammaF1F2 * L1Meters) / (1 - GammaF1F2)
+
+    # Perform the Code Carrier Smoothing with a Hatch Filter
+    #--------------------------------------------------------------------
+    Reset = ArcStart.copy()
+    Reset[1:] |= ResetHatchFilter[:-1]
+    SmoothIF, Ksmooth = runHatchFilterArcs(Conf, Dt.tolist(), IF_C.tolist(),
+    IF_P.tolist(), Reset.tolist())
+    SmoothIF = np.array(SmoothIF)
+    Ksmooth = np.array(Ksmooth, dtype=np.float64)
+    Laps.lap("HATCH_FILTER")
+
+    # Update Smoothing status
+    Status = ((Ksmooth >= (Conf["HATCH_STATE_F"] * Conf["HATCH_TIME"])) & \
+        (Valid == 1)).astype(np.int64)
+
+    # Prepare outputs in the order of the code records
+    #--------------------------------------------------------------------
+    Outputs = OrderedDict({})
+    Outputs["SOD"] = Sod
+    Outputs["PRN"] = Prn
+    Outputs["ELEV"] = CodesObs["ELEV"][Order]
+    Outputs["AZIM"] = CodesObs["AZIM"][Order]
+    Outputs["VALID"] = Valid
+    Outputs["REJECT"] = RejectionCause
+    Outputs["STATUS"] = Status
+    Outputs["C1"] = C1
+    Outputs["C2"] = C2
+    Outputs["L1"] = L1Meters
+    Outputs["L2"] = L2Meters
+    Outputs["S1"] = CodesObs["S1"][Order]
+    Outputs["S2"] = CodesObs["S2"][Order]
+    Outputs["CODE_RATE"] = RangeRateL1
+    Outputs["CODE_RATE_STEP"] = RangeRateStepL1
+    Outputs["PHASE_RATE"] = PhaseRateL1
+    Outputs["PHASE_RATE_STEP"] = PhaseRateStepL1
+    Outputs["CODE_IF"] = IF_C
+    Outputs["PHASE_IF"] = IF_P
+    Outputs["SMOOTH_IF"] = SmoothIF
+
+    PreproObsData = OrderedDict({})
+    for Key in PreproIdx:
+        PreproObsData[Key] = np.empty_like(Outputs[Key])
+        PreproObsData[Key][Order] = Outputs[Key]
+    Laps.lap("UPDATE_OUTPUTS")
+
+    return PreproObsData
+
+# End of function runPreprocessingArcs()
 
 ########################################################################
 # END OF PREPROCESSING FUNCTIONS MODULE
@@ -18,15 +18,16 @@
 
 import sys, os
 from pandas import unique
-from pandas import read_csv
 from InputOutput import PreproIdx
+from InputOutput import readPreproFile
 from InputOutput import REJECTION_CAUSE_DESC
 sys.path.append(os.getcwd() + '/' + \
     os.path.dirname(sys.argv[0]) + '/' + 'COMMON')
 from COMMON import GnssConstants
 import numpy as np
 from collections import OrderedDict
-from COMMON.Plots import generatePlot
+from COMMON.Plots import generatePlots
+from COMMON.Profiling import profileLaps
 from COMMON.allPRNs import allprns
 
 
@@ -50,6 +51,18 @@ def initPlot(PreproObsFile, PlotConf, Title, Label):
     return PlotConf
 
 
+def getPlotPath(PreproObsFile, Label):
+    # Build the figure path of the day of the PREPRO file
+    PreproObsFileNameSplit = os.path.basename(PreproObsFile).split('_')
+    Rcvr = PreproObsFileNameSplit[2]
+    Date = PreproObsFileNameSplit[3].split('.')[0]
+    Year = Date[1:3]
+    Doy = Date[4:]
+
+    return sys.argv[1] + '/OUT/PPVE/SAT/' + \
+        '%s_%s_D%sY%s.png' % (Label, Rcvr, Doy, Year)
+
+
 # Function to convert 'G01', 'G02', etc. to 1, 2, etc.
 def convert_satlabel_to_prn(value):
     return int(value[1:])
@@ -108,10 +121,9 @@ def plotSatVisibility(PreproObsFile, PreproObsData):
         PlotConf["zData"][prn] = PreproObsData[PreproIdx["ELEV"]][FilterCond]
         PlotConf["Flags"][prn] = PreproObsData[PreproIdx["STATUS"]][FilterCond]
 
-    PlotConf["Path"] = sys.argv[1] + '/OUT/PPVE/SAT/' + 'SAT_VISIBILITY_s6an_D011Y24.png'
+    PlotConf["Path"] = getPlotPath(PreproObsFile, 'SAT_VISIBILITY')
 
-    # Debugging output
-    generatePlot(PlotConf)
+    return [PlotConf]
 
 
 # Plot Number of Satellites
@@ -161,7 +173,7 @@ def plotNumSats(PreproObsFile, PreproObsData):
             1: PreproObsDataGalileoSmoothed.groupby(PreproIdx["SOD"])[PreproIdx["STATUS"]].count()
         },
 
-        "Path": sys.argv[1] + '/OUT/PPVE/SAT/' + 'NUMBER_OF_GAL_SATELLITES_s6an_D011Y24.png',
+        "Path": getPlotPath(PreproObsFile, 'NUMBER_OF_GAL_SATELLITES'),
     }
 
     PlotConfGPS = {
@@ -197,7 +209,7 @@ def plotNumSats(PreproObsFile, PreproObsData):
             1: PreproObsDataGPSSmoothed.groupby(PreproIdx["SOD"])[PreproIdx["STATUS"]].count()
         },
 
-        "Path": sys.argv[1] + '/OUT/PPVE/SAT/' + 'NUMBER_OF_GPS_SATELLITES_s6an_D011Y24.png',
+        "Path": getPlotPath(PreproObsFile, 'NUMBER_OF_GPS_SATELLITES'),
     }
 
     PlotConf = {
@@ -233,14 +245,13 @@ def plotNumSats(PreproObsFile, PreproObsData):
             1: PreproObsDataSmoothed.groupby(PreproIdx["SOD"])[PreproIdx["STATUS"]].count()
         },
 
-        "Path": sys.argv[1] + '/OUT/PPVE/SAT/' + 'NUMBER_OF_GPS+GAL_SATELLITES_s6an_D011Y24.png',
+        "Path": getPlotPath(PreproObsFile, 'NUMBER_OF_GPS+GAL_SATELLITES'),
 
     }
 
     data_array = [PlotConfGalileo, PlotConfGPS, PlotConf]
 
-    for conf in data_array:
-        generatePlot(conf)
+    return data_array
 
 
 # Plot Code IF - Code IF Smoothed
@@ -301,7 +312,7 @@ def plotIFIFSmoothed(PreproObsFile, PreproObsData):
             0: PreproObsDataGalileo[PreproIdx["STATUS"]],
         },
 
-        "Path": sys.argv[1] + '/OUT/PPVE/SAT/' + 'GAL_CODEIF_SMOOTHEDIF_s6an_D011Y24.png',
+        "Path": getPlotPath(PreproObsFile, 'GAL_CODEIF_SMOOTHEDIF'),
     }
 
     PlotConfGPS = {
@@ -348,13 +359,12 @@ def plotIFIFSmoothed(PreproObsFile, PreproObsData):
             0: PreproObsDataGPS[PreproIdx["STATUS"]],
         },
 
-        "Path": sys.argv[1] + '/OUT/PPVE/SAT/' + 'GPS_CODEIF_SMOOTHEDIF_s6an_D011Y24.png',
+        "Path": getPlotPath(PreproObsFile, 'GPS_CODEIF_SMOOTHEDIF'),
     }
 
     all_confs = [PlotConfGalileo, PlotConfGPS]
 
-    for conf in all_confs:
-        generatePlot(conf)
+    return all_confs
 
 
 # Plot C/N0
@@ -448,8 +458,7 @@ def plotCN0(PreproObsFile, PreproObsData, PlotTitle, PlotLabel):
 
         all_confs = [PlotConfGalileo, PlotConfGPS]
 
-        for conf in all_confs:
-            generatePlot(conf)
+        return all_confs
 
     elif PlotTitle == "CN0_F2" or  PlotLabel == "S2":
 
@@ -538,8 +547,7 @@ def plotCN0(PreproObsFile, PreproObsData, PlotTitle, PlotLabel):
 
         all_confs = [PlotConfGalileo, PlotConfGPS]
 
-        for conf in all_confs:
-            generatePlot(conf)
+        return all_confs
 
 
 # Plot Rejection Flags
@@ -573,7 +581,7 @@ def plotRejectionFlags(PreproObsFile, PreproObsData):
 
         "yLim" : [0, len(REJECTION_CAUSE_DESC.keys()) + 1],
         "yTicks" : range(1, len(REJECTION_CAUSE_DESC.keys()) + 1 ),
-        "yTicksLabels" : REJECTION_CAUSE_DESC.keys(), 
+        "yTicksLabels" : list(REJECTION_CAUSE_DESC.keys()), 
 
         "Marker" : ".",
         "LineWidth" : 0,
@@ -595,7 +603,7 @@ def plotRejectionFlags(PreproObsFile, PreproObsData):
         "yData": {0: aggregated_dataGalileo[PreproIdx["REJECT"]]},
         "zData" : {0: [int(convert_satlabel_to_prn(prn)) for prn in aggregated_dataGalileo[PreproIdx["PRN"]]]}, 
 
-        "Path": sys.argv[1] + '/OUT/PPVE/SAT/' + 'GAL_REJECTION_FLAGS_s6an_D011Y24.png',
+        "Path": getPlotPath(PreproObsFile, 'GAL_REJECTION_FLAGS'),
     }
 
     PlotConfGPS = {
@@ -611,7 +619,7 @@ def plotRejectionFlags(PreproObsFile, PreproObsData):
 
         "yLim" : [0, len(REJECTION_CAUSE_DESC.keys()) + 1],
         "yTicks" : range(1, len(REJECTION_CAUSE_DESC.keys()) + 1),
-        "yTicksLabels" : REJECTION_CAUSE_DESC.keys(), 
+        "yTicksLabels" : list(REJECTION_CAUSE_DESC.keys()), 
 
         "Marker" : ".",
         "LineWidth" : 0,
@@ -633,13 +641,12 @@ def plotRejectionFlags(PreproObsFile, PreproObsData):
         "yData": {0: aggregated_dataGPS[PreproIdx["REJECT"]]},
         "zData" : {0: [int(convert_satlabel_to_prn(prn)) for prn in aggregated_dataGPS[PreproIdx["PRN"]]]}, 
 
-        "Path": sys.argv[1] + '/OUT/PPVE/SAT/' + 'GPS_REJECTION_FLAGS_s6an_D011Y24.png',
+        "Path": getPlotPath(PreproObsFile, 'GPS_REJECTION_FLAGS'),
     }
 
     all_confs = [PlotConfGalileo, PlotConfGPS]
 
-    for conf in all_confs:
-        generatePlot(conf)
+    return all_confs
 
 # Plot Rates
 def plotRates(PreproObsFile, PreproObsData, PlotTitle, PlotLabel):
@@ -809,8 +816,7 @@ def plotRates(PreproObsFile, PreproObsData, PlotTitle, PlotLabel):
 
         all_confs = [PlotConfGalileo, PlotConfGalileoZoomed, PlotConfGPS, PlotConfGPSZoomed]
 
-        for conf in all_confs:
-            generatePlot(conf)
+        return all_confs
 
     elif PlotLabel == "PHASE_RATE":
 
@@ -977,8 +983,7 @@ def plotRates(PreproObsFile, PreproObsData, PlotTitle, PlotLabel):
 
         all_confs = [PlotConfGalileo, PlotConfGalileoZoomed, PlotConfGPS, PlotConfGPSZoomed]
 
-        for conf in all_confs:
-            generatePlot(conf)
+        return all_confs
     
     elif PlotLabel == "CODE_RATE_STEP":
         PreproObsDataGalileo = PreproObsData[PreproObsData[PreproIdx["PRN"]].str.startswith("E") & PreproObsData[PreproIdx["CODE_RATE_STEP"]] & valid_column == 1 ]
@@ -1144,8 +1149,7 @@ def plotRates(PreproObsFile, PreproObsData, PlotTitle, PlotLabel):
 
         all_confs = [PlotConfGalileo, PlotConfGalileoZoomed, PlotConfGPS, PlotConfGPSZoomed]
 
-        for conf in all_confs:
-            generatePlot(conf)
+        return all_confs
 
     elif PlotLabel == "PHASE_RATE_STEP":
 
@@ -1312,11 +1316,10 @@ def plotRates(PreproObsFile, PreproObsData, PlotTitle, PlotLabel):
 
         all_confs = [PlotConfGalileo, PlotConfGalileoZoomed, PlotConfGPS, PlotConfGPSZoomed]
 
-        for conf in all_confs:
-            generatePlot(conf)
+        return all_confs
 
 
-def generatePreproPlots(PreproObsFile):
+def generatePreproPlots(PreproObsFile, PreproObsData=None, Pool=None):
     
     # Purpose: generate output plots regarding Preprocessing results
 
@@ -1324,126 +1327,112 @@ def generatePreproPlots(PreproObsFile):
     # ==========
     # PreproObsFile: str
     #         Path to PREPRO OBS output file
+    # PreproObsData: DataFrame
+    #         PREPRO OBS data (see readPreproFile). If not provided,
+    #         it is read from the PREPRO OBS file
+    # Pool: concurrent.futures.Executor
+    #         Pool of plot workers (see initPlotWorker). If not 
+    #         provided, the plots are generated in this process
 
     # Returns
     # =======
-    # Nothing
+    # Futures: list
+    #         Futures of the plots submitted to the Pool
+
+
+    # Profile the plots (if activated)
+    Laps = profileLaps()
+
+    # Read all the PREPRO OBS file once, shared by all the plots
+    if PreproObsData is None:
+        PreproObsData = readPreproFile(PreproObsFile)
+        Laps.lap("READ_PREPRO")
+
+    Futures = []
 
 
     # Satellite Visibility
     # ----------------------------------------------------------
-    # Read the cols we need from PREPRO OBS file
-    PreproObsData_test = read_csv(PreproObsFile, delim_whitespace=True, skiprows=1, header=None)
-    PreproObsData = read_csv(PreproObsFile, delim_whitespace=True, skiprows=1, header=None,\
-    usecols=[PreproIdx["SOD"],PreproIdx["PRN"],PreproIdx["STATUS"],PreproIdx["ELEV"]])
-    
     print('INFO: Plot Satellite Visibility Periods ...')
 
     # Configure plot and call plot generation function
-    plotSatVisibility(PreproObsFile, PreproObsData)
+    Futures += generatePlots(plotSatVisibility(PreproObsFile, PreproObsData), Pool)
+    Laps.lap("SAT_VISIBILITY")
 
 
     # Number of satellites
     # ----------------------------------------------------------
-    # Read the cols we need from PREPRO OBS file
-    PreproObsData = read_csv(PreproObsFile, delim_whitespace=True, skiprows=1, header=None,\
-    usecols=[PreproIdx["SOD"],PreproIdx["PRN"],PreproIdx["STATUS"]])
-    
     print('INFO: Plot Number of Satellites ...')
 
     # Configure plot and call plot generation function
-    plotNumSats(PreproObsFile, PreproObsData)
+    Futures += generatePlots(plotNumSats(PreproObsFile, PreproObsData), Pool)
+    Laps.lap("NUM_SATS")
 
 
     # Code IF - Code IF Smoothed
     # ----------------------------------------------------------
-    # Read the cols we need from PREPRO OBS file
-    PreproObsData = read_csv(PreproObsFile, delim_whitespace=True, skiprows=1, header=None,\
-    usecols=[PreproIdx["SOD"],PreproIdx["REJECT"],PreproIdx["STATUS"],PreproIdx["ELEV"],\
-    PreproIdx["PRN"],PreproIdx["CODE_IF"],PreproIdx["SMOOTH_IF"]])
-    
     print('INFO: Plot Code IF - Code IF Smoothed ...')
 
     # Configure plot and call plot generation function
-    plotIFIFSmoothed(PreproObsFile, PreproObsData)
+    Futures += generatePlots(plotIFIFSmoothed(PreproObsFile, PreproObsData), Pool)
+    Laps.lap("IF_SMOOTHED")
 
 
     # C/N0
     # ----------------------------------------------------------
-    # Read the cols we need from PREPRO OBS file
-    PreproObsData = read_csv(PreproObsFile, delim_whitespace=True, skiprows=1, header=None,\
-    usecols=[PreproIdx["SOD"],PreproIdx["S1"],PreproIdx["S2"],\
-        PreproIdx["ELEV"], PreproIdx["PRN"]])
-    
     print('INFO: Plot C/N0...')
 
     # Configure plot and call plot generation function
-    plotCN0(PreproObsFile, PreproObsData, 'CN0_F1', 'S1')
+    Futures += generatePlots(plotCN0(PreproObsFile, PreproObsData, 'CN0_F1', 'S1'), Pool)
+    Laps.lap("CN0_F1")
 
     # Configure plot and call plot generation function
-    plotCN0(PreproObsFile, PreproObsData, 'CN0_F2', 'S2')
+    Futures += generatePlots(plotCN0(PreproObsFile, PreproObsData, 'CN0_F2', 'S2'), Pool)
+    Laps.lap("CN0_F2")
 
 
     # Rejection Flags
     # ----------------------------------------------------------
-    # Read the cols we need from PREPRO OBS file
-    PreproObsData = read_csv(PreproObsFile, delim_whitespace=True, skiprows=1, header=None,\
-    usecols=[PreproIdx["SOD"],PreproIdx["PRN"],PreproIdx["REJECT"]])
-    
     print('INFO: Plot Rejection Flags ...')
 
     # Configure plot and call plot generation function
-    plotRejectionFlags(PreproObsFile, PreproObsData)
+    Futures += generatePlots(plotRejectionFlags(PreproObsFile, PreproObsData), Pool)
+    Laps.lap("REJECTION_FLAGS")
 
 
     # Code Rate
     # ----------------------------------------------------------
-    # Read the cols we need from PREPRO OBS file
-    PreproObsData = read_csv(PreproObsFile, delim_whitespace=True, skiprows=1, header=None,\
-    usecols=[PreproIdx["SOD"],PreproIdx["VALID"],PreproIdx["CODE_RATE"],\
-        PreproIdx["ELEV"], PreproIdx["PRN"]])
-    
     print('INFO: Plot Code Rate ...')
 
     # Configure plot and call plot generation function
-    plotRates(PreproObsFile, PreproObsData, 'Code Rate', 'CODE_RATE')
+    Futures += generatePlots(plotRates(PreproObsFile, PreproObsData, 'Code Rate', 'CODE_RATE'), Pool)
+    Laps.lap("CODE_RATE")
 
 
     # Phase Rate
     # ----------------------------------------------------------
-    # Read the cols we need from PREPRO OBS file
-    PreproObsData = read_csv(PreproObsFile, delim_whitespace=True, skiprows=1, header=None,\
-    usecols=[PreproIdx["SOD"],PreproIdx["VALID"],PreproIdx["PHASE_RATE"],\
-        PreproIdx["ELEV"], PreproIdx["PRN"]])
-
     print('INFO: Plot Phase Rate ...')
 
     # Configure plot and call plot generation function
-    plotRates(PreproObsFile, PreproObsData, 'Phase Rate', 'PHASE_RATE')
+    Futures += generatePlots(plotRates(PreproObsFile, PreproObsData, 'Phase Rate', 'PHASE_RATE'), Pool)
+    Laps.lap("PHASE_RATE")
     
 
     # Code Rate Step
     # ----------------------------------------------------------
-    # Read the cols we need from PREPRO OBS file
-    PreproObsData = read_csv(PreproObsFile, delim_whitespace=True, skiprows=1, header=None,\
-    usecols=[PreproIdx["SOD"],PreproIdx["VALID"],PreproIdx["CODE_RATE_STEP"],\
-        PreproIdx["ELEV"], PreproIdx["PRN"]])
-    
     print('INFO: Plot Code Rate Step...')
 
     # Configure plot and call plot generation function
-    plotRates(PreproObsFile, PreproObsData, 'Code Rate Step', 'CODE_RATE_STEP')
+    Futures += generatePlots(plotRates(PreproObsFile, PreproObsData, 'Code Rate Step', 'CODE_RATE_STEP'), Pool)
+    Laps.lap("CODE_RATE_STEP")
 
 
     # Phase Rate Step
     # ----------------------------------------------------------
-    # Read the cols we need from PREPRO OBS file
-    PreproObsData = read_csv(PreproObsFile, delim_whitespace=True, skiprows=1, header=None,\
-    usecols=[PreproIdx["SOD"],PreproIdx["VALID"],PreproIdx["PHASE_RATE_STEP"],\
-        PreproIdx["ELEV"], PreproIdx["PRN"]])
-    
     print('INFO: Plot Phase Rate Step...')
 
     # Configure plot and call plot generation function
-    plotRates(PreproObsFile, PreproObsData, 'Phase Rate Step', 'PHASE_RATE_STEP')
+    Futures += generatePlots(plotRates(PreproObsFile, PreproObsData, 'Phase Rate Step', 'PHASE_RATE_STEP'), Pool)
+    Laps.lap("PHASE_RATE_STEP")
 
+    return Futures
@@ -11,7 +11,9 @@
 #   Copyright 2024 GNSS Academy
 #
 # Usage:
-#   Sentus.py $SCEN_PATH
+#   Sentus.py $SCEN_PATH [--jobs N] [--windows N] [--shards N] [--plot-jobs N]
+#             [--io-queue N] [--checkpoint] [--resume] [--cache DIR] [--cache-size MB]
+#             [--profile] [--profile-out REPORT.json|REPORT.csv]
 ########################################################################
 
 import sys, os
@@ -23,19 +25,44 @@ sys.path.insert(0, Common)
 
 # Import External and Internal functions and Libraries
 #----------------------------------------------------------------------
-from collections import OrderedDict
+import io
+import traceback
+from argparse import ArgumentParser
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from contextlib import redirect_stdout, redirect_stderr
 from yaml import dump
 from COMMON import GnssConstants as Const
 from InputOutput import readConf
 from InputOutput import processConf
 from InputOutput import createOutputFile
-from InputOutput import readObsEpoch
-from InputOutput import generatePreproFile
+from InputOutput import findObsFile
+from InputOutput import readObsFile
+from InputOutput import iterObsEpochs
+from InputOutput import writePreproEpochs
+from InputOutput import generatePreproFileArrays
+from InputOutput import convertPreproArrays2DataFrame
+from InputOutput import PreproFileWriter
+from InputOutput import PreproBinWriter
+from InputOutput import readPreproBinFile
+from InputOutput import readPreproBinArrays
+from InputOutput import getPreproCacheParams
+from InputOutput import getPreproCacheFiles
+from InputOutput import getObsSelection
 from InputOutput import PreproHdr
-from InputOutput import CSNEPOCHS, CSNPOINTS
+from InputOutput import PREPRO_COMPRESSED_EXT
 from InputOutput import ObsIdxC, ObsIdxP
-from Preprocessing import runPreprocessing
+from Preprocessing import preprocessEpochs
+from Preprocessing import runPreprocessingArcs
+from Preprocessing import runPreprocessingWindows
+from PREPRO.preproState import PreproState, savePreproState, loadPreproState
+from PREPRO.preproCheckpoint import PreproCheckpoint
 from PreprocessingPlots import generatePreproPlots
+from COMMON.Plots import initPlotWorker
+from COMMON.Profiling import Profiler, profileStage
+from COMMON.Streams import readAhead, writeBehind
+from COMMON.Cache import ResultCache
 from COMMON.Dates import convertJulianDay2YearMonthDay
 from COMMON.Dates import convertYearMonthDay2Doy
 
@@ -44,37 +71,130 @@ from COMMON.Dates import convertYearMonthDay2Doy
 #----------------------------------------------------------------------
 
 def displayUsage():
-    sys.stderr.write("ERROR: Please provide path to SCENARIO as a unique argument\n")
+    sys.stderr.write("ERROR: Please provide path to SCENARIO as first argument\n")
+    sys.stderr.write("Usage: Sentus.py $SCEN_PATH [--jobs N] [--windows N] [--shards N] "
+        "[--plot-jobs N] [--io-queue N] [--checkpoint] [--resume] [--cache DIR] [--cache-size MB] "
+        "[--profile] [--profile-out REPORT.json|REPORT.csv]\n")
+
+def parseOptions(Args):
+
+    # Purpose: parse the command line options following the SCENARIO path
+
+    # Parameters
+    # ==========
+    # Args: list
+    #         Command line arguments after the SCENARIO path
+
+    # Returns
+    # =======
+    # Options: argparse.Namespace
+    #         Command line options
+
+    Parser = ArgumentParser(prog="Sentus.py $SCEN_PATH")
+    Parser.add_argument("--jobs", dest="Jobs", type=int, default=1,
+        help="Number of days processed in parallel (default 1)")
+    Parser.add_argument("--windows", dest="Windows", type=int, default=1,
+        help="Split each day in N time windows preprocessed in parallel "
+        "processes, with the same results as the serial preprocessing "
+        "(default 1, no windows). Only used by the EPOCH engine")
+    Parser.add_argument("--shards", dest="Shards", type=int, default=1,
+        help="Split the satellites of each day (or time window) in N shards "
+        "preprocessed in parallel processes, with the same results as the "
+        "serial preprocessing (default 1, no shards). Only used by the EPOCH "
+        "engine")
+    Parser.add_argument("--plot-jobs", dest="PlotJobs", type=int, default=1,
+        help="Number of processes generating the figures while the "
+        "next days are processed (default 1, figures generated after each "
+        "day). Only used if the days are not processed in parallel")
+    Parser.add_argument("--io-queue", dest="IoQueue", type=int, default=0,
+        help="Read the OBS epochs ahead and write the PREPRO outputs behind "
+        "in background threads, with queues of N epochs (default 0, no I/O "
+        "threads). Only used by the EPOCH engine")
+    Parser.add_argument("--checkpoint", dest="Checkpoint", action="store_true",
+        help="Save a checkpoint of the preprocessing state and outputs at "
+        "the end of each PREPRO OBS file chunk (see PREPRO_COMPRESSION), "
+        "removed when the day is completed. Only used by the EPOCH engine")
+    Parser.add_argument("--resume", dest="Resume", action="store_true",
+        help="Skip the days already completed and resume the others from "
+        "their last checkpoint, if any. Implies --checkpoint")
+    Parser.add_argument("--cache", dest="CacheDir", default=None, metavar="DIR",
+        help="Cache the PREPRO results of each OBS file and configuration in "
+        "DIR, and reuse them instead of preprocessing the same OBS file with "
+        "the same configuration and Preprocessing code again")
+    Parser.add_argument("--cache-size", dest="CacheSize", type=float, default=2048,
+        metavar="MB", help="Maximum size of the cache, the least recently "
+        "used results are evicted (default 2048 MB)")
+    Parser.add_argument("--profile", dest="Profile", action="store_true",
+        help="Measure the wall and CPU time and the number of calls of the "
+        "processing stages per day and display them at the end")
+    Parser.add_argument("--profile-out", dest="ProfileOut", default=None,
+        metavar="PATH", help="Write the profiling report in a JSON file "
+        "(or CSV if the extension is .csv). Implies --profile")
+    Options = Parser.parse_args(Args)
+
+    if Options.ProfileOut is not None:
+        Options.Profile = True
+
+    if Options.Resume:
+        Options.Checkpoint = True
+
+    if Options.Jobs < 1 or Options.PlotJobs < 1 or Options.Windows < 1 or Options.Shards < 1:
+        sys.stderr.write("ERROR: --jobs, --windows, --shards and --plot-jobs must be "
+            "positive integers\n")
+        sys.exit(-1)
+
+    if Options.IoQueue < 0:
+        sys.stderr.write("ERROR: --io-queue must be a non-negative integer\n")
+        sys.exit(-1)
+
+    if Options.CacheSize <= 0:
+        sys.stderr.write("ERROR: --cache-size must be positive\n")
+        sys.exit(-1)
+
+    return Options
+
+# End of parseOptions()
+
+def processDay(Scen, Conf, Jd, PlotPool=None, Plots=True, IoQueue=0,
+Checkpoint=False, Resume=False, Cache=None, Windows=1, Shards=1):
+
+    # Purpose: preprocess the OBS file of one day and generate its
+    #          PREPRO OBS file and figures (if requested)
+
+    # Parameters
+    # ==========
+    # Scen: str
+    #         Path to SCENARIO
+    # Conf: dict
+    #         Configuration dictionary
+    # Jd: int
+    #         Julian Day to process
+    # PlotPool: concurrent.futures.Executor
+    #         Pool of plot workers. If not provided, the figures are
+    #         generated before returning
+    # Plots: bool
+    #         Generate the PREPRO figures (if PREPRO outputs are activated)
+    # IoQueue: int
+    #         Number of epochs read ahead and written behind in
+    #         background threads (0 to read and write in this thread)
+    # Checkpoint: bool
+    #         Save checkpoints to resume the day (EPOCH engine only)
+    # Resume: bool
+    #         Skip the day if it is completed or resume it from its
+    #         last checkpoint
+    # Cache: ResultCache
+    #         Cache of the PREPRO results (optional, not used with
+    #         continuous preprocessing)
+    # Windows, Shards: int
+    #         Number of time windows of the day, and of shards of
+    #         satellites of each window, preprocessed in parallel
+    #         (EPOCH engine only, without checkpoints)
+
+    # Returns
+    # =======
+    # PlotFutures: list
+    #         Futures of the figures submitted to the PlotPool
 
-#######################################################
-# MAIN BODY
-#######################################################
-
-# Check InputOutput Arguments
-if len(sys.argv) != 2:
-    displayUsage()
-    sys.exit()
-
-# Extract the arguments
-Scen = sys.argv[1]
-
-# Select the Configuratiun file name
-CfgFile = Scen + '/CFG/sentus.cfg'
-
-# Read conf file
-Conf = readConf(CfgFile)
-
-# Process Configuration Parameters
-Conf = processConf(Conf)
-
-# Print header
-print( '------------------------------------')
-print( '--> RUNNING SENTUS:')
-print( '------------------------------------')
-
-# Loop over Julian Days in simulation
-#-----------------------------------------------------------------------
-for Jd in range(Conf["INI_DATE_JD"], Conf["END_DATE_JD"] + 1):
     # Compute Year, Month and Day in order to build input file name
     Year, Month, Day = convertJulianDay2YearMonthDay(Jd)
 
@@ -84,13 +204,21 @@ for Jd in range(Conf["INI_DATE_JD"], Conf["END_DATE_JD"] + 1):
     # Display Message
     print( '\n*** Processing Day of Year: ' + str(Doy) + ' ... ***')
 
+    # Profile the stages of the day (if activated)
+    Profiler.Day = "Y%02dD%03d" % (Year % 100, Doy)
+
     # Define the full path and name to the OBS INFO file to read
     # ObsFile = Scen + \
     #     '/INP/OBS/' + "OBS_%s_Y%02dD%03d.dat" % \
     #         (Conf['SAT_ACRONYM'], Year % 100, Doy)
-    ObsFile = Scen + \
+    # Find the OBS file or its compressed version (.gz, .bz2, .xz or .zst)
+    ObsFile = findObsFile(Scen + \
         '/INP/OBS/' + "OBS_%s_Y%02dD%03d.dat.mod" % \
-            (Conf['SAT_ACRONYM'], Year % 100, Doy)
+            (Conf['SAT_ACRONYM'], Year % 100, Doy))
+
+    # Directory of the OBS files indexes, used to read only the
+    # selected records (see getObsSelection)
+    ObsIdxDir = Scen + '/OUT/OBS_IDX'
 
     # Display Message
     print("INFO: Reading file: %s..." %
@@ -114,96 +242,421 @@ for Jd in range(Conf["INI_DATE_JD"], Conf["END_DATE_JD"] + 1):
     # sys.exit()
 
     # If Preprocessing outputs are activated
-    if Conf["PREPRO_OUT"] == 1:
+    if Conf["PREPRO_OUT"] >= 1:
         # Define the full path and name to the output PREPRO OBS file
         PreproObsFile = Scen + \
             '/OUT/PPVE/' + "PREPRO_OBS_%s_Y%02dD%03d.dat" % \
                 (Conf['SAT_ACRONYM'], Year % 100, Doy)
 
+        # Define the full path and name to the output PREPRO OBS binary file
+        PreproBinObsFile = os.path.splitext(PreproObsFile)[0] + ".npy"
+
+        # If Preprocessing outputs compression is activated
+        Compression, ChunkSeconds = Conf["PREPRO_COMPRESSION"]
+        if Compression != "NONE":
+            PreproObsFile = PreproObsFile + PREPRO_COMPRESSED_EXT[Compression]
+
+        # Checkpoints of the day (see PreproCheckpoint)
+        Checkpoints = PreproCheckpoint(PreproObsFile + ".ckpt", Conf, ChunkSeconds)
+
+        # If resuming, skip the day if it was completed (its index is
+        # written when the outputs are closed and the checkpoint removed)
+        if Resume and os.path.isfile(PreproObsFile) and \
+        os.path.isfile(PreproObsFile + ".idx") and not os.path.isfile(Checkpoints.Path):
+            # Display Message
+            print("INFO: Day already processed: %s" % PreproObsFile)
+            return []
+
+    # Define the full path and name to the preprocessing state at the
+    # end of the day and the previous one (continuous preprocessing)
+    StateFile = Scen + \
+        '/OUT/PPVE/' + "PREPRO_STATE_%s_Y%02dD%03d.pkl" % \
+            (Conf['SAT_ACRONYM'], Year % 100, Doy)
+    PrevYear, PrevMonth, PrevDay = convertJulianDay2YearMonthDay(Jd - 1)
+    PrevStateFile = Scen + \
+        '/OUT/PPVE/' + "PREPRO_STATE_%s_Y%02dD%03d.pkl" % \
+            (Conf['SAT_ACRONYM'], PrevYear % 100, 
+            convertYearMonthDay2Doy(PrevYear, PrevMonth, PrevDay))
+
+    # If the results cache is activated, look for the results of the
+    # same OBS file and configuration
+    CacheKey = None
+    CachedFile = None
+    if Cache is not None and Conf["PREPRO_OUT"] >= 1 and Conf["PREPRO_CONTINUOUS"] == 0:
+        with profileStage("CACHE"):
+            CacheKey = Cache.getKey(getPreproCacheFiles(ObsFile), getPreproCacheParams(Conf))
+            CachedFile = Cache.get(CacheKey, ".npy")
+
+    # Initialize Variables
+    # Preprocessing state of all the satellites (with the GF buffers)
+    PrevPreproObsInfo = None
+
+    # If resuming, load the state of the last checkpoint (if any)
+    if Conf["PREPRO_OUT"] >= 1 and Resume and Conf["PREPRO_ENGINE"] == "EPOCH" and \
+    Windows == Shards == 1 and CachedFile is None:
+        PrevPreproObsInfo = Checkpoints.load()
+
+    # If continuous preprocessing is activated, continue from the
+    # state at the end of the previous day (if it was processed)
+    if PrevPreproObsInfo is None and Conf["PREPRO_CONTINUOUS"] == 1:
+        PrevPreproObsInfo = loadPreproState(PrevStateFile, Conf)
+
+    if PrevPreproObsInfo is None:
+        PrevPreproObsInfo = PreproState(Conf)
+
+    # If Preprocessing outputs are activated
+    if Conf["PREPRO_OUT"] >= 1:
+        Positions = Checkpoints.Positions
+        if Positions is None:
+            Positions = {"OFFSET": None, "RECORDS": None}
+
+            # Discard the checkpoints of previous runs
+            Checkpoints.remove()
+
+        # The results of a resumed day are not cached (they are not
+        # complete in the binary file)
+        else:
+            CacheKey = None
+
+        # If Preprocessing binary outputs are activated
+        fpreprobin = None
+        if Conf["PREPRO_OUT"] == 2:
+            # Create binary output file
+            fpreprobin = PreproBinWriter(PreproBinObsFile, Positions["RECORDS"])
+
+        # Otherwise, write the binary records to be cached in a temporary file
+        elif CacheKey is not None and CachedFile is None:
+            fpreprobin = PreproBinWriter(Cache.getTempPath(CacheKey, ".npy"))
+
         # Create output file
-        fpreprobs = createOutputFile(PreproObsFile, PreproHdr)
+        fpreprobs = PreproFileWriter(createOutputFile(PreproObsFile, PreproHdr,
+            Compression, Positions["OFFSET"]), fpreprobin, ChunkSeconds=ChunkSeconds,
+            Checkpoint=Checkpoints if Checkpoint and \
+            Conf["PREPRO_ENGINE"] == "EPOCH" and Windows == Shards == 1 else None)
+        if Checkpoints.Positions is not None:
+            fpreprobs.resume(Checkpoints.Positions)
 
+    # Preprocessing results for the plots (read from PREPRO OBS file if not set)
+    PreproObsDf = None
 
-    # Initialize Variables
-    EndOfFile = False
-    ObsInfo = [None]
-    PrevPreproObsInfo = {}
-    for const in ['G', 'E']:
-        for prn in range(1, Const.MAX_NUM_SATS_CONSTEL + 1):
-            PrevPreproObsInfo["%s%02d" % (const,prn)] = {
-                "PrevEpoch": 86400,                                          # Previous SoD
-
-                "PrevElev": [Const.NAN] * 2,                                 # Previous two elevations
-
-                "ResetHatchFilter": 1,                                       # Flag to reset Hatch filter
-                "Ksmooth": 0,                                                # Hatch filter K
-                "PrevSmooth": 0,                                             # Previous Smooth Observable
-                "IF_P_Prev": 0,                                              # Previous IF of the phases
-                
-                "PrevL1": Const.NAN,                                         # Previous L1
-                "PrevPhaseRateL1": Const.NAN,                                # Previous Phase Rate
-                "PrevC1": Const.NAN,                                         # Previous C1
-                "PrevRangeRateL1": Const.NAN,                                # Previous Code Rate
-                
-                "PrevL2": Const.NAN,                                         # Previous L1
-                "PrevPhaseRateL2": Const.NAN,                                # Previous Phase Rate
-                "PrevC2": Const.NAN,                                         # Previous C2
-                "PrevRangeRateL2": Const.NAN,                                # Previous Code Rate
-
-                "CycleSlipBuffIdx": 0,                                         # Index of CS buffer
-                "CycleSlipFlagIdx": 0,                                         # Index of CS flag array
-                # CYCLE_SLIPS  1  0.5  3  7  2
-                "GF_L_Prev": [0.0] * int(Conf["CYCLE_SLIPS"][CSNPOINTS]),      # Array with previous GF carrier phase observables
-                "GF_Epoch_Prev": [0.0] * int(Conf["CYCLE_SLIPS"][CSNPOINTS]),  # Array with previous epochs
-                "CycleSlipFlags": [0.0] * int(Conf["CYCLE_SLIPS"][CSNEPOCHS]), # Array with last cycle slips flags
-                "CycleSlipDetectFlag": 0,                                      # Flag indicating if a cycle slip has been detected
-
-            } # End of SatPreproObsInfo
-
-    # Open OBS file
-    with open(ObsFile, 'r') as fobs:
-
-        # LOOP over all Epochs of OBS file
-        # ----------------------------------------------------------
-        while not EndOfFile:
+    # Figures submitted to the plot workers
+    PlotFutures = []
 
-            # If ObsInfo is not empty
-            if ObsInfo != []:
+    # If the results are cached, write them instead of preprocessing
+    if CachedFile is not None:
+        # Display Message
+        print("INFO: Reading cached PREPRO results: %s..." % CachedFile)
 
-                # Read Only One Epoch
-                ObsInfo = readObsEpoch(fobs)
+        with profileStage("READ_CACHE"):
+            PreproObsData = readPreproBinArrays(CachedFile)
 
-                # If ObsInfo is empty, exit loop
-                if ObsInfo == []:
-                    break
+        # Generate output file
+        with profileStage("WRITE_PREPRO"):
+            generatePreproFileArrays(fpreprobs, PreproObsData)
 
-                # Preprocess OBS measurements
-                # ----------------------------------------------------------
-                PreproObsInfo = runPreprocessing(Conf, ObsInfo, PrevPreproObsInfo)
+        # Keep the results in memory for the plots
+        PreproObsDf = convertPreproArrays2DataFrame(PreproObsData)
 
-                # If PREPRO outputs are requested
-                if Conf["PREPRO_OUT"] == 1:
-                    # Generate output file
-                    generatePreproFile(fpreprobs, PreproObsInfo)
-                # break
+    # If whole day preprocessing over the satellites arcs, or by
+    # time windows or shards of satellites in parallel, is selected
+    elif Conf["PREPRO_ENGINE"] == "ARCS" or Windows > 1 or Shards > 1:
+        # Read all the OBS file at once (the selected records)
+        with profileStage("READ_OBS"):
+            ObsData = readObsFile(ObsFile, *getObsSelection(Conf), IdxDir=ObsIdxDir)
 
-    # If PREPRO outputs are requested
-    if Conf["PREPRO_OUT"] == 1:
-        # Close PREPRO output file
-        fpreprobs.close()
+        # Preprocess OBS measurements
+        # ----------------------------------------------------------
+        with profileStage("PREPRO"):
+            if Conf["PREPRO_ENGINE"] == "ARCS":
+                PreproObsData = runPreprocessingArcs(Conf, ObsData)
+            else:
+                PreproObsData = runPreprocessingWindows(Conf, ObsData, Windows, Shards)
+
+        # If PREPRO outputs are requested
+        if Conf["PREPRO_OUT"] >= 1:
+            # Generate output file
+            with profileStage("WRITE_PREPRO"):
+                generatePreproFileArrays(fpreprobs, PreproObsData)
+
+            # Keep the results in memory for the plots
+            PreproObsDf = convertPreproArrays2DataFrame(PreproObsData)
+
+    # Otherwise, stream all Epochs of OBS file through the
+    # preprocessing stages, one epoch at a time
+    # ----------------------------------------------------------
+    else:
+        # Read the OBS file by chunks, epoch by epoch (the selected records)
+        SodStart, SodEnd, Prns, Rate = getObsSelection(Conf)
+
+        # If resuming, do not read the epochs processed before the
+        # checkpoint (the last one is skipped by checkpointEpochs)
+        if Conf["PREPRO_OUT"] >= 1 and Checkpoints.ResumeSod is not None:
+            SodStart = max(SodStart, Checkpoints.ResumeSod)
+
+        PreproStream = iterObsEpochs(ObsFile, SodStart=SodStart, SodEnd=SodEnd, 
+            Prns=Prns, Rate=Rate, IdxDir=ObsIdxDir)
+        if IoQueue > 0:
+            PreproStream = readAhead(PreproStream, IoQueue)
+
+        # Copy the preprocessing state at the checkpoints (if requested)
+        if Conf["PREPRO_OUT"] >= 1 and Checkpoint:
+            PreproStream = Checkpoints.checkpointEpochs(PreproStream, PrevPreproObsInfo)
+
+        # Preprocess OBS measurements
+        # ----------------------------------------------------------
+        PreproStream = preprocessEpochs(Conf, PreproStream, PrevPreproObsInfo)
+
+        # If PREPRO outputs are requested
+        if Conf["PREPRO_OUT"] >= 1:
+            # Generate output file
+            if IoQueue > 0:
+                PreproStream = writeBehind(PreproStream,
+                partial(writePreproEpochs, fpreprobs), IoQueue)
+            else:
+                PreproStream = writePreproEpochs(fpreprobs, PreproStream)
+
+        # Run the stream
+        deque(PreproStream, maxlen=0)
+
+        # Save the state at the end of the day for the next one
+        if Conf["PREPRO_CONTINUOUS"] == 1:
+            savePreproState(StateFile, Conf, PrevPreproObsInfo)
 
+    # If PREPRO outputs are requested
+    if Conf["PREPRO_OUT"] >= 1:
+        # Close PREPRO output files
+        with profileStage("WRITE_PREPRO"):
+            fpreprobs.close()
+
+        # The day is completed
+        Checkpoints.remove()
+
+        # Store the results in the cache
+        if CacheKey is not None and CachedFile is None:
+            with profileStage("CACHE"):
+                if Conf["PREPRO_OUT"] == 2:
+                    Cache.put(CacheKey, ".npy", PreproBinObsFile)
+                else:
+                    Cache.put(CacheKey, ".npy", fpreprobin.f.name, Move=True)
+
+        # Read the PREPRO binary output file back for the plots
+        if Conf["PREPRO_OUT"] == 2 and PreproObsDf is None and Plots:
+            with profileStage("READ_PREPRO"):
+                PreproObsDf = readPreproBinFile(PreproBinObsFile)
+
+    # If PREPRO figures are requested
+    if Conf["PREPRO_OUT"] >= 1 and Plots:
         # Display Message
         print("INFO: Reading file: %s and generating PREPRO figures..." %
         PreproObsFile)
 
         # Generate Preprocessing plots
-        generatePreproPlots(PreproObsFile)
+        with profileStage("PLOTS"):
+            PlotFutures = generatePreproPlots(PreproObsFile, PreproObsDf, PlotPool)
+
+    return PlotFutures
+
+# End of processDay()
+
+def runDay(Scen, Conf, Jd, Profile=False, IoQueue=0, Checkpoint=False, Resume=False,
+Cache=None, Windows=1, Shards=1):
+
+    # Purpose: process one day in a worker process capturing its log,
+    #          exit code and profiling records
+
+    # Parameters
+    # ==========
+    # Profile: bool
+    #         Profile the processing stages of the day
+    # IoQueue: int
+    #         Number of epochs read ahead and written behind
+    # Checkpoint, Resume: bool
+    #         Save checkpoints and resume the day (see processDay)
+    # Cache: ResultCache
+    #         Cache of the PREPRO results (optional)
+    # Windows, Shards: int
+    #         Number of time windows and shards preprocessed in parallel
+
+    # Returns
+    # =======
+    # Jd: int
+    #         Julian Day processed
+    # ExitCode: int
+    #         0 if the day was processed successfully
+    # Log: str
+    #         Messages displayed while processing the day
+    # Records: dict
+    #         Profiling records of the day (see StageProfiler)
+
+    Log = io.StringIO()
+    ExitCode = 0
+
+    # The worker may have processed other days before
+    Profiler.Enabled = Profile
+    Profiler.Records.clear()
+
+    with redirect_stdout(Log), redirect_stderr(Log):
+        try:
+            processDay(Scen, Conf, Jd, IoQueue=IoQueue, Checkpoint=Checkpoint,
+                Resume=Resume, Cache=Cache, Windows=Windows, Shards=Shards)
+
+        except SystemExit as Exit:
+            if Exit.code is None:
+                ExitCode = 0
+            elif isinstance(Exit.code, int):
+                ExitCode = Exit.code
+            else:
+                print(Exit.code)
+                ExitCode = 1
+
+        except Exception:
+            traceback.print_exc()
+            ExitCode = 1
+
+    return Jd, ExitCode, Log.getvalue(), Profiler.Records
+
+# End of runDay()
 
-# End of JD loop
+#######################################################
+# MAIN BODY
+#######################################################
 
-print( '\n------------------------------------')
-print( '--> END OF SENTUS ANALYSIS')
-print( '------------------------------------')
+if __name__ == "__main__":
+
+    # Check InputOutput Arguments
+    # (the SCENARIO path must be the first one, see PreprocessingPlots)
+    if len(sys.argv) < 2 or sys.argv[1].startswith("-"):
+        displayUsage()
+        sys.exit()
+
+    # Extract the arguments
+    Scen = sys.argv[1]
+    Options = parseOptions(sys.argv[2:])
+
+    # Select the Configuratiun file name
+    CfgFile = Scen + '/CFG/sentus.cfg'
+
+    # Profile the processing stages (if requested)
+    Profiler.Enabled = Options.Profile
+
+    with profileStage("CONF"):
+        # Read conf file
+        Conf = readConf(CfgFile)
+
+        # Process Configuration Parameters
+        Conf = processConf(Conf)
+
+    # Print header
+    print( '------------------------------------')
+    print( '--> RUNNING SENTUS:')
+    print( '------------------------------------')
+
+    # Julian Days in simulation
+    Days = list(range(Conf["INI_DATE_JD"], Conf["END_DATE_JD"] + 1))
+
+    # Days that could not be processed
+    FailedDays = []
+
+    # Cache of the PREPRO results (if requested)
+    Cache = None
+    if Options.CacheDir is not None:
+        Cache = ResultCache(Options.CacheDir, int(Options.CacheSize * 1024 * 1024))
+
+        if Conf["PREPRO_CONTINUOUS"] == 1:
+            sys.stderr.write("WARNING: The PREPRO results cache is not used with "
+                "PREPRO_CONTINUOUS\n")
+
+    # Each day continues from the previous one in continuous preprocessing
+    if Options.Jobs > 1 and Conf["PREPRO_CONTINUOUS"] == 1:
+        sys.stderr.write("WARNING: Days are processed sequentially with "
+            "PREPRO_CONTINUOUS (--jobs ignored)\n")
+        Options.Jobs = 1
+
+    # Time windows and shards are only preprocessed in parallel by the
+    # EPOCH engine, from the start of the day (and without checkpoints)
+    if Options.Windows > 1 or Options.Shards > 1:
+        if Conf["PREPRO_ENGINE"] != "EPOCH" or Conf["PREPRO_CONTINUOUS"] == 1:
+            sys.stderr.write("WARNING: Days are not split in time windows or shards "
+                "with PREPRO_ENGINE ARCS or PREPRO_CONTINUOUS (--windows and --shards "
+                "ignored)\n")
+            Options.Windows = 1
+            Options.Shards = 1
+        elif Options.Checkpoint:
+            sys.stderr.write("WARNING: Checkpoints are not saved with --windows "
+                "or --shards\n")
+
+    # If parallel processing is requested, run each day in a worker process
+    #-----------------------------------------------------------------------
+    if Options.Jobs > 1 and len(Days) > 1:
+        with ProcessPoolExecutor(max_workers=min(Options.Jobs, len(Days))) as Pool:
+            Futures = [Pool.submit(runDay, Scen, Conf, Jd, Options.Profile,
+                Options.IoQueue, Options.Checkpoint, Options.Resume, Cache,
+                Options.Windows, Options.Shards) for Jd in Days]
+
+            # Display the logs in days order
+            for Jd, Future in zip(Days, Futures):
+                try:
+                    Jd, ExitCode, Log, Records = Future.result()
+                    Profiler.merge(Records)
+                except Exception as Error:
+                    ExitCode, Log = 1, "ERROR: worker failed: %s\n" % Error
+
+                sys.stdout.write(Log)
+                sys.stdout.flush()
+
+                if ExitCode != 0:
+                    FailedDays.append((Jd, ExitCode))
+
+    # Otherwise, loop over Julian Days in simulation
+    #-----------------------------------------------------------------------
+    else:
+        # Generate the figures in a pool of headless plot workers
+        # while the next days are processed (if requested)
+        PlotPool = None
+        if Options.PlotJobs > 1:
+            PlotPool = ProcessPoolExecutor(max_workers=Options.PlotJobs,
+                initializer=initPlotWorker)
+
+        PlotFutures = []
+        for Jd in Days:
+            PlotFutures += [(Jd, Future) for Future in processDay(Scen, Conf, Jd, PlotPool,
+                IoQueue=Options.IoQueue, Checkpoint=Options.Checkpoint,
+                Resume=Options.Resume, Cache=Cache, Windows=Options.Windows,
+                Shards=Options.Shards)]
+
+        # Wait for the figures
+        Profiler.Day = "-"
+        if PlotPool is not None:
+            print("\nINFO: Waiting for the PREPRO figures...")
+            with profileStage("WAIT_PLOTS"):
+                for Jd, Future in PlotFutures:
+                    try:
+                        Future.result()
+                    except Exception as Error:
+                        sys.stderr.write("ERROR: Figure generation failed: %s\n" % Error)
+                        if (Jd, 1) not in FailedDays:
+                            FailedDays.append((Jd, 1))
+                PlotPool.shutdown()
+
+    # End of JD loop
+
+    print( '\n------------------------------------')
+    print( '--> END OF SENTUS ANALYSIS')
+    print( '------------------------------------')
+
+    # Report the profiling of the processing stages
+    if Options.Profile:
+        Profiler.printReport()
+        if Options.ProfileOut is not None:
+            Profiler.writeReport(Options.ProfileOut)
+
+    # Report the days that could not be processed
+    if FailedDays:
+        for Jd, ExitCode in FailedDays:
+            Year, Month, Day = convertJulianDay2YearMonthDay(Jd)
+            sys.stderr.write("ERROR: Day of Year %d of %d failed with exit code %d\n" % 
+                (convertYearMonthDay2Doy(Year, Month, Day), Year, ExitCode))
+        sys.exit(-1)
 
 #######################################################
 # End of Sentus.py
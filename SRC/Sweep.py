@@ -0,0 +1,430 @@
+#!/usr/bin/env python
+
+########################################################################
+# Sweep.py:
+# This is the Parameters Sweep Module of SENTUS tool
+#
+#  Project:        SENTUS
+#  File:           Sweep.py
+#
+#   Author: GNSS Academy
+#   Copyright 2024 GNSS Academy
+#
+# Usage:
+#   Sweep.py $SCEN_PATH --grid KEY VALUE [VALUE ...] [--grid ...]
+#            [--jobs N] [--out REPORT.json|REPORT.csv]
+#
+# The sweep evaluates the preprocessing of the SCENARIO days for all
+# the combinations of the configured values of some parameters of the
+# configuration file (e.g. --grid HATCH_TIME 50 100 200 --grid
+# MAX_CODE_RATE_STEP "1 8.0" "1 12.0"). The OBS file of each day is
+# read once and the variants are preprocessed in parallel over the
+# satellites arcs (see runPreprocessingArcs), reporting the rejection
+# statistics and the smoothing availability of each variant. No PREPRO
+# outputs are written.
+########################################################################
+
+import sys, os
+
+# Update Path to reach COMMON
+Common = os.path.dirname(
+    os.path.abspath(sys.argv[0])) + '/COMMON'
+sys.path.insert(0, Common)
+
+# Import External and Internal functions and Libraries
+#----------------------------------------------------------------------
+import json
+import tempfile
+from argparse import ArgumentParser
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from time import perf_counter
+import numpy as np
+from InputOutput import readConf
+from InputOutput import processConf
+from InputOutput import findObsFile
+from InputOutput import readObsFile
+from InputOutput import getObsSelection
+from InputOutput import REJECTION_CAUSE
+from Preprocessing import runPreprocessingArcs
+from COMMON.Dates import convertJulianDay2YearMonthDay
+from COMMON.Dates import convertYearMonthDay2Doy
+
+# OBS data of the day shared by the variants of a worker (see initSweepWorker)
+SweepObsData = None
+
+#----------------------------------------------------------------------
+# INTERNAL FUNCTIONS
+#----------------------------------------------------------------------
+
+def displayUsage():
+    sys.stderr.write("ERROR: Please provide path to SCENARIO as first argument\n")
+    sys.stderr.write("Usage: Sweep.py $SCEN_PATH --grid KEY VALUE [VALUE ...] "
+        "[--grid ...] [--jobs N] [--out REPORT.json|REPORT.csv]\n")
+
+def parseOptions(Args):
+
+    # Purpose: parse the command line options following the SCENARIO path
+
+    # Parameters
+    # ==========
+    # Args: list
+    #         Command line arguments after the SCENARIO path
+
+    # Returns
+    # =======
+    # Options: argparse.Namespace
+    #         Command line options
+
+    Parser = ArgumentParser(prog="Sweep.py $SCEN_PATH")
+    Parser.add_argument("--grid", dest="Grid", nargs="+", action="append",
+        required=True, metavar="KEY VALUE",
+        help="Configuration parameter and its values to sweep (quote the "
+        "values with several fields, e.g. \"1 12.0\")")
+    Parser.add_argument("--jobs", dest="Jobs", type=int, default=1,
+        help="Number of worker processes evaluating the variants (default 1)")
+    Parser.add_argument("--out", dest="Out", default=None, metavar="PATH",
+        help="Write the report in JSON or CSV format (after the extension)")
+    Options = Parser.parse_args(Args)
+
+    if Options.Jobs < 1:
+        sys.stderr.write("ERROR: --jobs must be a positive integer\n")
+        sys.exit(-1)
+
+    # Grid[Key] = [Values]
+    Grid = OrderedDict({})
+    for Param in Options.Grid:
+        if len(Param) < 2:
+            sys.stderr.write("ERROR: --grid %s has no values\n" % Param[0])
+            sys.exit(-1)
+        if Param[0] in Grid:
+            sys.stderr.write("ERROR: --grid %s is repeated\n" % Param[0])
+            sys.exit(-1)
+        Grid[Param[0]] = [" ".join(Value.split()) for Value in Param[1:]]
+    Options.Grid = Grid
+
+    return Options
+
+# End of parseOptions()
+
+def createSweepConfs(CfgFile, Grid):
+
+    # Purpose: build the configuration of each variant of the sweep,
+    #          overriding the swept parameters in the configuration
+    #          file, so that their values are checked as the ones of
+    #          the configuration file
+
+    # Parameters
+    # ==========
+    # CfgFile: str
+    #         Path to the configuration file of the SCENARIO
+    # Grid: dict
+    #         Grid[Key] = [Values] of the swept parameters
+
+    # Returns
+    # =======
+    # Variants: list
+    #         (Params, Conf) of each variant, Params being the dict of
+    #         the values of the swept parameters
+
+    with open(CfgFile, 'r') as f:
+        Lines = f.readlines()
+
+    Variants = []
+    with tempfile.TemporaryDirectory() as TmpDir:
+        for Values in product(*Grid.values()):
+            Params = OrderedDict(zip(Grid.keys(), Values))
+
+            # Write the configuration of the variant
+            VariantCfgFile = os.path.join(TmpDir, 'sentus.cfg')
+            Found = []
+            with open(VariantCfgFile, 'w') as f:
+                for Line in Lines:
+                    Key = Line.split(' ')[0]
+                    if Line[0] != '#' and Key in Params:
+                        Line = "%s  %s\n" % (Key, Params[Key])
+                        Found.append(Key)
+                    f.write(Line)
+
+                # Optional parameters not in the configuration file
+                for Key in Params:
+                    if Key not in Found:
+                        f.write("%s  %s\n" % (Key, Params[Key]))
+
+            Conf = processConf(readConf(VariantCfgFile))
+
+            # Check that the swept parameters are configuration ones
+            for Key in Params:
+                if Key not in Conf:
+                    sys.stderr.write("ERROR: Unknown configuration parameter %s\n" % Key)
+                    sys.exit(-1)
+
+            # The OBS records are read once for all the variants
+            if Variants and getObsSelection(Conf) != getObsSelection(Variants[0][1]):
+                sys.stderr.write("ERROR: The OBS records selection (SAMPLING_RATE, "
+                "NAV_SOLUTION, PREPRO_PRNS, PREPRO_SOD_RANGE) cannot be swept\n")
+                sys.exit(-1)
+
+            Variants.append((Params, Conf))
+
+    return Variants
+
+# End of createSweepConfs()
+
+def initSweepWorker(ObsData):
+
+    # Purpose: keep the OBS data of the day in a worker process, so
+    #          that it is sent once and not with each variant
+
+    global SweepObsData
+    SweepObsData = ObsData
+
+# End of initSweepWorker()
+
+def evaluateVariant(Conf):
+
+    # Purpose: preprocess the OBS data of the day with the configuration
+    #          of a variant and count its rejected and smoothed
+    #          measurements
+
+    # Parameters
+    # ==========
+    # Conf: dict
+    #         Configuration dictionary of the variant
+
+    # Returns
+    # =======
+    # Counts: dict
+    #         Number of measurements, valid and smoothed ones and
+    #         rejected ones per rejection cause
+
+    PreproObsData = runPreprocessingArcs(Conf, SweepObsData)
+
+    Rejections = np.bincount(PreproObsData["REJECT"].astype(np.int64),
+        minlength=max(REJECTION_CAUSE.values()) + 1)
+
+    Counts = OrderedDict({})
+    Counts["MEAS"] = len(PreproObsData["VALID"])
+    Counts["VALID"] = int(np.sum(PreproObsData["VALID"] == 1))
+    Counts["SMOOTHED"] = int(np.sum(PreproObsData["STATUS"] == 1))
+    for Cause, Flag in REJECTION_CAUSE.items():
+        Counts[Cause] = int(Rejections[Flag])
+
+    return Counts
+
+# End of evaluateVariant()
+
+def runSweep(Scen, Conf, Variants, Jobs):
+
+    # Purpose: evaluate all the variants over the SCENARIO days, reading
+    #          each OBS file once
+
+    # Parameters
+    # ==========
+    # Scen: str
+    #         Path to SCENARIO
+    # Conf: dict
+    #         Configuration dictionary of the SCENARIO
+    # Variants: list
+    #         (Params, Conf) of each variant (see createSweepConfs)
+    # Jobs: int
+    #         Number of worker processes
+
+    # Returns
+    # =======
+    # Counts: list
+    #         Counts of each variant for all the days (see evaluateVariant)
+
+    global SweepObsData
+
+    Counts = [None] * len(Variants)
+    for Jd in range(Conf["INI_DATE_JD"], Conf["END_DATE_JD"] + 1):
+        Year, Month, Day = convertJulianDay2YearMonthDay(Jd)
+        Doy = convertYearMonthDay2Doy(Year, Month, Day)
+
+        # Find the OBS file or its compressed version
+        ObsFile = findObsFile(Scen + \
+            '/INP/OBS/' + "OBS_%s_Y%02dD%03d.dat.mod" % \
+                (Conf['SAT_ACRONYM'], Year % 100, Doy))
+
+        # Display Message
+        print("INFO: Reading file: %s..." % ObsFile)
+
+        ObsData = readObsFile(ObsFile, *getObsSelection(Conf), 
+            IdxDir=Scen + '/OUT/OBS_IDX')
+
+        # Display Message
+        print("INFO: Evaluating %d variants on Y%02dD%03d..." %
+        (len(Variants), Year % 100, Doy))
+
+        Start = perf_counter()
+        if Jobs > 1 and len(Variants) > 1:
+            with ProcessPoolExecutor(max_workers=min(Jobs, len(Variants)),
+                initializer=initSweepWorker, initargs=(ObsData,)) as Pool:
+                DayCounts = list(Pool.map(evaluateVariant,
+                    [VariantConf for _, VariantConf in Variants]))
+        else:
+            SweepObsData = ObsData
+            DayCounts = [evaluateVariant(VariantConf) for _, VariantConf in Variants]
+            SweepObsData = None
+
+        print("INFO: Variants evaluated in %.3f s" % (perf_counter() - Start))
+
+        # Add the counts of the day
+        for i, VariantCounts in enumerate(DayCounts):
+            if Counts[i] is None:
+                Counts[i] = VariantCounts
+            else:
+                for Key in VariantCounts:
+                    Counts[i][Key] += VariantCounts[Key]
+
+    return Counts
+
+# End of runSweep()
+
+def getSweepReport(Variants, Counts):
+
+    # Purpose: build the report lines of the variants: swept parameters,
+    #          availability of valid and smoothed measurements and
+    #          rejected measurements per cause
+
+    # Parameters
+    # ==========
+    # Variants: list
+    #         (Params, Conf) of each variant (see createSweepConfs)
+    # Counts: list
+    #         Counts of each variant (see evaluateVariant)
+
+    # Returns
+    # =======
+    # Report: list
+    #         Report line (dict) of each variant
+
+    Report = []
+    for i, ((Params, _), VariantCounts) in enumerate(zip(Variants, Counts)):
+        Meas = VariantCounts["MEAS"]
+        Line = OrderedDict({})
+        Line["variant"] = i + 1
+        for Key, Value in Params.items():
+            Line[Key] = Value
+        Line["meas"] = Meas
+        Line["valid"] = VariantCounts["VALID"]
+        Line["valid_pct"] = 100.0 * VariantCounts["VALID"] / Meas if Meas else 0.0
+        Line["smoothed"] = VariantCounts["SMOOTHED"]
+        Line["smoothed_pct"] = 100.0 * VariantCounts["SMOOTHED"] / Meas if Meas else 0.0
+        Line["smoothed_valid_pct"] = 100.0 * VariantCounts["SMOOTHED"] / \
+            VariantCounts["VALID"] if VariantCounts["VALID"] else 0.0
+        for Cause in REJECTION_CAUSE:
+            Line[Cause] = VariantCounts[Cause]
+        Report.append(Line)
+
+    return Report
+
+# End of getSweepReport()
+
+def printSweepReport(Grid, Report):
+    print( '\n------------------------------------')
+    print( '--> SENTUS SWEEP:')
+    print( '------------------------------------')
+
+    # Swept parameters of each variant
+    Widths = [max([len(Key)] + [len(Value) for Value in Values])
+        for Key, Values in Grid.items()]
+    print("%7s %s %10s %8s %8s %8s" % ("VARIANT",
+        " ".join(["%-*s" % (Width, Key) for Key, Width in zip(Grid, Widths)]),
+        "MEAS", "VALID%", "SMOOTH%", "SMVAL%"))
+    for Line in Report:
+        print("%7d %s %10d %8.2f %8.2f %8.2f" % (Line["variant"],
+            " ".join(["%-*s" % (Width, Line[Key]) for Key, Width in zip(Grid, Widths)]),
+            Line["meas"], Line["valid_pct"], Line["smoothed_pct"],
+            Line["smoothed_valid_pct"]))
+
+    # Rejected measurements per cause (only the causes of some variant)
+    Causes = [Cause for Cause in REJECTION_CAUSE
+        if any([Line[Cause] > 0 for Line in Report])]
+    if Causes:
+        print("\nREJECTED MEASUREMENTS:")
+        print("%7s %s" % ("VARIANT", " ".join(["%*s" % (max(len(Cause), 8), Cause)
+            for Cause in Causes])))
+        for Line in Report:
+            print("%7d %s" % (Line["variant"], " ".join(["%*d" % (max(len(Cause), 8),
+                Line[Cause]) for Cause in Causes])))
+
+# End of printSweepReport()
+
+def writeSweepReport(Path, Report):
+
+    # Purpose: write the report in JSON or CSV format (after the extension)
+
+    # Parameters
+    # ==========
+    # Path: str
+    #         Path to report file
+    # Report: list
+    #         Report line (dict) of each variant (see getSweepReport)
+
+    Dir = os.path.dirname(Path)
+    if Dir and not os.path.exists(Dir):
+        os.makedirs(Dir)
+
+    with open(Path, 'w') as f:
+        if Path.lower().endswith(".csv"):
+            Keys = list(Report[0].keys())
+            f.write(",".join(Keys) + "\n")
+            for Line in Report:
+                f.write(",".join([("%.4f" % Line[Key]) if isinstance(Line[Key], float)
+                    else str(Line[Key]) for Key in Keys]) + "\n")
+        else:
+            json.dump(Report, f, indent=1)
+
+    print("INFO: Sweep report written in %s" % Path)
+
+# End of writeSweepReport()
+
+#######################################################
+# MAIN BODY
+#######################################################
+
+if __name__ == "__main__":
+
+    # Check InputOutput Arguments
+    # (the SCENARIO path must be the first one, see PreprocessingPlots)
+    if len(sys.argv) < 2 or sys.argv[1].startswith("-"):
+        displayUsage()
+        sys.exit()
+
+    # Extract the arguments
+    Scen = sys.argv[1]
+    Options = parseOptions(sys.argv[2:])
+
+    # Select the Configuration file name
+    CfgFile = Scen + '/CFG/sentus.cfg'
+
+    # Read conf file
+    Conf = processConf(readConf(CfgFile))
+
+    # Print header
+    print( '------------------------------------')
+    print( '--> RUNNING SENTUS SWEEP:')
+    print( '------------------------------------')
+
+    # Build the configurations of the variants
+    Variants = createSweepConfs(CfgFile, Options.Grid)
+
+    # Evaluate the variants
+    Counts = runSweep(Scen, Conf, Variants, Options.Jobs)
+
+    print( '\n------------------------------------')
+    print( '--> END OF SENTUS SWEEP')
+    print( '------------------------------------')
+
+    # Report the statistics of the variants
+    Report = getSweepReport(Variants, Counts)
+    printSweepReport(Options.Grid, Report)
+    if Options.Out is not None:
+        writeSweepReport(Options.Out, Report)
+
+#######################################################
+# End of Sweep.py
+#######################################################